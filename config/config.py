@@ -3,6 +3,75 @@
 # Échelle de temps
 TIME_SCALE = 1.0  # 1.0 = temps normal, >1.0 = accéléré, <1.0 = ralenti
 
+# Production des ressources côté serveur, trois modes exclusifs :
+# - "lazy" : accumulation paresseuse, chaque ville est réglée à l'accès au lieu d'un tick par seconde
+# - "tick" : boucle Python du tick sur toutes les villes (ResourceManager.update_all)
+# - "numpy" : tick dont la production est calculée en une passe vectorisée (ResourceEngine) ; NumPy est
+#   optionnel, sans lui le serveur reste en mode "tick"
+RESOURCE_ACCRUAL = "lazy"
+# Pas (en secondes de jeu) du règlement paresseux : même découpage que le tick tant que la population évolue
+SETTLE_STEP = 1.0
+
+# Pas de simulation maximal (en secondes de jeu) lors d'un rattrapage après un retard du tick
+MAX_TICK_STEP = 5.0
+
+# Stockage de la sauvegarde côté serveur : "json" (savegame.json) ou "sqlite" (tables normalisées, mode WAL)
+SAVE_BACKEND = "json"
+SQLITE_SAVE_PATH = "savegame.db"
+
+# Format des instantanés du stockage "json" : "json" (savegame.json) ou "binary" (savegame.bin, compact)
+SNAPSHOT_FORMAT = "json"
+BINARY_SAVE_PATH = "savegame.bin"
+
+# Intervalle (en secondes) entre deux instantanés ; entre deux instantanés, chaque action des routes et chaque
+# fin de phase de transport est ajoutée au journal d'actions et rejouée au chargement. L'évolution due au tick
+# (production, population, constructions, recherche) n'est pas journalisée : l'intervalle borne sa perte
+SNAPSHOT_INTERVAL = 10
+
+# Validation des unités de travail des routes : écriture du journal après delay secondes sans nouvelle action
+# (au plus COMMIT_MAX_DELAY secondes après la première action de la rafale)
+COMMIT_DEBOUNCE = 0.5
+COMMIT_MAX_DELAY = 2.0
+
+# Comptes joueurs : au-delà de ce nombre de comptes dans players_table.jsonl, le journal est réintégré
+# dans players_table.json (compaction, aussi faite à l'arrêt du serveur)
+PLAYERS_JOURNAL_COMPACT_SIZE = 100
+
+# Règlement de la production avant /get_state et /get_state_for_player : au plus une fois par intervalle
+# (en secondes) et par vue, pour que les interrogations rapprochées partagent la réponse en cache
+STATE_SETTLE_INTERVAL = 1.0
+
+# Canal d'événements poussés (/events) : intervalle (en secondes) entre deux différentiels d'état envoyés
+# au client, et commentaire de maintien de connexion après EVENT_KEEPALIVE secondes sans envoi
+EVENT_STATE_INTERVAL = 1.0
+EVENT_KEEPALIVE = 15.0
+# Chaque canal /events ouvert occupe un thread du serveur pour toute sa durée : au plus EVENT_MAX_STREAMS canaux
+# (et jamais plus de la moitié de SERVER_THREADS). Les clients refusés (503) restent sur l'interrogation périodique
+# et retentent le canal après EVENT_RETRY_AFTER secondes
+EVENT_MAX_STREAMS = 16
+EVENT_RETRY_AFTER = 60
+
+# Client HTTP (NetworkManager) : session unique à connexions persistantes. Délais (connexion, lecture)
+# en secondes, nouvelles tentatives avec attente exponentielle pour les requêtes idempotentes (GET),
+# taille du pool de connexions et compression gzip des réponses
+HTTP_TIMEOUT = (3.05, 10.0)
+HTTP_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.3
+HTTP_POOL_SIZE = 8
+HTTP_GZIP = True
+# Requêtes non bloquantes du client (NetworkManager.submit) : nombre de threads du pool
+HTTP_WORKERS = 4
+
+# Rafraîchissement de l'interface (RefreshHub) : pas de l'horloge commune en secondes, et intervalle minimal
+# entre deux requêtes d'état au serveur lorsque le canal d'événements n'est pas connecté
+REFRESH_TICK = 0.5
+STATE_POLL_INTERVAL = 1.0
+
+# Serveur : réponses JSON compressées (si le client accepte gzip) à partir de cette taille en octets
+HTTP_GZIP_MIN_SIZE = 1024
+# Threads du serveur waitress (connexions persistantes) ; chaque client abonné à /events en occupe un (voir EVENT_MAX_STREAMS)
+SERVER_THREADS = 32
+
 from kivy.clock import Clock
 
 class GameUpdateManager:
@@ -29,4 +98,4 @@ class GameUpdateManager:
     def set_time_scale(self, time_scale):
         self.time_scale = time_scale
         Clock.unschedule(self.update_game_state)
-        Clock.schedule_interval(self.update_game_state, 1 / self.time_scale)
\ No newline at end of file
+        Clock.schedule_interval(self.update_game_state, 1 / self.time_scale)
@@ -0,0 +1,230 @@
+"""
+Format binaire compact des sauvegardes (alternative à savegame.json).
+
+Disposition :
+- En-tête struct : signature b"CVSB", version du format, taille du contenu décompressé.
+- Contenu compressé (zlib) : une seule valeur (le document), écrite par un encodage explicite
+  indépendant de la version de Python. Chaque valeur commence par un code de type d'un octet :
+  - N, T, F : None, True, False ; i : entier signé 64 bits ; G : grand entier (texte décimal) ; d : flottant 64 bits ;
+  - s : chaîne (longueur, UTF-8), internée : une clé ou une valeur répétée (noms de ressources, de bâtiments...)
+    n'est écrite qu'une fois, les suivantes sont des références r (indice) ;
+  - l : liste (nombre d'éléments, éléments) ; m : dict (nombre d'entrées, clé chaîne puis valeur) ;
+  - A / a : dict dont toutes les valeurs sont numériques (stocks, capacités, bonus par ressource) :
+    schéma de clés nouveau (A : clés) ou déjà vu (a : indice), puis un code par valeur (i ou d)
+    et les valeurs empaquetées. Un entier reste un entier, un flottant reste un flottant.
+  Les longueurs et indices sont des entiers variables (7 bits par octet).
+
+Le document décodé est identique au dict JSON d'origine, types des nombres compris.
+"""
+
+import json
+import struct
+import zlib
+
+MAGIC = b"CVSB"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHI")  # signature, version du format, taille décompressée
+MIN_NUMERIC_DICT = 2  # En dessous, un dict numérique reste un dict
+INT64 = struct.Struct("<q")
+FLOAT64 = struct.Struct("<d")
+
+
+def is_binary_snapshot(blob: bytes) -> bool:
+    return blob[:len(MAGIC)] == MAGIC
+
+
+def _is_number(value) -> bool:
+    return type(value) in (int, float)
+
+
+def _fits_int64(value) -> bool:
+    return -2**63 <= value < 2**63
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_snapshot(document: dict) -> bytes:
+    """Encode un document au format savegame.json en sauvegarde binaire."""
+    out = bytearray()
+    strings = {}
+    schemas = {}
+
+    def write_string(text):
+        index = strings.get(text)
+        if index is not None:
+            out.extend(b"r")
+            _write_varint(out, index)
+            return
+        strings[text] = len(strings)
+        data = text.encode("utf-8")
+        out.extend(b"s")
+        _write_varint(out, len(data))
+        out.extend(data)
+
+    def write(value):
+        if value is None:
+            out.extend(b"N")
+        elif value is True:
+            out.extend(b"T")
+        elif value is False:
+            out.extend(b"F")
+        elif type(value) is int:
+            if _fits_int64(value):
+                out.extend(b"i" + INT64.pack(value))
+            else:
+                data = str(value).encode("ascii")
+                out.extend(b"G")
+                _write_varint(out, len(data))
+                out.extend(data)
+        elif type(value) is float:
+            out.extend(b"d" + FLOAT64.pack(value))
+        elif isinstance(value, str):
+            write_string(value)
+        elif isinstance(value, (list, tuple)):
+            out.extend(b"l")
+            _write_varint(out, len(value))
+            for item in value:
+                write(item)
+        elif isinstance(value, dict):
+            values = list(value.values())
+            if (len(values) >= MIN_NUMERIC_DICT and all(_is_number(v) for v in values)
+                    and all(type(v) is float or _fits_int64(v) for v in values)
+                    and all(isinstance(k, str) for k in value)):
+                write_numeric_dict(value, values)
+                return
+            out.extend(b"m")
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                write_string(str(key))
+                write(item)
+        else:
+            raise TypeError(f"Valeur non sérialisable dans une sauvegarde : {type(value).__name__}")
+
+    def write_numeric_dict(value, values):
+        keys = tuple(value)
+        index = schemas.get(keys)
+        if index is None:
+            schemas[keys] = len(schemas)
+            out.extend(b"A")
+            _write_varint(out, len(keys))
+            for key in keys:
+                write_string(key)
+        else:
+            out.extend(b"a")
+            _write_varint(out, index)
+        typecodes = "".join("i" if type(v) is int else "d" for v in values)
+        out.extend(typecodes.encode("ascii"))
+        out.extend(struct.pack("<" + typecodes.replace("i", "q"), *values))
+
+    write(document)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(out)) + zlib.compress(bytes(out), 1)
+
+
+def decode_snapshot(blob: bytes) -> dict:
+    """Décode une sauvegarde binaire en document au format savegame.json."""
+    magic, version, size = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Sauvegarde binaire invalide (signature)")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Version de sauvegarde binaire non prise en charge : {version}")
+    payload = zlib.decompress(blob[HEADER.size:])
+    if len(payload) != size:
+        raise ValueError("Sauvegarde binaire tronquée")
+
+    strings = []
+    schemas = []
+    pos = 0
+
+    def read_varint():
+        nonlocal pos
+        result = shift = 0
+        while True:
+            byte = payload[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read_bytes(count):
+        nonlocal pos
+        data = payload[pos:pos + count]
+        if len(data) != count:
+            raise ValueError("Sauvegarde binaire tronquée")
+        pos += count
+        return data
+
+    def read():
+        nonlocal pos
+        tag = payload[pos:pos + 1]
+        pos += 1
+        if tag == b"N":
+            return None
+        if tag == b"T":
+            return True
+        if tag == b"F":
+            return False
+        if tag == b"i":
+            return INT64.unpack(read_bytes(INT64.size))[0]
+        if tag == b"G":
+            return int(read_bytes(read_varint()).decode("ascii"))
+        if tag == b"d":
+            return FLOAT64.unpack(read_bytes(FLOAT64.size))[0]
+        if tag == b"s":
+            text = read_bytes(read_varint()).decode("utf-8")
+            strings.append(text)
+            return text
+        if tag == b"r":
+            return strings[read_varint()]
+        if tag == b"l":
+            return [read() for _ in range(read_varint())]
+        if tag == b"m":
+            result = {}
+            for _ in range(read_varint()):
+                key = read()
+                result[key] = read()
+            return result
+        if tag == b"A":
+            keys = tuple(read() for _ in range(read_varint()))
+            schemas.append(keys)
+            return read_numbers(keys)
+        if tag == b"a":
+            return read_numbers(schemas[read_varint()])
+        raise ValueError(f"Sauvegarde binaire invalide (code de type {tag!r})")
+
+    def read_numbers(keys):
+        typecodes = read_bytes(len(keys)).decode("ascii")
+        layout = struct.Struct("<" + typecodes.replace("i", "q"))
+        return dict(zip(keys, layout.unpack(read_bytes(layout.size))))
+
+    document = read()
+    if pos != len(payload):
+        raise ValueError("Sauvegarde binaire invalide (données en trop)")
+    return document
+
+
+def load_snapshot_file(filepath: str) -> dict:
+    """Charge une sauvegarde, binaire ou JSON selon sa signature."""
+    with open(filepath, "rb") as file:
+        blob = file.read()
+    if is_binary_snapshot(blob):
+        return decode_snapshot(blob)
+    return json.loads(blob)
+
+
+def convert_json_to_binary(json_path: str = "savegame.json", binary_path: str = "savegame.bin"):
+    with open(json_path, "r") as file:
+        document = json.load(file)
+    with open(binary_path, "wb") as file:
+        file.write(encode_snapshot(document))
+
+
+def convert_binary_to_json(binary_path: str = "savegame.bin", json_path: str = "savegame.json"):
+    document = load_snapshot_file(binary_path)
+    with open(json_path, "w") as file:
+        json.dump(document, file, indent=4)
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 from datetime import datetime
 
@@ -117,4 +118,272 @@ def create_connection(db_path):
         print("Connexion établie avec SQLite")
     except sqlite3.Error as e:
         print(f"Erreur lors de la connexion à SQLite : {e}")
-    return conn
\ No newline at end of file
+    return conn
+
+class WorldDatabase(Database):
+    """
+    Stockage SQLite normalisé de l'état du monde (villes, bâtiments, ressources, îles, sites de ressources,
+    dons, joueurs, transports, notifications).
+    - Mode WAL : les lectures ne bloquent pas l'écriture d'un point de sauvegarde.
+    - Un point de sauvegarde est un lot {(type, clé): lignes ou None} appliqué en une seule transaction :
+      les lignes d'une entité remplacent les précédentes, None supprime l'entité.
+    - load_world reconstruit un dict au format de savegame.json, relu par GameData.from_dict.
+    """
+
+    # Tables enfants de chaque type d'entité et colonnes de clé correspondantes
+    ENTITY_TABLES = {
+        "island": (("islands", ("island_key",)),),
+        "city": (
+            ("cities", ("id",)),
+            ("city_resources", ("city_id",)),
+            ("buildings", ("city_id",)),
+        ),
+        "site": (
+            ("resource_sites", ("island_key", "position")),
+            ("site_donations", ("island_key", "site_position")),
+        ),
+        "player": (("game_players", ("player_id",)),),
+        "transports": (("transports", ()),),
+        "notifications": (("notifications", ("player_id",)),),
+        "meta": (("meta", ()),),
+    }
+
+    INSERTS = {
+        "islands": "INSERT INTO islands (island_key, position, name, coords, background, base_resource, advanced_resource, city_layout) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        "cities": "INSERT INTO cities (id, island_key, position, name, owner, slot_count, last_accrued_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        "city_resources": "INSERT INTO city_resources (city_id, resource, amount, data) VALUES (?, ?, ?, ?)",
+        "buildings": "INSERT INTO buildings (city_id, slot, name, level, status, started_at, build_duration, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        "resource_sites": "INSERT INTO resource_sites (island_key, type, position, level, upgrade_start_time, upgrade_time, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        "site_donations": "INSERT INTO site_donations (island_key, site_position, kind, city_id, resource, amount) VALUES (?, ?, ?, ?, ?, ?)",
+        "game_players": "INSERT INTO game_players (player_id, position, username, research_points, ships_available, data) VALUES (?, ?, ?, ?, ?, ?)",
+        "transports": "INSERT INTO transports (id, ville_source, ville_dest, joueur_source, joueur_dest, etat, temps_restant, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        "notifications": "INSERT INTO notifications (player_id, position, message, type, timestamp, lu) VALUES (?, ?, ?, ?, ?, ?)",
+        "meta": "INSERT INTO meta (key, value) VALUES (?, ?)",
+    }
+
+    def connect(self):
+        try:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.c = self.conn.cursor()
+            self.c.execute("PRAGMA journal_mode=WAL")
+            self.c.execute("PRAGMA synchronous=NORMAL")
+            self.create_world_tables()
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la connexion à la base de données: {e}")
+
+    def create_world_tables(self):
+        self.c.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS islands (
+                island_key TEXT PRIMARY KEY, position INTEGER, name TEXT, coords TEXT, background TEXT,
+                base_resource TEXT, advanced_resource TEXT, city_layout TEXT
+            );
+            CREATE TABLE IF NOT EXISTS cities (
+                id TEXT PRIMARY KEY, island_key TEXT, position INTEGER, name TEXT, owner TEXT,
+                slot_count INTEGER, last_accrued_at REAL, data TEXT
+            );
+            CREATE INDEX IF NOT EXISTS cities_owner ON cities (owner);
+            CREATE TABLE IF NOT EXISTS city_resources (
+                city_id TEXT, resource TEXT, amount REAL, data TEXT, PRIMARY KEY (city_id, resource)
+            );
+            CREATE TABLE IF NOT EXISTS buildings (
+                city_id TEXT, slot INTEGER, name TEXT, level INTEGER, status TEXT, started_at TEXT,
+                build_duration REAL, data TEXT, PRIMARY KEY (city_id, slot)
+            );
+            CREATE TABLE IF NOT EXISTS resource_sites (
+                island_key TEXT, type TEXT, position INTEGER, level INTEGER, upgrade_start_time TEXT,
+                upgrade_time REAL, data TEXT, PRIMARY KEY (island_key, position)
+            );
+            CREATE TABLE IF NOT EXISTS site_donations (
+                island_key TEXT, site_position INTEGER, kind TEXT, city_id TEXT, resource TEXT, amount REAL
+            );
+            CREATE INDEX IF NOT EXISTS site_donations_site ON site_donations (island_key, site_position);
+            CREATE TABLE IF NOT EXISTS game_players (
+                player_id TEXT PRIMARY KEY, position INTEGER, username TEXT, research_points REAL,
+                ships_available INTEGER, data TEXT
+            );
+            CREATE TABLE IF NOT EXISTS transports (
+                id INTEGER PRIMARY KEY, ville_source TEXT, ville_dest TEXT, joueur_source TEXT,
+                joueur_dest TEXT, etat TEXT, temps_restant REAL, data TEXT
+            );
+            CREATE TABLE IF NOT EXISTS notifications (
+                player_id TEXT, position INTEGER, message TEXT, type TEXT, timestamp TEXT, lu INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS notifications_player ON notifications (player_id);
+        ''')
+        self.conn.commit()
+
+    # --- Conversion entité (dict de sauvegarde) -> lignes ---
+    @staticmethod
+    def island_key(coords):
+        return json.dumps(list(coords) if coords is not None else None)
+
+    @classmethod
+    def island_rows(cls, island, position):
+        return {"islands": [(
+            cls.island_key(island.get("coords")), position, island.get("name"), json.dumps(island.get("coords")),
+            island.get("background"), island.get("base_resource"), island.get("advanced_resource"),
+            island.get("city_layout"),
+        )]}
+
+    @classmethod
+    def city_rows(cls, city_dict, island_coords, position):
+        city_id = city_dict["id"]
+        buildings = city_dict.get("buildings", [])
+        data = {k: v for k, v in city_dict.items() if k not in ("resources", "buildings", "last_accrued_at")}
+        resources = []
+        for resource, value in city_dict.get("resources", {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                resources.append((city_id, resource, value, None))
+            else:
+                resources.append((city_id, resource, None, json.dumps(value)))
+        return {
+            "cities": [(
+                city_id, cls.island_key(island_coords), position, city_dict.get("name"), city_dict.get("owner"),
+                len(buildings), city_dict.get("last_accrued_at"), json.dumps(data),
+            )],
+            "city_resources": resources,
+            "buildings": [
+                (city_id, slot, b.get("name"), b.get("level"), b.get("status"), b.get("started_at"),
+                 b.get("build_duration"), json.dumps(b))
+                for slot, b in enumerate(buildings) if b
+            ],
+        }
+
+    @classmethod
+    def site_rows(cls, site, island_coords, position):
+        # Une île peut porter plusieurs sites du même type : le site est identifié par sa position sur l'île
+        key = cls.island_key(island_coords)
+        data = {k: v for k, v in site.items() if k not in ("donations", "donations_history", "coords", "city_coords")}
+        donations = []
+        for kind in ("donations", "donations_history"):
+            by_city = site.get(kind)
+            if isinstance(by_city, dict):
+                data[kind] = {}  # Complété au chargement par les lignes de site_donations
+                for city_id, amounts in by_city.items():
+                    for resource, amount in amounts.items():
+                        donations.append((key, position, kind, city_id, resource, amount))
+            elif by_city is not None:
+                data[kind] = by_city  # Ancien format (nombre) conservé tel quel
+        return {
+            "resource_sites": [(
+                key, site.get("type"), position, site.get("level"), site.get("upgrade_start_time"),
+                site.get("upgrade_time"), json.dumps(data),
+            )],
+            "site_donations": donations,
+        }
+
+    @staticmethod
+    def player_rows(player_dict, position):
+        return {"game_players": [(
+            player_dict["id_player"], position, player_dict.get("username"), player_dict.get("research_points"),
+            player_dict.get("ships_available"), json.dumps(player_dict),
+        )]}
+
+    @staticmethod
+    def transport_rows(transports):
+        return {"transports": [
+            (t.get("id"), t.get("ville_source"), t.get("ville_dest"), t.get("joueur_source"), t.get("joueur_dest"),
+             t.get("etat"), t.get("temps_restant"), json.dumps(t))
+            for t in transports
+        ]}
+
+    @staticmethod
+    def notification_rows(player_id, notifications):
+        return {"notifications": [
+            (json.dumps(player_id), position, n.get("message"), n.get("type"),
+             n["timestamp"].isoformat() if hasattr(n.get("timestamp"), "isoformat") else n.get("timestamp"),
+             int(bool(n.get("lu"))))
+            for position, n in enumerate(notifications)
+        ]}
+
+    @staticmethod
+    def meta_rows(meta):
+        return {"meta": [(key, json.dumps(value)) for key, value in meta.items()]}
+
+    # --- Écriture d'un point de sauvegarde ---
+    def apply_batch(self, batch):
+        """Applique un lot {(type, clé): lignes ou None} en une seule transaction."""
+        with self.conn:
+            for (kind, *key), rows in batch.items():
+                for table, key_columns in self.ENTITY_TABLES[kind]:
+                    if key_columns:
+                        where = " AND ".join(f"{column} = ?" for column in key_columns)
+                        self.conn.execute(f"DELETE FROM {table} WHERE {where}", key)
+                    else:
+                        self.conn.execute(f"DELETE FROM {table}")
+                    if rows and rows.get(table):
+                        self.conn.executemany(self.INSERTS[table], rows[table])
+
+    # --- Chargement ---
+    def load_world(self):
+        """Reconstruit l'état au format de savegame.json, ou None si la base est vide."""
+        meta = {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM meta")}
+        if not meta:
+            return None
+
+        resources = {}
+        for city_id, resource, amount, data in self.conn.execute("SELECT city_id, resource, amount, data FROM city_resources"):
+            resources.setdefault(city_id, {})[resource] = amount if data is None else json.loads(data)
+        buildings = {}
+        for city_id, slot, data in self.conn.execute("SELECT city_id, slot, data FROM buildings"):
+            buildings.setdefault(city_id, {})[slot] = json.loads(data)
+        donations = {}
+        for key, position, kind, city_id, resource, amount in self.conn.execute(
+            "SELECT island_key, site_position, kind, city_id, resource, amount FROM site_donations"
+        ):
+            site = donations.setdefault((key, position), {})
+            site.setdefault(kind, {}).setdefault(city_id, {})[resource] = amount
+
+        elements = {}
+        for city_id, key, position, slot_count, last_accrued_at, data in self.conn.execute(
+            "SELECT id, island_key, position, slot_count, last_accrued_at, data FROM cities"
+        ):
+            city = json.loads(data)
+            slots = buildings.get(city_id, {})
+            city["buildings"] = [slots.get(slot) for slot in range(slot_count)]
+            city["resources"] = resources.get(city_id, {})
+            city["last_accrued_at"] = last_accrued_at
+            elements.setdefault(key, []).append((position, city))
+        for key, position, data in self.conn.execute(
+            "SELECT island_key, position, data FROM resource_sites"
+        ):
+            site = json.loads(data)
+            for kind, by_city in donations.get((key, position), {}).items():
+                site[kind] = by_city
+            elements.setdefault(key, []).append((position, site))
+
+        islands = []
+        for key, name, coords, background, base_resource, advanced_resource, city_layout in self.conn.execute(
+            "SELECT island_key, name, coords, background, base_resource, advanced_resource, city_layout FROM islands ORDER BY position"
+        ):
+            islands.append({
+                "name": name,
+                "coords": json.loads(coords),
+                "background": background,
+                "base_resource": base_resource,
+                "advanced_resource": advanced_resource,
+                "elements": [elem for _, elem in sorted(elements.get(key, []), key=lambda item: item[0])],
+                "city_layout": city_layout,
+            })
+
+        players = {
+            player_id: json.loads(data)
+            for player_id, data in self.conn.execute("SELECT player_id, data FROM game_players ORDER BY position")
+        }
+        transports = [json.loads(data) for (data,) in self.conn.execute("SELECT data FROM transports ORDER BY id")]
+        return {**meta, "islands": islands, "players": players, "transports": transports}
+
+    def load_notifications(self):
+        """Retourne {joueur_id: [notifications]} dans l'ordre d'ajout."""
+        notifications = {}
+        for player_id, message, type_, timestamp, lu in self.conn.execute(
+            "SELECT player_id, message, type, timestamp, lu FROM notifications ORDER BY player_id, position"
+        ):
+            notifications.setdefault(json.loads(player_id), []).append({
+                "message": message,
+                "type": type_,
+                "timestamp": datetime.fromisoformat(timestamp) if timestamp else None,
+                "lu": bool(lu),
+            })
+        return notifications
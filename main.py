@@ -46,6 +46,7 @@ from config.config import TIME_SCALE, GameUpdateManager
 from database.sauvegarde import Database
 from views.view_manager import ViewManager
 from network.network_manager import NetworkManager
+from network.refresh_hub import RefreshHub
 from managers.transport_manager import TransportManager
 
 SERVER_URL = get_server_url()  # URL adaptée à la plateforme
@@ -125,9 +126,7 @@ class MainWidget(BoxLayout):
     def sync_from_server(self):
         """Synchronise GameData et les vues depuis le serveur central."""
         try:
-            data = self.network_manager.get_state()
-            if data:
-                self.game_data.from_dict(data)
+            if self.network_manager.sync_game_data(self.game_data):
                 self.sync_userview()
                 self.view_manager.sync_from_server()
                 self.view_manager.refresh_all_views()
@@ -159,6 +158,9 @@ class MainWidget(BoxLayout):
             self.sync_userview()
             self.buildings_manager.set_network_config(self.network_manager, self.username)
             self.sync_from_server()
+        if self.player_id:
+            # Canal d'événements du joueur : état et événements poussés au lieu des interrogations périodiques
+            self.network_manager.start_event_stream(self.game_data)
 
     def refresh_after_action(self):
         """
@@ -171,6 +173,18 @@ class GameApp(App):
     def build(self):
         return MainWidget()
 
+    def on_pause(self):
+        # Android : application en arrière-plan, plus aucun rafraîchissement périodique
+        RefreshHub.shared().suspend()
+        return True
+
+    def on_resume(self):
+        RefreshHub.shared().resume()
+
+    def on_stop(self):
+        # Ferme le canal d'événements et le pool de requêtes (sinon la sortie attend les requêtes en cours)
+        self.root.network_manager.close()
+
 if __name__ == "__main__":
     import sys
     import traceback
@@ -0,0 +1,113 @@
+"""
+ActionJournal : journal d'actions en ajout seul (une ligne JSON par action).
+
+Responsabilités :
+- Ajouter à la fin du fichier un enregistrement numéroté (seq) pour chaque route qui modifie l'état :
+  la durabilité d'une action coûte une écriture séquentielle au lieu d'une réécriture du monde.
+- Relire les enregistrements postérieurs à un instantané (read_after) pour les rejouer au chargement.
+- Oublier les enregistrements couverts par un instantané écrit sur disque (truncate_through).
+
+Une ligne tronquée en fin de fichier (arrêt brutal pendant un ajout) est ignorée à la relecture.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from managers.snapshot_writer import write_atomic
+
+
+class ActionJournal:
+    def __init__(self, filepath: str = "actions_journal.jsonl", fsync: bool = True):
+        self.filepath = filepath
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_seq = None  # Lu depuis le fichier au premier accès
+        self._torn = False
+
+    @property
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._ensure_seq()
+
+    def _ensure_seq(self) -> int:
+        if self._last_seq is None:
+            records = self._read()
+            if self._torn:
+                # Retire la ligne tronquée pour que les ajouts suivants restent lisibles
+                self._rewrite(records)
+            self._last_seq = max((record["seq"] for record in records), default=0)
+        return self._last_seq
+
+    def advance_to(self, seq: int):
+        """Garantit que les prochains numéros suivent seq (numéro couvert par l'instantané chargé)."""
+        with self._lock:
+            self._last_seq = max(self._ensure_seq(), seq or 0)
+
+    def append(self, action: str, record: dict) -> int:
+        """Ajoute un enregistrement pour action et retourne son numéro."""
+        with self._lock:
+            seq = self._ensure_seq() + 1
+            line = json.dumps({"seq": seq, "t": time.time(), "action": action, **record})
+            try:
+                if self._file is None:
+                    self._file = open(self.filepath, "a")
+                self._file.write(line + "\n")
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            except Exception as e:
+                logging.error(f"[ActionJournal] Impossible d'écrire {self.filepath}: {e}")
+                return None
+            self._last_seq = seq
+            return seq
+
+    def read_after(self, seq: int) -> list:
+        """Retourne les enregistrements de numéro strictement supérieur à seq, dans l'ordre."""
+        with self._lock:
+            return [record for record in self._read() if record["seq"] > (seq or 0)]
+
+    def truncate_through(self, seq: int):
+        """Retire du fichier les enregistrements de numéro inférieur ou égal à seq."""
+        if seq is None:
+            return
+        with self._lock:
+            self._rewrite([record for record in self._read() if record["seq"] > seq])
+
+    def _rewrite(self, records):
+        try:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            write_atomic(self.filepath, "".join(json.dumps(record) + "\n" for record in records))
+        except Exception as e:
+            logging.error(f"[ActionJournal] Impossible de réécrire {self.filepath}: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _read(self) -> list:
+        self._torn = False
+        records = []
+        try:
+            with open(self.filepath, "r") as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        self._torn = True
+                        break  # Fin de fichier tronquée : les enregistrements suivants ne sont pas fiables
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"[ActionJournal] Impossible de charger {self.filepath}: {e}")
+        return records
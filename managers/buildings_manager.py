@@ -7,9 +7,13 @@ Responsabilités :
 - Appliquer tous les bonus (ex : architecte) de façon cohérente.
 - Garantir que l’UI ne fait qu’afficher et déclencher des actions, jamais de calcul métier.
 - Synchroniser l’état à jour après chaque action.
+- Tenir la file de priorité des constructions en cours (tas trié par instant de fin).
 """
 
-from datetime import datetime
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
 from data.buildings_database import buildings_database
 from managers.resource_manager import ResourceManager
 from models.building import Building
@@ -32,6 +36,11 @@ class BuildingsManager:
         self.network_manager = network_manager
         self.username = username
         self.update_all_callback = update_all_callback
+        # File de priorité des constructions : (instant de fin epoch, city_id, slot_index)
+        # Les entrées périmées (annulées, détruites, terminées) sont ignorées au dépilage via _scheduled.
+        self._construction_heap = []
+        self._scheduled = {}  # (city_id, slot_index) -> instant de fin epoch
+        self._heap_lock = threading.Lock()
 
     # MÉTHODE COMMENTÉE POUR TEST DE CODE MORT
     # def get_instant_completion_threshold(self, player=None):
@@ -193,6 +202,7 @@ class BuildingsManager:
         )
         self.set_building_status(building, "En construction", started_at=now.isoformat(), build_duration=int(construction_time))
         city_data.set_building_by_index(slot_index, building)
+        self.schedule_construction(city_data, slot_index, building)
         self._refresh_after_action(city_data)
         return {"success": True}
 
@@ -213,6 +223,7 @@ class BuildingsManager:
             city_data.set_building_by_index(slot_index, current_building)
         else:
             city_data.set_building_by_index(slot_index, None)
+            self.unschedule_construction(city_data, slot_index)
         self.apply_building_bonuses(city_data)
         self._refresh_after_action(city_data)
         return True
@@ -235,19 +246,29 @@ class BuildingsManager:
                 if remaining <= 0:
                     self.set_building_status(b, "Terminé")
             city_data.buildings[i] = b
+        city_data.invalidate_effects()
 
     def complete_task(self, construction_key, city_data, slot_index, building_name=None, level=None):
+        # Mode paresseux : la production antérieure est réglée avec les effets d'avant la complétion
+        self.game_data.resource_manager.settle_city(city_data)
         building = city_data.get_building_by_index(slot_index)
         building = Building.ensure_instance(building)
         if building and getattr(building, "status", None) == "En construction":
             details = self.get_building_details(building.get_name(), building.level, city_data)
             self.set_building_status(building, "Terminé", effect=details.get("effect", {}) if details else {})
             city_data.set_building_by_index(slot_index, building)
+            self.unschedule_construction(city_data, slot_index)
             notif_manager = getattr(self.game_data, "notification_manager", None)
             owner_id = getattr(city_data, "owner", None)
             msg = f"Construction du bâtiment '{building.get_name()}' terminée dans la ville '{city_data.get_name()}'."
             if notif_manager and owner_id:
                 notif_manager.add_notification(owner_id, msg, "construction")
+            event_bus = getattr(self.game_data, "event_bus", None)
+            if event_bus is not None and owner_id:
+                event_bus.publish("construction_completed", {
+                    "city_id": city_data.id, "slot_index": slot_index,
+                    "building": building.get_name(), "level": building.level,
+                }, players=[owner_id])
         self.apply_building_bonuses(city_data)
         self._refresh_after_action(city_data)
 
@@ -259,9 +280,80 @@ class BuildingsManager:
             if building and getattr(building, "status", None) == "En construction":
                 building.status = "Terminé"
                 building.remaining_time = 0
+                city.invalidate_effects()
+                self.unschedule_construction(city, slot_index)
                 return True
         return False
 
+    # --- File de priorité des constructions ---
+    @staticmethod
+    def get_completion_epoch(building):
+        """Instant de fin (epoch UTC) d'une construction en cours, ou None si non planifiable."""
+        if building.status != "En construction" or not building.started_at or building.build_duration <= 0:
+            return None
+        try:
+            dt_started = datetime.fromisoformat(building.started_at)
+        except Exception:
+            try:
+                dt_started = datetime.strptime(building.started_at, "%Y-%m-%dT%H:%M:%S")
+            except Exception:
+                return None
+        if dt_started.tzinfo is None:
+            dt_started = dt_started.replace(tzinfo=timezone.utc)
+        return dt_started.timestamp() + building.build_duration
+
+    def schedule_construction(self, city_data, slot_index, building):
+        """Ajoute (ou remplace) la construction du slot dans la file de priorité."""
+        completion = self.get_completion_epoch(Building.ensure_instance(building))
+        key = (getattr(city_data, "id", None), slot_index)
+        with self._heap_lock:
+            if completion is None:
+                self._scheduled.pop(key, None)
+                return
+            self._scheduled[key] = completion
+            heapq.heappush(self._construction_heap, (completion, key[0], slot_index))
+
+    def unschedule_construction(self, city_data, slot_index):
+        """Retire la construction du slot de la file (l'entrée du tas devient périmée)."""
+        with self._heap_lock:
+            self._scheduled.pop((getattr(city_data, "id", None), slot_index), None)
+
+    def rebuild_construction_queue(self):
+        """Reconstruit la file de priorité depuis l'état chargé (un seul parcours de tous les bâtiments)."""
+        with self._heap_lock:
+            self._construction_heap = []
+            self._scheduled = {}
+        for city in self.game_data.city_manager.get_all_cities():
+            for i, building in enumerate(city.get_buildings()):
+                if building and getattr(building, "status", None) == "En construction":
+                    self.schedule_construction(city, i, building)
+
+    def pop_due_constructions(self, now=None):
+        """Dépile les constructions terminées : O(k log n) pour k constructions arrivées à échéance."""
+        now = time.time() if now is None else now
+        due = []
+        with self._heap_lock:
+            heap = self._construction_heap
+            while heap and heap[0][0] <= now:
+                completion, city_id, slot_index = heapq.heappop(heap)
+                if self._scheduled.get((city_id, slot_index)) != completion:
+                    continue  # Entrée périmée
+                del self._scheduled[(city_id, slot_index)]
+                due.append((city_id, slot_index))
+        return due
+
+    def complete_due_constructions(self, now=None):
+        """Termine toutes les constructions arrivées à échéance (appelé à chaque tick serveur)."""
+        for city_id, slot_index in self.pop_due_constructions(now):
+            city = self.game_data.city_manager.get_city_by_id(city_id)
+            if city is None:
+                continue
+            self.complete_task(
+                construction_key=(city.coords, city.name, slot_index),
+                city_data=city,
+                slot_index=slot_index
+            )
+
     def get_remaining_time(self, building):
         building = Building.ensure_instance(building)
         if building.status != "En construction" or not building.started_at or building.build_duration <= 0:
@@ -307,17 +399,10 @@ class BuildingsManager:
 
     def apply_architect_reductions(self, buildings_data, city_data):
         cost_reduction, time_reduction = 0, 0
-        for building in getattr(city_data, "get_buildings", lambda: [])():
-            building = Building.ensure_instance(building)
-            if building and building.get_name() == "Atelier d'Architecte":
-                if building.get_status() == "Terminé":
-                    effect = building.effect
-                    cost_reduction += effect.get("construction_cost_reduction", 0)
-                    time_reduction += effect.get("construction_time_reduction", 0)
-                elif building.get_status() == "En construction" and hasattr(building, "previous_effect"):
-                    effect = building.previous_effect
-                    cost_reduction += effect.get("construction_cost_reduction", 0)
-                    time_reduction += effect.get("construction_time_reduction", 0)
+        if hasattr(city_data, "get_effects"):
+            effects = city_data.get_effects()
+            cost_reduction = effects.construction_cost_reduction
+            time_reduction = effects.construction_time_reduction
         if cost_reduction == 0 and time_reduction == 0:
             return
         for building_data in buildings_data.values():
@@ -333,6 +418,9 @@ class BuildingsManager:
     #     return b.get_level() if b else 0
 
     def _refresh_after_action(self, city_data):
+        # Lancement, complétion ou destruction : l'agrégat des effets de la ville est à recalculer
+        if hasattr(city_data, "invalidate_effects"):
+            city_data.invalidate_effects()
         try:
             if self.city_view and hasattr(self.city_view, 'is_active'):
                 if self.city_view.is_active:
@@ -1,3 +1,5 @@
+import weakref
+
 from models.city import City
 from models.building import Building
 from managers.population_manager import PopulationManager
@@ -15,6 +17,10 @@ class CityManager:
         self._active_city = None
         # Cache pour maintenir la consistance des instances de villes
         self._city_instance_cache = {}
+        # Index des propriétaires : owner_id -> {id(ville): ville}, tenu à jour via le binding Kivy sur City.owner
+        self._cities_by_owner = {}
+        self._owner_of = {}  # id(ville) -> owner_id indexé (villes suivies uniquement)
+        self._owner_bound = weakref.WeakSet()  # Villes déjà liées à _on_city_owner (un id() peut être réutilisé)
 
     def create_new_city(self, player, city_name, base_city=None):
         owner_id = self.game_data.current_player_id or getattr(player, "id_player", None) or getattr(player, "username", None)
@@ -26,6 +32,7 @@ class CityManager:
                 for island in self.game_data.islands:
                     if real_city.coords == island.get("coords"):
                         island["elements"].append(real_city)
+                        self.game_data.index_island_element(island, real_city)
                         break
             real_city.name = city_name
             real_city.owner = str(owner_id)
@@ -48,11 +55,60 @@ class CityManager:
             print(f"[DEBUG] Nouvelle ville créée : {new_city.name} | owner = {new_city.owner} | attendu = {player.id_player}")
             self.add_city(new_city)
             target_island["elements"].append(new_city)
+            self.game_data.index_island_element(target_island, new_city)
             return new_city
 
+    # --- Index des propriétaires ---
+    def _index_owner(self, city):
+        key = id(city)
+        if city not in self._owner_bound:
+            city.bind(owner=self._on_city_owner)
+            self._owner_bound.add(city)
+        self._unindex_owner(city)
+        self._owner_of[key] = city.owner
+        self._cities_by_owner.setdefault(city.owner, {})[key] = city
+
+    def _unindex_owner(self, city):
+        key = id(city)
+        if key not in self._owner_of:
+            return
+        previous = self._owner_of.pop(key)
+        cities = self._cities_by_owner.get(previous)
+        if cities is not None:
+            cities.pop(key, None)
+            if not cities:
+                del self._cities_by_owner[previous]
+
+    def _on_city_owner(self, city, owner):
+        # Seules les villes de self._cities sont indexées (une ville retirée garde son binding)
+        if id(city) in self._owner_of:
+            self._index_owner(city)
+            self._touch_island_sites(city)
+
+    def _touch_island_sites(self, city):
+        """
+        Un changement de propriétaire change la vue limitée (/get_state_for_player) des sites de l'île :
+        ils sont signalés pour figurer dans le prochain différentiel.
+        """
+        save_load_manager = getattr(self.game_data, "save_load_manager", None)
+        island = self.game_data.get_island_for_city(getattr(city, "id", None))
+        if save_load_manager is None or island is None:
+            return
+        for elem in island.get("elements", []):
+            if isinstance(elem, dict):
+                save_load_manager.versions.touch(elem)
+
+    def rebuild_owner_index(self):
+        """Reconstruit l'index des propriétaires dans l'ordre de self._cities."""
+        self._cities_by_owner = {}
+        self._owner_of = {}
+        for city in self._cities:
+            self._index_owner(city)
+
     def add_city(self, city):
         if city not in self._cities:
             self._cities.append(city)
+            self._index_owner(city)
             # Ajoute au cache
             city_id = getattr(city, 'id', None)
             if city_id:
@@ -60,12 +116,17 @@ class CityManager:
         for island in self.game_data.islands:
             if city.coords == island["coords"] and city not in island["elements"]:
                 island["elements"].append(city)
+                self.game_data.index_island_element(island, city)
 
     def get_all_cities(self):
         return self._cities
 
     def get_cities_for_player(self, player_id):
-        return [city for city in self._cities if getattr(city, "owner", '') == player_id]
+        return list(self._cities_by_owner.get(player_id, {}).values())
+
+    def player_owns_city(self, player_id, city_id) -> bool:
+        city = self._city_instance_cache.get(city_id)
+        return city is not None and id(city) in self._cities_by_owner.get(player_id, {})
 
     def find_unowned_city(self, island_coords: tuple, base_resource: str):
         island = self.game_data.get_island_by_coords(island_coords)
@@ -77,7 +138,7 @@ class CityManager:
         return None
 
     def player_has_city(self, player_id: str) -> bool:
-        return any(getattr(city, "owner", "") == player_id for city in self._cities)
+        return bool(self._cities_by_owner.get(player_id))
 
     def update_active_city(self, city):
         self.set_active_city(city)
@@ -118,6 +179,16 @@ class CityManager:
         """
         return self._city_instance_cache.get(city_id)
 
+    def get_settled_city(self, city_id):
+        """
+        Comme get_city_by_id, après règlement de la production accumulée (mode paresseux) : pour les routes
+        qui lisent ou modifient les ressources ou les taux de production de la ville (sous state_lock).
+        """
+        city = self._city_instance_cache.get(city_id)
+        if city is not None:
+            self.game_data.resource_manager.settle_city(city)
+        return city
+
     def update_city_from_dict(self, city_dict):
         """
         Met à jour une ville existante à partir d'un dictionnaire (venant du serveur).
@@ -157,6 +228,8 @@ class CityManager:
                     else:
                         if elem not in self._cities:
                             self._cities.append(elem)
+        self.rebuild_owner_index()
+        self.game_data.rebuild_topology_index()
 
     def from_dict(self, cities_data, game_data):
         """
@@ -173,4 +246,5 @@ class CityManager:
         for city_dict in cities_data:
             city = self.get_or_create_city_from_dict(city_dict, game_data)
             if city not in self._cities:
-                self._cities.append(city)
\ No newline at end of file
+                self._cities.append(city)
+        self.rebuild_owner_index()
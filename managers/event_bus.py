@@ -0,0 +1,91 @@
+"""
+EventBus : diffusion des événements de jeu aux clients connectés au canal /events (Server-Sent Events).
+
+Responsabilités :
+- Un abonnement par connexion client, rattaché à un joueur ; publish remet l'événement aux abonnés des
+  joueurs concernés (ou à tous si players est None).
+- File bornée par abonnement : un client trop lent perd les événements les plus anciens, jamais l'état
+  (le canal renvoie de toute façon un différentiel d'état à intervalle régulier).
+- Les données sont encodées en JSON une seule fois, au moment de la publication (instantané cohérent,
+  partagé par tous les abonnés).
+- Sans abonné, publish ne coûte qu'une recherche dans un dictionnaire.
+- Nombre d'abonnements borné (max_subscriptions) : chaque canal ouvert occupe un thread du serveur,
+  les clients refusés restent sur l'interrogation périodique.
+"""
+
+import json
+import threading
+from collections import deque
+
+
+class EventSubscription:
+    def __init__(self, player_id, max_pending: int = 256):
+        self.player_id = player_id
+        self._pending = deque(maxlen=max_pending)
+        self._ready = threading.Condition()
+        self.closed = False
+
+    def push(self, event: str, text: str):
+        with self._ready:
+            self._pending.append((event, text))
+            self._ready.notify()
+
+    def drain(self, timeout: float = None) -> list:
+        """Retourne les (événement, données JSON) en attente, en attendant au plus timeout secondes s'il n'y en a aucun."""
+        with self._ready:
+            if not self._pending and not self.closed:
+                self._ready.wait(timeout)
+            events = list(self._pending)
+            self._pending.clear()
+            return events
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+
+class EventBus:
+    def __init__(self, max_subscriptions: int = None):
+        self._lock = threading.Lock()
+        self._by_player = {}  # joueur -> {abonnements}
+        self._count = 0
+        self.max_subscriptions = max_subscriptions  # None : pas de limite
+
+    def subscribe(self, player_id, max_pending: int = 256):
+        """Retourne un nouvel abonnement, ou None si max_subscriptions abonnements sont déjà ouverts."""
+        subscription = EventSubscription(player_id, max_pending)
+        with self._lock:
+            if self.max_subscriptions is not None and self._count >= self.max_subscriptions:
+                return None
+            self._by_player.setdefault(player_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        subscription.close()
+        with self._lock:
+            subscriptions = self._by_player.get(subscription.player_id)
+            if subscriptions is not None and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self._count -= 1
+                if not subscriptions:
+                    del self._by_player[subscription.player_id]
+
+    def has_subscribers(self) -> bool:
+        return bool(self._by_player)
+
+    def publish(self, event: str, data=None, players=None):
+        """Remet (event, data) aux abonnés des joueurs donnés ; players None : à tous les abonnés."""
+        if not self._by_player:
+            return
+        with self._lock:
+            if players is None:
+                targets = [s for subscriptions in self._by_player.values() for s in subscriptions]
+            else:
+                targets = [s for pid in set(players) if pid for s in self._by_player.get(pid, ())]
+        if not targets:
+            return
+        text = json.dumps(data, default=str)
+        for subscription in targets:
+            subscription.push(event, text)
@@ -1,20 +1,23 @@
 import threading
 import time
 from datetime import datetime
-from config.config import TIME_SCALE  # À ajouter dans config/config.py
+from config.config import TIME_SCALE, MAX_TICK_STEP, SNAPSHOT_INTERVAL
 
 class GameLoopManager:
     """
     Centralise les tâches périodiques du jeu (tick ressources, sauvegarde automatique, gestion des constructions, etc.)
+    C'est l'unique ordonnanceur qui fait avancer le temps simulé : après un retard (GC, sauvegarde lente...),
+    les secondes en retard sont regroupées en un seul appel à pas variable, borné par max_step.
     Permet aussi d'enregistrer des callbacks à appeler à chaque tick (ex: progression des transports).
     Prend en compte un facteur d'accélération/ralentissement du temps (TIME_SCALE).
     """
-    def __init__(self, game_data, save_load_manager, save_interval=10, tick_interval=1, time_scale=None):
+    def __init__(self, game_data, save_load_manager, save_interval=None, tick_interval=1, time_scale=None, max_step=None):
         self.game_data = game_data
         self.save_load_manager = save_load_manager
-        self.save_interval = save_interval
+        self.save_interval = save_interval if save_interval is not None else SNAPSHOT_INTERVAL
         self.tick_interval = tick_interval
         self.time_scale = time_scale if time_scale is not None else TIME_SCALE
+        self.max_step = max_step if max_step is not None else MAX_TICK_STEP
         self._stop_flag = False
         self._save_thread = None
         self._tick_thread = None
@@ -24,6 +27,13 @@ class GameLoopManager:
         self.game_data.last_update_time = datetime.utcnow()
         self.game_data.accumulated_dt = 0.0
 
+        # Statistiques du tick (voir get_stats)
+        self._started_at = None
+        self.tick_count = 0
+        self.step_count = 0
+        self.coalesced_steps = 0
+        self.lag = 0.0
+
     def register_callback(self, cb):
         """Ajoute un callback à appeler à chaque tick."""
         self.callbacks.append(cb)
@@ -31,14 +41,31 @@ class GameLoopManager:
     def start(self):
         """Démarre les threads/timers périodiques"""
         self._stop_flag = False
+        self._started_at = time.monotonic()
         self._save_thread = threading.Thread(target=self._periodic_save, daemon=True)
         self._tick_thread = threading.Thread(target=self._periodic_tick, daemon=True)
         self._save_thread.start()
         self._tick_thread.start()
 
     def stop(self):
-        """Arrête proprement les threads"""
+        """Arrête proprement les threads puis écrit une dernière sauvegarde."""
         self._stop_flag = True
+        self.save_load_manager.shutdown()
+
+    def get_stats(self) -> dict:
+        """
+        Retourne les statistiques de l'ordonnanceur :
+        ticks par seconde, retard courant (en secondes de jeu) et nombre de pas d'1 s regroupés.
+        """
+        uptime = time.monotonic() - self._started_at if self._started_at else 0
+        return {
+            "ticks": self.tick_count,
+            "steps": self.step_count,
+            "ticks_per_second": self.tick_count / uptime if uptime > 0 else 0.0,
+            "lag": self.lag,
+            "coalesced_steps": self.coalesced_steps,
+            "max_step": self.max_step,
+        }
 
     def _periodic_save(self):
         while not self._stop_flag:
@@ -56,14 +83,19 @@ class GameLoopManager:
                 dt = (now - self.game_data.last_update_time).total_seconds() * self.time_scale
                 self.game_data.last_update_time = now
                 self.game_data.accumulated_dt += dt
+                self.lag = max(0.0, self.game_data.accumulated_dt - 1.0)
 
-                # À chaque tick virtuel (1.0 "seconde" de jeu accélérée), on update tous les systèmes
+                # Dès qu'une seconde de jeu est disponible, tout le retard est avancé en un seul pas,
+                # découpé seulement s'il dépasse max_step
                 while self.game_data.accumulated_dt >= 1.0:
-                    self.game_data.resource_manager.update_all(1.0)
-                    self.game_data.transport_manager.update_transports(1.0)
-                    # Ajout : gestion du tick pour les constructions de bâtiments
-                    self._update_all_constructions()
-                    self.game_data.accumulated_dt -= 1.0
+                    step = min(self.game_data.accumulated_dt, self.max_step)
+                    # Un instantané de sauvegarde n'est jamais pris au milieu d'un pas
+                    with self.save_load_manager.state_lock:
+                        self._advance(step)
+                    self.step_count += 1
+                    self.coalesced_steps += max(0, int(step) - 1)
+                    self.game_data.accumulated_dt -= step
+                self.tick_count += 1
 
                 # Appelle tous les callbacks enregistrés (ex: progression des transports)
                 for cb in self.callbacks:
@@ -73,23 +105,20 @@ class GameLoopManager:
                 pass
             time.sleep(self.tick_interval)
 
+    def _advance(self, dt: float):
+        """Fait avancer tous les sous-systèmes de dt secondes de jeu."""
+        self.game_data.resource_manager.update_all(dt)
+        self.game_data.transport_manager.update_transports(dt)
+        # Ajout : gestion du tick pour les constructions de bâtiments
+        self._update_all_constructions()
+
     def _update_all_constructions(self):
         """
-        Scanne toutes les villes et tous les bâtiments "En construction".
-        Si un timer est fini, déclenche la complétion du bâtiment (appel à BuildingsManager.complete_task).
+        Termine les constructions dont le timer est fini.
+        Seules les entrées échues de la file de priorité du BuildingsManager sont visitées.
         """
         # On récupère le BuildingsManager central
         buildings_manager = getattr(self.game_data, "buildings_manager", None)
         if buildings_manager is None:
             return
-
-        for city in self.game_data.city_manager.get_all_cities():
-            for i, building in enumerate(city.get_buildings()):
-                if building and getattr(building, "status", None) == "En construction":
-                    if buildings_manager.get_remaining_time(building) <= 0:
-                        construction_key = (city.coords, city.name, i)
-                        buildings_manager.complete_task(
-                            construction_key=construction_key,
-                            city_data=city,
-                            slot_index=i
-                        )
\ No newline at end of file
+        buildings_manager.complete_due_constructions()
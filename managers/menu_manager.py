@@ -8,14 +8,12 @@ MenuManager : gère l'affichage et l'interaction du menu principal du jeu.
 from kivy.uix.popup import Popup
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
-from kivy.clock import Clock
 from config.style import apply_button_style
-import requests
-import threading
 
 class MenuManager:
-    def __init__(self, switch_view_callback, game_data, menu_button=None, ville_button=None):
+    def __init__(self, switch_view_callback, game_data, menu_button=None, ville_button=None, network_manager=None):
         self.switch_view_callback = switch_view_callback
+        self.network_manager = network_manager
         self.menu_popup = None
         self.game_data = game_data
         self.menu_button = menu_button
@@ -65,23 +63,13 @@ class MenuManager:
 
     def update_journal_badge_async(self):
         joueur = self.game_data.get_current_player()
-        if joueur is None or self.journal_button is None:
+        if joueur is None or self.journal_button is None or self.network_manager is None:
             return
 
-        def fetch_and_update():
-            try:
-                url = "http://localhost:5000/get_notifications"
-                response = requests.post(url, json={"joueur_id": joueur.id_player}, timeout=5)
-                count = 0
-                if response.status_code == 200:
-                    data = response.json()
-                    notifications = data.get("notifications", [])
-                    count = sum(1 for n in notifications if not n.get("lu", False))
-                Clock.schedule_once(lambda dt: self._set_journal_badge(count))
-            except Exception as e:
-                print("[MenuManager] Erreur lors du fetch unreads (journal):", e)
-
-        threading.Thread(target=fetch_and_update, daemon=True).start()
+        def update_badge(notifications):
+            self._set_journal_badge(sum(1 for n in notifications or [] if not n.get("lu", False)))
+
+        self.network_manager.get_notifications_async(joueur.id_player, update_badge)
 
     def _set_journal_badge(self, count):
         if self.journal_button is not None:
@@ -104,7 +92,8 @@ class MenuManager:
             title="Journal des notifications",
             content=VilleJournal(
                 notification_manager=self.game_data.notification_manager,
-                joueur_id=joueur.id_player if joueur else None
+                joueur_id=joueur.id_player if joueur else None,
+                network_manager=self.network_manager
             ),
             size_hint=(0.8, 0.8)
         )
@@ -10,21 +10,38 @@ from datetime import datetime
 from collections import defaultdict
 
 class NotificationManager:
-    def __init__(self):
+    def __init__(self, event_bus=None):
+        self.event_bus = event_bus
         # Clé = joueur_id, valeur = liste de notifications
         self.notifications = defaultdict(list)
+        # Joueurs dont les notifications ont changé depuis la dernière sauvegarde
+        self._dirty_players = set()
+
+    def pop_dirty_players(self):
+        """Retourne et oublie les joueurs dont les notifications ont changé depuis le dernier appel."""
+        dirty, self._dirty_players = self._dirty_players, set()
+        return dirty
+
+    def load(self, notifications):
+        """Remplace les notifications par celles relues depuis la sauvegarde."""
+        self.notifications = defaultdict(list, notifications)
+        self._dirty_players = set()
 
     def add_notification(self, joueur_id, message, type="info"):
         """Ajoute une notification pour un joueur (joueur_id = int ou str)."""
         print(f"[DEBUG] Notification ajoutée: joueur={joueur_id}, message={message}, type={type}")  # Ajout temporaire
         # Debug print peut rester, ou être remplacé par un vrai log si besoin
         # print(f"[DEBUG] Notification ajoutée: joueur={joueur_id}, message={message}, type={type}")
-        self.notifications[joueur_id].append({
+        notification = {
             "message": message,
             "type": type,
             "timestamp": datetime.utcnow(),
             "lu": False
-        })
+        }
+        self.notifications[joueur_id].append(notification)
+        self._dirty_players.add(joueur_id)
+        if self.event_bus is not None:
+            self.event_bus.publish("notification", notification, players=[joueur_id])
 
     def get_notifications(self, joueur_id):
         """Renvoie la liste des notifications du joueur, les plus récentes en haut."""
@@ -34,6 +51,7 @@ class NotificationManager:
         """Marque toutes les notifications du joueur comme lues."""
         for notif in self.notifications[joueur_id]:
             notif["lu"] = True
+        self._dirty_players.add(joueur_id)
 
     def unread_count(self, joueur_id, notif_type=None):
         """
@@ -0,0 +1,121 @@
+"""
+PersistenceQueue : validation temporisée des unités de travail.
+
+Responsabilités :
+- UnitOfWork rassemble les entités modifiées par une requête (villes, joueurs, sites, transports)
+  et les actions qui les ont modifiées ; une entité touchée plusieurs fois n'est comptée qu'une fois.
+- PersistenceQueue fusionne les unités de travail validées et n'écrit qu'un enregistrement de journal
+  une fois la rafale terminée (aucune nouvelle validation pendant delay secondes, ou au plus max_delay
+  secondes après la première) : une série de clics devient une seule écriture.
+- Les entités sont marquées pour le prochain instantané dès la validation ; leur état est lu au moment
+  de l'écriture (le plus récent).
+"""
+
+import logging
+import threading
+import time
+
+
+class UnitOfWork:
+    def __init__(self):
+        self.actions = []  # [(action, données de la requête)]
+        self.cities = {}  # id(entité) -> entité
+        self.players = {}
+        self.sites = {}
+        self.transports = {}
+
+    def add(self, action: str, data=None, cities=(), players=(), sites=(), transports=()):
+        """Enregistre une action et les entités qu'elle a modifiées (transports créés, avancés ou annulés compris)."""
+        self.actions.append((action, data))
+        for target, entities in ((self.cities, cities), (self.players, players), (self.sites, sites),
+                                 (self.transports, transports)):
+            for entity in entities:
+                if entity is not None:
+                    target[id(entity)] = entity
+
+    def merge(self, other):
+        self.actions.extend(other.actions)
+        self.cities.update(other.cities)
+        self.players.update(other.players)
+        self.sites.update(other.sites)
+        self.transports.update(other.transports)
+
+    def is_empty(self) -> bool:
+        return not self.actions
+
+
+class PersistenceQueue:
+    def __init__(self, save_load_manager, delay: float = 0.5, max_delay: float = 2.0):
+        self.save_load_manager = save_load_manager
+        self.delay = delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._pending = None  # UnitOfWork fusionnée en attente d'écriture
+        self._first_at = None
+        self._last_at = None
+        self._busy = False
+        self._thread = None
+        self.commits = 0
+        self.writes = 0
+
+    def submit(self, unit: UnitOfWork):
+        """Valide une unité de travail ; l'écriture est différée jusqu'à la fin de la rafale."""
+        if unit is None or unit.is_empty():
+            return
+        for entity in (*unit.cities.values(), *unit.players.values(), *unit.sites.values()):
+            self.save_load_manager.mark_dirty(entity)
+        now = time.monotonic()
+        with self._cond:
+            if self._pending is None:
+                self._pending = UnitOfWork()
+                self._first_at = now
+            self._pending.merge(unit)
+            self._last_at = now
+            self.commits += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Écrit immédiatement ce qui est en attente et attend la fin de l'écriture."""
+        with self._cond:
+            self._first_at = self._last_at = float("-inf")
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def _due_in(self) -> float:
+        now = time.monotonic()
+        return min(self._last_at + self.delay, self._first_at + self.max_delay) - now
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                while self._due_in() > 0:
+                    self._cond.wait(self._due_in())
+                unit, self._pending = self._pending, None
+                self._busy = True
+            try:
+                self._write(unit)
+                self.writes += 1
+            except Exception as e:
+                logging.error(f"[PersistenceQueue] Erreur lors de l'écriture du journal : {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, unit: UnitOfWork):
+        names = []
+        for action, _ in unit.actions:
+            if action not in names:
+                names.append(action)
+        self.save_load_manager.record_action(
+            ",".join(names),
+            [data for _, data in unit.actions],
+            cities=list(unit.cities.values()),
+            players=list(unit.players.values()),
+            sites=list(unit.sites.values()),
+            transports=list(unit.transports.values()),
+        )
@@ -1,31 +1,45 @@
 import json
 import logging
+import os
+import threading
+from config.config import PLAYERS_JOURNAL_COMPACT_SIZE
+from managers.snapshot_writer import write_atomic
 from models.player import Player
 
 class PlayerManager:
     """
     Gère la liste centralisée des joueurs (création, authentification, sérialisation...).
-    Utilise un fichier 'players_table.json' pour persister les comptes.
+    Utilise un fichier 'players_table.json' pour persister les comptes, chargé une seule fois en mémoire.
+    Les nouveaux comptes sont ajoutés à la création, une ligne JSON par compte, à la fin de 'players_table.jsonl'
+    (ajout seul et synchronisé sur disque sous _accounts_lock : deux créations simultanées ne réécrivent jamais
+    le fichier). save_players_table réintègre le journal dans la table (compaction).
     Désormais, la gestion des villes d'un joueur se fait via CityManager.get_cities_for_player.
     """
     PLAYERS_FILE = 'players_table.json'
+    PLAYERS_JOURNAL_FILE = 'players_table.jsonl'
 
     def __init__(self, game_data):
         self.game_data = game_data
         self.players = {}  # Clé = id_player
+        self._accounts = None  # id_player -> {"id_player", "username", "password"}, chargé à la demande
+        self._account_players = {}  # id_player -> Player construit depuis un compte (hors partie)
+        self._username_index = {}  # username -> id_player
+        self._pending_accounts = []  # Comptes créés, pas encore écrits sur disque
+        self._journal_size = 0  # Comptes dans le journal depuis la dernière compaction
+        self._accounts_lock = threading.Lock()
 
     def authenticate_user(self, username, password):
         """
         Authentifie l'utilisateur et définit le joueur courant si succès.
         Retourne l'id du joueur ou None.
         """
-        players = self._load_players_file()
-        for player in players:
-            if player['username'] == username and player['password'] == password:
-                player_obj = Player(player['id_player'], player['username'], player['password'])
-                self.set_current_player(player_obj)
-                logging.info(f"[PlayerManager] Joueur authentifié : {player_obj.id_player}")
-                return player_obj.id_player
+        self._ensure_accounts()
+        account = self._accounts.get(self._username_index.get(username))
+        if account and account['username'] == username and account['password'] == password:
+            player_obj = Player(account['id_player'], account['username'], account['password'])
+            self.set_current_player(player_obj)
+            logging.info(f"[PlayerManager] Joueur authentifié : {player_obj.id_player}")
+            return player_obj.id_player
         logging.warning(f"[PlayerManager] Échec de l'authentification pour {username}.")
         return None
 
@@ -33,6 +47,7 @@ class PlayerManager:
         """Définit le joueur courant et ajuste la ville active si possible."""
         self.game_data.current_player_id = player.id_player
         self.players[player.id_player] = player
+        self._username_index[player.username] = player.id_player
         logging.info(f"[PlayerManager] Joueur actuel défini : {player.id_player}")
 
         city_manager = self.game_data.city_manager
@@ -51,60 +66,127 @@ class PlayerManager:
     def player_owns_city(self, player_id, city_id):
         """
         Renvoie True si le joueur possède la ville d'id donné.
-        Désormais, cette méthode interroge CityManager.
+        Désormais, cette méthode interroge l'index des propriétaires de CityManager.
         """
-        city_manager = self.game_data.city_manager
-        return any(getattr(city, "id", None) == city_id for city in city_manager.get_cities_for_player(player_id))
-
-    def save_players_table(self):
-        """Sauvegarde les joueurs en mémoire dans le fichier."""
-        try:
-            players_data = [player.to_dict() for player in self.players.values()]
-            with open(self.PLAYERS_FILE, "w") as file:
-                json.dump({"players": players_data}, file, indent=4)
-        except Exception as e:
-            logging.error(f"[PlayerManager] Error saving players table: {e}")
+        return self.game_data.city_manager.player_owns_city(player_id, city_id)
 
     def load_players_table(self):
-        """Charge les joueurs du fichier dans la mémoire."""
-        for player in self._load_players_file():
-            player_obj = Player(player['id_player'], player['username'], player['password'])
+        """Charge les comptes (table + journal) dans la mémoire."""
+        self._ensure_accounts()
+        for account in self._accounts.values():
+            player_obj = Player(account['id_player'], account['username'], account['password'])
             self.players[player_obj.id_player] = player_obj
 
     def create_account(self, username, password):
-        """Crée un nouveau compte utilisateur si le nom est libre."""
-        players = self._load_players_file()
-        if any(p['username'] == username for p in players):
-            logging.warning(f"[PlayerManager] Utilisateur '{username}' existe déjà.")
-            return None
+        """Crée un nouveau compte utilisateur si le nom est libre et l'ajoute aussitôt au journal des comptes."""
+        self._ensure_accounts()
+        with self._accounts_lock:
+            if username in self._username_index:
+                logging.warning(f"[PlayerManager] Utilisateur '{username}' existe déjà.")
+                return None
 
-        id_player = f"player_{len(players) + 1}"
-        new_player = {
-            "id_player": id_player,
-            "username": username,
-            "password": password
-        }
-        players.append(new_player)
-        self._save_players_file(players)
+            number = len(self._accounts) + 1
+            while f"player_{number}" in self._accounts:
+                number += 1
+            id_player = f"player_{number}"
+            new_player = {
+                "id_player": id_player,
+                "username": username,
+                "password": password
+            }
+            self._accounts[id_player] = new_player
+            self._username_index[username] = id_player
+            self._pending_accounts.append(new_player)
+        self.flush_accounts()
         logging.info(f"[PlayerManager] Création de compte pour '{username}'")
 
         player_obj = Player(id_player, username, password)
         self.players[id_player] = player_obj
         return id_player
 
+    def join(self, username, password=""):
+        """
+        Fait entrer un joueur dans la partie (compte créé si le nom est libre) et retourne le joueur (None en cas d'échec).
+        Un joueur nouveau dans la partie est signalé à save_load_manager : les autres clients le reçoivent
+        dans leur prochain différentiel.
+        """
+        player = self.get_player_by_username(username)
+        created = player is None
+        if created:
+            self.create_account(username, password)
+            player = self.get_player_by_username(username)
+            if player is None:
+                return None
+        if created or self.players.get(player.id_player) is not player:
+            self.players[player.id_player] = player
+            save_load_manager = getattr(self.game_data, "save_load_manager", None)
+            if save_load_manager is not None:
+                save_load_manager.mark_dirty(player)
+        return player
+
+    def flush_accounts(self):
+        """
+        Ajoute les comptes en attente à la fin du journal et les synchronise sur disque (fsync) : un compte
+        annoncé au client survit à un arrêt brutal. Un compte dont l'ajout a échoué reste en attente :
+        la prochaine sauvegarde (save_game) le retente. Au-delà de PLAYERS_JOURNAL_COMPACT_SIZE comptes,
+        le journal est compacté.
+        """
+        with self._accounts_lock:
+            if not self._pending_accounts:
+                return
+            try:
+                with open(self.PLAYERS_JOURNAL_FILE, "a") as file:
+                    for account in self._pending_accounts:
+                        file.write(json.dumps(account) + "\n")
+                    file.flush()
+                    os.fsync(file.fileno())
+                self._journal_size += len(self._pending_accounts)
+                self._pending_accounts = []
+            except Exception as e:
+                logging.error(f"[PlayerManager] Impossible d'écrire {self.PLAYERS_JOURNAL_FILE}: {e}")
+                return
+            if self._journal_size >= PLAYERS_JOURNAL_COMPACT_SIZE:
+                self._compact_accounts()
+
+    def save_players_table(self):
+        """Réécrit la table complète des comptes et vide le journal (compaction)."""
+        self._ensure_accounts()
+        with self._accounts_lock:
+            self._compact_accounts()
+
+    def _compact_accounts(self):
+        # Sous _accounts_lock. La table est remplacée atomiquement avant de vider le journal :
+        # un arrêt entre les deux laisse des comptes en double, relus sans effet (même id_player).
+        try:
+            write_atomic(self.PLAYERS_FILE, json.dumps({"players": list(self._accounts.values())}, indent=4))
+            open(self.PLAYERS_JOURNAL_FILE, "w").close()
+        except Exception as e:
+            logging.error(f"[PlayerManager] Impossible de compacter {self.PLAYERS_JOURNAL_FILE}: {e}")
+            return
+        self._pending_accounts = []
+        self._journal_size = 0
+
     def get_all_players(self):
         """
-        Retourne la liste des joueurs uniques (mémoire + disque, sans doublons).
+        Retourne la liste des joueurs uniques (partie + comptes, sans doublons).
         """
+        self._ensure_accounts()
         mp = {p.id_player: p for p in self.players.values()}
-        for p in self._load_players_file():
-            if p['id_player'] not in mp:
-                mp[p['id_player']] = Player(p['id_player'], p['username'], p['password'])
+        for id_player in self._accounts:
+            if id_player not in mp:
+                mp[id_player] = self._get_account_player(id_player)
         return list(mp.values())
 
     def get_player_by_username(self, username):
         """Retourne un joueur par son nom d'utilisateur ou None."""
-        return next((p for p in self.get_all_players() if getattr(p, "username", None) == username), None)
+        self._ensure_accounts()
+        id_player = self._username_index.get(username)
+        if id_player is None:
+            return None
+        player = self.players.get(id_player)
+        if player is not None and player.username == username:
+            return player
+        return self._get_account_player(id_player)
 
     def to_dict(self):
         """Sérialise tous les joueurs en dict (pour GameData)."""
@@ -116,8 +198,53 @@ class PlayerManager:
             player_id: Player.from_dict(player_data, game_data)
             for player_id, player_data in data.items()
         }
+        for player in self.players.values():
+            if player.username:
+                self._username_index[player.username] = player.id_player
+
+    def apply_player_dict(self, player_id, player_dict):
+        """
+        Met à jour le joueur player_id depuis son dict (rejeu du journal, différentiel) et le retourne.
+        L'instance existante, de la partie ou d'un compte, est conservée : les références tenues ailleurs
+        (transports, vues) voient l'état rejoué.
+        """
+        player = self.players.get(player_id) or self._account_players.get(player_id)
+        if player is None:
+            player = Player.from_dict(player_dict, self.game_data)
+        else:
+            player.from_dict_instance(player_dict)
+        self.players[player_id] = player
+        if player.username:
+            self._username_index[player.username] = player_id
+        return player
 
     # --- Helpers privés pour accès fichier ---
+    def _ensure_accounts(self):
+        """Charge une seule fois la table des comptes et son journal, puis construit l'index des noms."""
+        if self._accounts is not None:
+            return
+        accounts = {}
+        journal = self._load_players_journal()
+        for account in self._load_players_file() + journal:
+            accounts[account['id_player']] = account
+        self._journal_size = len(journal)
+        for player in self.players.values():
+            if player.username:
+                self._username_index.setdefault(player.username, player.id_player)
+        for account in accounts.values():
+            self._username_index[account['username']] = account['id_player']
+        self._accounts = accounts
+
+    def _get_account_player(self, id_player):
+        account = self._accounts.get(id_player)
+        if account is None:
+            return None
+        player = self._account_players.get(id_player)
+        if player is None:
+            player = Player(account['id_player'], account['username'], account['password'])
+            self._account_players[id_player] = player
+        return player
+
     def _load_players_file(self):
         """Charge la liste des joueurs depuis le fichier persistant."""
         try:
@@ -130,10 +257,17 @@ class PlayerManager:
             logging.error(f"[PlayerManager] Impossible de charger {self.PLAYERS_FILE}: {e}")
             return []
 
-    def _save_players_file(self, players):
-        """Sauvegarde la liste complète des joueurs dans le fichier."""
+    def _load_players_journal(self):
+        """Charge les comptes ajoutés depuis la dernière compaction (une ligne JSON par compte)."""
+        accounts = []
         try:
-            with open(self.PLAYERS_FILE, 'w') as file:
-                json.dump({"players": players}, file, indent=4)
+            with open(self.PLAYERS_JOURNAL_FILE, 'r') as file:
+                for line in file:
+                    line = line.strip()
+                    if line:
+                        accounts.append(json.loads(line))
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logging.error(f"[PlayerManager] Impossible de sauvegarder {self.PLAYERS_FILE}: {e}")
\ No newline at end of file
+            logging.error(f"[PlayerManager] Impossible de charger {self.PLAYERS_JOURNAL_FILE}: {e}")
+        return accounts
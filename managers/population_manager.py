@@ -130,11 +130,8 @@ class PopulationManager:
             cereal_multiplier = getattr(city, "windmill_cereal_multiplier", 1)
 
             # Récupérer le multiplicateur max selon le niveau du moulin
-            max_multiplier = 1
-            for building in city.get_buildings():
-                if building and building.get_name() == "Windmill" and building.get_status() == "Terminé":
-                    level = building.get_display_level()
-                    max_multiplier = max(max_multiplier, self.get_building_effect("Windmill", level, "cereal_consumption_multiplier"))
+            effects = city.get_effects()
+            max_multiplier = effects.windmill_max_multiplier
 
             # Forcer le multiplicateur à rester dans les bornes autorisées
             cereal_multiplier = max(1, min(cereal_multiplier, max_multiplier))
@@ -154,19 +151,12 @@ class PopulationManager:
             city.satisfaction_factors.setdefault("bonus", {})["windmill"] = bonus
 
             # Ajout du bonus des Thermes
-            for building in city.get_buildings():
-                if building and building.get_name() == "Thermes" and building.get_status() == "Terminé":
-                    level = building.get_display_level()
-                    bonus = self.get_building_effect("Thermes", level, "satisfaction_bonus")
-                    city.satisfaction_factors.setdefault("bonus", {})["thermes"] = bonus
+            if effects.thermes_satisfaction_bonus is not None:
+                city.satisfaction_factors.setdefault("bonus", {})["thermes"] = effects.thermes_satisfaction_bonus
 
             # Calcul de l'hygiène AVANT d'utiliser hygiene_percent
             population = resources.get("population_total", 0)
-            cleanliness_capacity = 0
-            for building in city.get_buildings():
-                if building and building.get_name() == "Thermes" and building.get_status() == "Terminé":
-                    level = building.get_display_level()
-                    cleanliness_capacity += self.get_building_effect("Thermes", level, "cleanliness_capacity")
+            cleanliness_capacity = effects.cleanliness_capacity
             hygiene_percent = 100 if population == 0 else int(100 * cleanliness_capacity / max(1, population))
             resources["hygiene_percent"] = hygiene_percent
 
@@ -193,8 +183,10 @@ class PopulationManager:
       
 
             # On ne sort de la famine que si le stock de céréales est strictement positif ET que le besoin est couvert
-            if (resources["cereal"] > 0 and resources["cereal"] >= cereal_needed):
-                resources["cereal"] -= cereal_needed
+            # La consommation est proportionnelle au temps écoulé (dt = 1 à chaque tick classique)
+            cereal_consumed = cereal_needed * dt
+            if (resources["cereal"] > 0 and resources["cereal"] >= cereal_consumed):
+                resources["cereal"] -= cereal_consumed
                 if "famine" in city.satisfaction_factors.get("malus", {}):
                     city.satisfaction_factors["malus"].pop("famine")
             else:
@@ -253,24 +245,14 @@ class PopulationManager:
         :param city: La ville pour laquelle calculer la capacité.
         :return: Capacité maximale de population.
         """
-        population_capacity = 0
-        for building in city.get_buildings():
-            if building and building.get_name() == "Hôtel de Ville":
-                level = building.get_display_level()
-                capacity_bonus = self.get_building_effect("Hôtel de Ville", level, "population_capacity")
-                population_capacity += capacity_bonus
-        return population_capacity
+        return city.get_effects().population_limit
 
     # MÉTHODE COMMENTÉE POUR TEST DE CODE MORT
     def get_population_growth_from_town_hall(self, city) -> float:
          """
          Retourne la croissance de la population définie par l'Hôtel de Ville (et uniquement celle-ci).
          """
-         for building in city.get_buildings():
-             if building and building.get_name() == "Hôtel de Ville":
-                 level = building.get_display_level()
-                 return self.get_building_effect("Hôtel de Ville", level, "population_growth")
-         return 0.0 
+         return city.get_effects().population_growth
     
     def get_building_effect(self, building_name, level, effect_key):
         """
@@ -288,23 +270,42 @@ class PopulationManager:
         puis 1 par tranche de 10 au-delà.
         (Toujours positif, car il sera soustrait dans le calcul de satisfaction)
         """
-        population = int(city.get_resources().get("population_total", 0))
+        return self._population_malus(city.get_resources().get("population_total", 0))
+
+    @staticmethod
+    def _population_malus(population) -> int:
+        population = int(population)
         if population <= 80:
             return min(8, population // 10)
         else:
             return population // 10
     
+    def cereal_needed_for(self, city, population) -> float:
+        """Céréales consommées par seconde par la population donnée (part non nourrie par les moulins, voir update_city)."""
+        effects = city.get_effects()
+        cereal_multiplier = max(1, min(getattr(city, "windmill_cereal_multiplier", 1), effects.windmill_max_multiplier))
+        return cereal_multiplier * NORMAL_CONSUMPTION_RATE * max(0, population - self.calculate_windmill_food_supply(city))
+
+    def growth_regime(self, city, population) -> tuple:
+        """
+        Paliers de population qui changent la satisfaction ou la consommation dans update_city : malus de population,
+        bonus d'hygiène, déclenchement de la peste, population non nourrie. Entre deux paliers, la croissance
+        est constante (voir ResourceManager.settle_city).
+        """
+        cleanliness_capacity = city.get_effects().cleanliness_capacity
+        hygiene_percent = 100 if population == 0 else int(100 * cleanliness_capacity / max(1, population))
+        return (
+            self._population_malus(population),
+            hygiene_percent > 100,
+            hygiene_percent < 50,
+            population > self.calculate_windmill_food_supply(city),
+        )
+
     def calculate_windmill_food_supply(self, city) -> int:
         """
         Calcule la capacité totale de nourriture fournie par les moulins (windmill).
         """
-        food_supply = 0
-        for building in city.get_buildings():
-            if building and building.get_name() == "Windmill" and building.get_status() == "Terminé":
-                level = building.get_display_level()
-                supply = self.get_building_effect("Windmill", level, "food_supply")
-                food_supply += supply
-        return food_supply
+        return city.get_effects().food_supply
 
     def update_worker_assignment_display(self, city_data):
         """
@@ -11,6 +11,9 @@ class ResearchManager:
         if not player or not owned_cities:
             print("[SERVER] unlock_research: Joueur ou ville manquante")
             return False
+        # Mode paresseux : les points de recherche du joueur sont réglés avec ses villes
+        for owned_city in owned_cities:
+            self.game_data.resource_manager.settle_city(owned_city)
         city = owned_cities[0]
         if research["name"] in player.unlocked_research:
             print("[SERVER] unlock_research: Recherche déjà débloquée")
@@ -0,0 +1,136 @@
+"""
+ResourceEngine : moteur de production optionnel, vectorisé avec NumPy.
+
+Responsabilités :
+- Conserver le stock, les ouvriers, le multiplicateur de bonus et la capacité de stockage de chaque ville
+  dans des tableaux denses indexés par RESOURCE_KEYS.
+- Calculer un tick de production pour toutes les villes en quelques opérations (multiplication, plafond).
+- Resynchroniser City.resources à la lecture d'une ville (checkout) ou avant une sérialisation (flush).
+- Prêter quelques colonnes à un calcul fait ville par ville (update_city), sans rendre toute la ligne.
+
+Remarque : les tableaux font foi pour les ressources de production entre deux accès. Une ville lue via
+ResourceManager.settle_city est marquée « sale » : sa ligne est relue depuis la ville au tick suivant,
+ce qui prend en compte les dépenses, dons, transports et changements de bâtiments faits entre-temps.
+Les autres lignes restent dans les tableaux d'un tick à l'autre.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : sans lui, ResourceManager garde les boucles Python
+    np = None
+
+from models.constants import RESOURCE_KEYS
+
+
+class ResourceEngine:
+    """
+    Tick de production par lots pour toutes les villes.
+    Reproduit Resource.update_resource : une ressource ne produit que si des ouvriers y sont affectés,
+    et le stock est plafonné à la capacité effective.
+    """
+
+    def __init__(self, resource_manager, resource_keys=None):
+        if np is None:
+            raise ImportError("NumPy est requis pour ResourceEngine.")
+        self.resource_manager = resource_manager
+        self.game_data = resource_manager.game_data
+        self.resource_keys = list(resource_keys) if resource_keys is not None else list(RESOURCE_KEYS)
+        self.base_rates = np.array(
+            [resource_manager.resources[key].base_rate for key in self.resource_keys], dtype=float
+        )
+        self._col_of = {key: col for col, key in enumerate(self.resource_keys)}
+        self.cities = []
+        self._row_of = {}
+        self._dirty = set()
+        self._needs_rebuild = True
+        self.stock = np.zeros((0, len(self.resource_keys)))
+        self.workers = np.zeros_like(self.stock)
+        self.multiplier = np.zeros_like(self.stock)
+        self.capacity = np.zeros_like(self.stock)
+
+    # --- Construction des tableaux ---
+    def rebuild(self):
+        """(Re)construit les tableaux depuis la liste des villes, après avoir rendu les stocks courants."""
+        self.flush()
+        self.cities = list(self.game_data.city_manager.get_all_cities())
+        self._row_of = {id(city): row for row, city in enumerate(self.cities)}
+        shape = (len(self.cities), len(self.resource_keys))
+        self.stock = np.zeros(shape)
+        self.workers = np.zeros(shape)
+        self.multiplier = np.ones(shape)
+        self.capacity = np.full(shape, np.inf)
+        for row in range(len(self.cities)):
+            self._load_row(row)
+        self._dirty.clear()
+        self._needs_rebuild = False
+
+    def _load_row(self, row):
+        city = self.cities[row]
+        resources = city.get_resources()
+        research_bonus = resources.get("research_bonus", {})
+        max_capacity = self.resource_manager.resources["gold"].calculate_effective_storage(city)
+        for col, key in enumerate(self.resource_keys):
+            resource = self.resource_manager.resources[key]
+            building_bonus = resource.calculate_bonus(city, "resource_bonus")
+            self.stock[row, col] = resources.get(key, 0)
+            self.workers[row, col] = city.get_workers_assigned(key)
+            self.multiplier[row, col] = (1 + building_bonus / 100) * (1 + research_bonus.get(key, 0) / 100)
+            self.capacity[row, col] = max_capacity.get(key, float("inf"))
+
+    def _store_row(self, row):
+        resources = self.cities[row].get_resources()
+        for col, key in enumerate(self.resource_keys):
+            value = float(self.stock[row, col])
+            if resources.get(key, 0) != value:
+                resources[key] = value
+
+    # --- Synchronisation avec City.resources ---
+    def checkout(self, city):
+        """Rend le stock courant de la ville dans City.resources ; la ligne sera relue au prochain tick."""
+        row = self._row_of.get(id(city))
+        if row is None or self.cities[row] is not city:
+            self._needs_rebuild = True
+            return
+        if row in self._dirty:
+            return  # Déjà rendue : la ville fait foi jusqu'au prochain tick
+        self._store_row(row)
+        self._dirty.add(row)
+
+    def update_city(self, city, update, keys=("cereal",)):
+        """
+        Exécute update(city) avec les colonnes keys de la ville à jour dans City.resources, puis les relit.
+        Une ville déjà rendue (checkout) ou absente des tableaux fait foi : update s'exécute directement.
+        Si update change les ouvriers affectés, la ligne est rendue et sera relue au prochain tick.
+        """
+        row = self._row_of.get(id(city))
+        if row is None or self.cities[row] is not city or row in self._dirty:
+            update(city)
+            return
+        resources = city.get_resources()
+        cols = [self._col_of[key] for key in keys]
+        for key, col in zip(keys, cols):
+            resources[key] = float(self.stock[row, col])
+        workers = dict(city.workers_assigned)
+        update(city)
+        for key, col in zip(keys, cols):
+            self.stock[row, col] = resources.get(key, 0)
+        if city.workers_assigned != workers:
+            self.checkout(city)
+
+    def flush(self):
+        """Rend le stock courant de toutes les villes (avant une sauvegarde ou un envoi de l'état)."""
+        for row in range(len(self.cities)):
+            if row not in self._dirty:
+                self._store_row(row)
+
+    # --- Tick ---
+    def step(self, dt: float):
+        """Fait produire toutes les villes pendant dt secondes."""
+        if self._needs_rebuild or len(self.cities) != len(self.game_data.city_manager.get_all_cities()):
+            self.rebuild()
+        for row in self._dirty:
+            self._load_row(row)
+        self._dirty.clear()
+
+        produced = self.workers * self.base_rates * self.multiplier * dt
+        self.stock = np.where(self.workers > 0, np.minimum(self.stock + produced, self.capacity), self.stock)
@@ -7,14 +7,17 @@ Responsabilités :
 - Appliquer les bonus issus des bâtiments et recherches.
 - Fournir des méthodes pour consommer les ressources et connaître leur état.
 - Coordonner la mise à jour de toutes les ressources à chaque tick du jeu.
+- En mode paresseux (lazy accrual), régler la production d'une ville uniquement quand elle est lue ou modifiée.
+- Optionnellement, déléguer la production de toutes les villes au moteur vectorisé (ResourceEngine).
 
 Remarque : Ce manager assure la cohérence et l'évolution des ressources au fil du jeu.
 """
 
 import logging
+import math
+import time
 import unicodedata
-from data.buildings_database import buildings_database
-from models.constants import DEFAULT_STORAGE_CAPACITY
+from config.config import TIME_SCALE, SETTLE_STEP
 from models.building import Building
 from managers.population_manager import PopulationManager
 from data.resources_database import RESOURCES  # Ajout pour centraliser la liste des ressources
@@ -49,26 +52,10 @@ class Resource:
         }
 
     def calculate_bonus(self, city, bonus_type: str) -> float:
-        bonus_percentage = 0
-        for building in city.get_buildings():
-            if building and building.get_status() == "Terminé":
-                effects = building.effect
-                if bonus_type in effects and self.name in effects[bonus_type]:
-                    bonus_percentage += effects[bonus_type][self.name]
-        return bonus_percentage
+        return city.get_effects().bonuses.get(bonus_type, {}).get(self.name, 0)
 
     def calculate_effective_storage(self, city) -> dict:
-        buildings = city.get_buildings()
-        base_capacity = DEFAULT_STORAGE_CAPACITY.copy()
-
-        for building in buildings:
-            if building and building.get_name() == "Entrepôt" and building.get_status() == "Terminé":
-                level = building.get_level()
-                effects = buildings_database["Entrepôt"]["levels"][level - 1]["effect"]
-                for resource, bonus in effects.get("storage", {}).items():
-                    base_capacity[resource] += bonus
-
-        return base_capacity
+        return city.get_effects().storage.copy()
 
     def update_resource(self, city, dt: float):
         resources = city.get_resources()
@@ -89,14 +76,7 @@ class Resource:
         resources[self.name] = min(resources[self.name], max_capacity)
 
     def get_warehouse_bonus(self, city, resource):
-        bonus = 0
-        for building in city.get_buildings():
-            if building and building.get_name() == "Entrepôt" and building.get_status() == "Terminé":
-                level = building.get_level()
-                effects = buildings_database["Entrepôt"]["levels"][level - 1]["effect"]
-                if "storage" in effects and resource in effects["storage"]:
-                    bonus += effects["storage"][resource]
-        return bonus
+        return city.get_effects().warehouse_storage.get(resource, 0)
 
 def update_resource(resource, city, dt: float):
     resource.update_resource(city, dt)
@@ -130,6 +110,8 @@ class ResourceManager:
     """
     def __init__(self, game_data):
         self.game_data = game_data
+        self.lazy_accrual = False  # Activé côté serveur via enable_lazy_accrual()
+        self.batch_engine = None  # Activé côté serveur via enable_batch_engine()
         self.resources = {}
         # Cas spéciaux : population et gold
         self.resources['population'] = Population(game_data)
@@ -150,6 +132,15 @@ class ResourceManager:
     def update_all(self, dt: float):
         from models.city import City  # Import local pour éviter les boucles d'import
 
+        # En mode paresseux, aucune ville n'est parcourue au tick : le règlement se fait à l'accès (settle_city)
+        if self.lazy_accrual:
+            return
+
+        if self.batch_engine is not None:
+            self._update_all_batch(dt)
+            self.update_research_points_for_all_players(dt)
+            return
+
         # Génération des ressources par ville (hors research_points)
         for island in self.game_data.islands:
             for elem in island.get("elements", []):
@@ -165,6 +156,21 @@ class ResourceManager:
         # Génération des points de recherche (globaux, par joueur)
         self.update_research_points_for_all_players(dt)
 
+    def _update_all_batch(self, dt: float):
+        """
+        Tick avec ResourceEngine : population et or restent calculés ville par ville,
+        la production des ressources est faite en une seule passe vectorisée.
+        La population consomme des céréales et peut retirer des ouvriers : seule la colonne des céréales
+        lui est prêtée, la ligne entière n'est rendue que si les ouvriers changent.
+        """
+        population = self.resources['population']
+        gold = self.resources['gold']
+        for city in self.game_data.city_manager.get_all_cities():
+            if getattr(city, "owner", None):
+                self.batch_engine.update_city(city, lambda c: population.update_population_growth(c, dt))
+            gold.update_gold(city, dt)
+        self.batch_engine.step(dt)
+
     def update_research_points_for_all_players(self, dt: float):
         """
         Génère les points de recherche pour chaque joueur, en fonction des ouvriers affectés à l'academy
@@ -175,23 +181,260 @@ class ResourceManager:
             total_points = 0
             player_cities = city_manager.get_cities_for_player(player.id_player)
             for city in player_cities:
-                academy = None
-                for b in getattr(city, "buildings", []):
-                    if (
-                        normalize_name(getattr(b, "name", "")) == "academy"
-                        and normalize_name(getattr(b, "status", "")) == "termine"
-                    ):
-                        academy = b
-                        break
-                if academy is None:
-                    continue
-                effect = getattr(academy, "effect", {})
-                workers = city.workers_assigned.get("academy", 0)
-                per_worker = effect.get("research_points_per_worker", 0)
-                points_generated = workers * per_worker * dt  # dt = tick en secondes
-                total_points += points_generated
+                total_points += self.get_research_rate(city) * dt  # dt = tick en secondes
             player.research_points += total_points
 
+    def get_research_rate(self, city) -> float:
+        """
+        Points de recherche générés par seconde par la ville (ouvriers de l'academy terminée).
+        """
+        academy = None
+        for b in getattr(city, "buildings", []):
+            if (
+                normalize_name(getattr(b, "name", "")) == "academy"
+                and normalize_name(getattr(b, "status", "")) == "termine"
+            ):
+                academy = b
+                break
+        if academy is None:
+            return 0
+        effect = getattr(academy, "effect", {})
+        workers = city.workers_assigned.get("academy", 0)
+        return workers * effect.get("research_points_per_worker", 0)
+
+    # --- Accumulation paresseuse (lazy accrual) ---
+    def enable_lazy_accrual(self):
+        """
+        Active le mode paresseux : le tick ne parcourt plus les villes, chaque ville est réglée
+        (voir settle_city) lorsqu'elle est lue ou modifiée.
+        """
+        now = time.time()
+        for city in self.game_data.city_manager.get_all_cities():
+            city.last_accrued_at = now
+        self.lazy_accrual = True
+
+    def enable_batch_engine(self) -> bool:
+        """
+        Active le moteur de production vectorisé (NumPy) du mode "numpy" (voir RESOURCE_ACCRUAL) : le tick
+        reste actif, settle_city et settle_all rendent le stock des tableaux aux villes. Exclusif du mode
+        paresseux. Retourne False si NumPy n'est pas disponible.
+        """
+        if self.lazy_accrual:
+            raise ValueError("Le moteur vectorisé remplace le tick : il ne se combine pas au mode paresseux.")
+        from managers.resource_engine import ResourceEngine  # Import local : NumPy est optionnel
+        try:
+            self.batch_engine = ResourceEngine(self)
+        except ImportError as e:
+            logger.warning(f"Moteur de production vectorisé indisponible : {e}")
+            self.batch_engine = None
+            return False
+        self.batch_engine.rebuild()
+        return True
+
+    def get_production_rates(self, city) -> dict:
+        """
+        Retourne les taux de production courants de la ville (par seconde de jeu).
+        Seules les ressources avec des ouvriers affectés produisent, comme dans Resource.update_resource.
+        """
+        rates = {}
+        for resource_name, resource in self.resources.items():
+            if resource_name in ('population', 'gold'):
+                continue
+            if city.get_workers_assigned(resource_name) > 0:
+                rates[resource_name] = resource.calculate_productivity(city)["total_productivity"]
+        free_population = city.get_resources().get("population_free", 0)
+        rates["gold"] = free_population * getattr(city, "gold_rate", 1)
+        rates["research_points"] = self.get_research_rate(city)
+        return rates
+
+    def settle_city(self, city, now=None):
+        """
+        Règle la production accumulée par la ville depuis son dernier règlement (mode paresseux uniquement).
+        Le résultat est celui du tick en pas de SETTLE_STEP : population (croissance, famine, consommation
+        de céréales) puis ressources, or et points de recherche (taux × pas, plafonné à calculate_effective_storage).
+        Seuls les pas qui franchissent un palier (croissance, famine, plafond, ouvriers) sont calculés un par un :
+        entre deux, la suite est réglée d'un bloc, population stable (voir _stable_span) ou linéaire
+        (voir _growth_steps).
+        Avec le moteur vectorisé, rend simplement le stock courant de la ville dans City.resources.
+        """
+        if city is None:
+            return
+        if self.batch_engine is not None:
+            self.batch_engine.checkout(city)
+            return
+        if not self.lazy_accrual:
+            return
+        now = time.time() if now is None else now
+        last = getattr(city, "last_accrued_at", None)
+        city.last_accrued_at = now
+        if last is None:
+            return
+        remaining = (now - last) * TIME_SCALE
+        resources = city.get_resources()
+        population = self.resources['population']
+        while remaining > 1e-9:
+            step = min(remaining, SETTLE_STEP)
+            population_before = resources.get("population_total", 0)
+            population.update_population_growth(city, step)
+            self._accrue(city, step)
+            remaining -= step
+            if remaining <= 1e-9:
+                break
+            if resources.get("population_total", 0) == population_before:
+                span = self._stable_span(city, remaining, step)
+                if span > 0:
+                    self._accrue(city, span, cereal_consumption=self._cereal_consumption(city))
+                    remaining -= span
+            else:
+                steps = self._growth_steps(city, population_before, remaining, step)
+                if steps > 0:
+                    self._advance_growth(city, steps, step)
+                    remaining -= steps * step
+
+    def _accrue(self, city, dt: float, cereal_consumption: float = 0):
+        """Ajoute dt secondes de production aux taux courants de la ville (et retire la consommation de céréales)."""
+        rates = self.get_production_rates(city)
+        city.production_rates = rates
+        resources = city.get_resources()
+        if cereal_consumption:
+            resources["cereal"] = resources.get("cereal", 0) - cereal_consumption * dt
+        max_capacity = self.resources['gold'].calculate_effective_storage(city)
+        for resource_name, rate in rates.items():
+            if resource_name == "research_points":
+                continue
+            current_amount = resources.get(resource_name, 0)
+            resources[resource_name] = min(current_amount + rate * dt, max_capacity.get(resource_name, float("inf")))
+
+        owner = self.game_data.player_manager.players.get(getattr(city, "owner", ""))
+        if owner is not None and rates["research_points"]:
+            owner.research_points += rates["research_points"] * dt
+
+    @staticmethod
+    def _cereal_consumption(city) -> float:
+        """
+        Céréales prélevées par seconde sur le stock à la population courante (0 pour une ville sans propriétaire,
+        ou en famine : le stock est déjà vide et le reste).
+        """
+        if not getattr(city, "owner", None) or "famine" in city.satisfaction_factors.get("malus", {}):
+            return 0
+        return city.get_resources().get("cereal_needed", 0)
+
+    def _stable_span(self, city, remaining: float, step: float) -> float:
+        """
+        Durée (multiple de step, au plus remaining) pendant laquelle l'état de la ville reste stationnaire
+        à population constante : aucune entrée ou sortie de famine, stock de céréales linéaire.
+        """
+        if not getattr(city, "owner", None):
+            return remaining  # PopulationManager.update_city ignore les villes sans propriétaire
+        cereal = city.get_resources().get("cereal", 0)
+        produced = city.production_rates.get("cereal", 0)
+        consumed = self._cereal_consumption(city)
+        if "famine" in city.satisfaction_factors.get("malus", {}):
+            # La famine ne cesse que si des céréales arrivent
+            return remaining if cereal <= 0 and produced <= 0 else 0
+        if cereal <= 0:
+            return 0
+        net = produced - consumed
+        if net >= 0:
+            return remaining
+        # Chaque pas doit encore trouver de quoi nourrir la population avant la production du pas
+        steps = int(max(0.0, cereal - consumed * step) // (-net * step))
+        return min(remaining, steps * step)
+
+    def _cereal_series(self, city, step: float):
+        """(consommation de céréales du pas courant, écart d'un pas au suivant) quand la population croît linéairement."""
+        population_manager = self.resources['population'].population_manager
+        resources = city.get_resources()
+        population = resources.get("population_total", 0)
+        growth = resources.get("population_growth", 0) * step
+        first = population_manager.cereal_needed_for(city, population) * step
+        return first, population_manager.cereal_needed_for(city, population + growth) * step - first
+
+    def _growth_steps(self, city, population_before: float, remaining: float, step: float) -> int:
+        """
+        Nombre de pas de step réglables d'un bloc quand la population varie : tant qu'elle reste dans le palier
+        de population_before (PopulationManager.growth_regime), entre zéro et sa limite, au-dessus du nombre
+        d'ouvriers affectés, et que le stock de céréales ne change pas de régime (famine, plafond), chaque pas
+        reproduit le précédent avec une population décalée de population_growth × step.
+        Le dernier pas de ce bloc est laissé à settle_city, qui recalcule l'état dérivé de la population.
+        """
+        population_manager = self.resources['population'].population_manager
+        resources = city.get_resources()
+        population = resources.get("population_total", 0)
+        growth = resources.get("population_growth", 0) * step
+        regime = population_manager.growth_regime(city, population_before)
+        if population <= 0 or population_manager.growth_regime(city, population) != regime:
+            return 0
+        limit = population_manager.calculate_population_limit(city)
+        workers = sum(city.get_workers_assigned(name) for name in city.workers_assigned)
+        cereal = resources.get("cereal", 0)
+        produced = city.production_rates.get("cereal", 0) * step
+        capacity = self.resources['gold'].calculate_effective_storage(city).get("cereal", float("inf"))
+        famine = "famine" in city.satisfaction_factors.get("malus", {})
+        first, slope = self._cereal_series(city, step)
+
+        def extremes(value, k):
+            # value(j) est quadratique en j : extrema aux bornes de [0, k - 1] ou autour du sommet
+            points = {0, k - 1}
+            if slope:
+                vertex = math.floor((produced - first) / slope)
+                points.update(j for j in range(vertex - 1, vertex + 3) if 0 < j < k - 1)
+            values = [value(j) for j in points]
+            return min(values), max(values)
+
+        def fits(k):
+            last, end = population + (k - 1) * growth, population + k * growth
+            if last <= 0 or not 0 <= end <= limit or (growth < 0 and end < workers):
+                return False
+            if population_manager.growth_regime(city, last) != regime:
+                return False
+            needed = (first, first + slope * (k - 1))
+            if famine:
+                # Le stock, vidé puis réapprovisionné à chaque pas, ne suffit jamais
+                return cereal <= 0 or min(needed) > cereal
+            if cereal >= capacity:
+                # Grenier plein : il le reste tant que la production couvre la consommation
+                return produced >= max(needed) and capacity > 0 and capacity >= max(needed)
+
+            def stock(j):
+                return cereal + j * (produced - first) - slope * j * (j - 1) / 2
+
+            low, _ = extremes(lambda j: min(stock(j), stock(j) - first - slope * j), k)
+            _, high = extremes(lambda j: stock(j) - first - slope * j + produced, k)
+            return low > 0 and high <= capacity
+
+        low, high = 0, int(remaining / step + 1e-9)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if fits(middle):
+                low = middle
+            else:
+                high = middle - 1
+        return max(0, low - 1)
+
+    def _advance_growth(self, city, steps: int, step: float):
+        """Règle d'un bloc steps pas à population linéaire (voir _growth_steps)."""
+        resources = city.get_resources()
+        dt = steps * step
+        if "famine" in city.satisfaction_factors.get("malus", {}):
+            consumed = city.production_rates.get("cereal", 0) * dt  # Stock inchangé
+        else:
+            first, slope = self._cereal_series(city, step)
+            consumed = first * steps + slope * steps * (steps - 1) / 2
+        resources["population_total"] = resources.get("population_total", 0) + resources.get("population_growth", 0) * dt
+        self._accrue(city, dt, cereal_consumption=consumed / dt)
+
+    def settle_all(self, now=None):
+        """Règle toutes les villes (avant une sérialisation complète de l'état)."""
+        if self.batch_engine is not None:
+            self.batch_engine.flush()
+            return
+        if not self.lazy_accrual:
+            return
+        now = time.time() if now is None else now
+        for city in self.game_data.city_manager.get_all_cities():
+            self.settle_city(city, now)
+
     def get_population_data(self, city):
         population_manager = self.game_data.population_manager
         if population_manager is None:
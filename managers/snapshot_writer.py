@@ -0,0 +1,97 @@
+"""
+SnapshotWriter : écriture des sauvegardes sur un thread de fond.
+
+Responsabilités :
+- Recevoir un instantané déjà encodé (texte JSON immuable) et rendre la main immédiatement.
+- Écrire l'instantané dans un fichier temporaire, le synchroniser sur disque (fsync) puis le renommer
+  atomiquement à la place de la sauvegarde : un arrêt brutal laisse l'ancienne ou la nouvelle version,
+  jamais un fichier tronqué.
+- Ne garder que l'instantané le plus récent par fichier si plusieurs arrivent pendant une écriture
+  (ou les fusionner avec merge, pour des lots incrémentaux).
+- Vider la file à l'arrêt (flush).
+- Prévenir (on_written) quand un instantané est sur disque, avec l'étiquette fournie à submit
+  (ex. numéro du journal d'actions couvert par l'instantané).
+"""
+
+import logging
+import os
+import threading
+
+
+def write_atomic(filepath: str, text):
+    """Écrit text (str ou bytes) dans filepath via un fichier temporaire synchronisé puis renommé."""
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "wb" if isinstance(text, bytes) else "w") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, filepath)
+    # Synchronise aussi le répertoire pour rendre le renommage durable (POSIX uniquement)
+    try:
+        dir_fd = os.open(os.path.dirname(os.path.abspath(filepath)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class SnapshotWriter:
+    """
+    File d'écriture à un seul thread de fond.
+    write(cible, contenu) écrit un contenu (write_atomic par défaut) ; merge(ancien, nouveau) fusionne deux
+    contenus en attente pour la même cible (par défaut le plus récent remplace l'ancien).
+    on_error(cible, exception) est appelé si une écriture échoue (le contenu n'est alors pas sur disque) ;
+    on_written(cible, étiquette) après chaque écriture réussie.
+    """
+
+    def __init__(self, on_error=None, write=None, merge=None, on_written=None):
+        self.on_error = on_error
+        self.on_written = on_written
+        self.write = write if write is not None else write_atomic
+        self.merge = merge
+        self._cond = threading.Condition()
+        self._pending = {}  # filepath -> (texte le plus récent à écrire, étiquette)
+        self._busy = False
+        self._thread = None
+        self.writes = 0
+
+    def submit(self, filepath: str, text: str, tag=None):
+        """Programme l'écriture de text dans filepath ; remplace un instantané pas encore écrit."""
+        with self._cond:
+            if self.merge is not None and filepath in self._pending:
+                text = self.merge(self._pending[filepath][0], text)
+            self._pending[filepath] = (text, tag)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Attend que tous les instantanés soumis soient écrits. Retourne False si le délai expire."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                filepath = next(iter(self._pending))
+                text, tag = self._pending.pop(filepath)
+                self._busy = True
+            try:
+                self.write(filepath, text)
+                self.writes += 1
+                if self.on_written is not None:
+                    self.on_written(filepath, tag)
+            except Exception as e:
+                logging.error(f"Erreur lors de l'écriture de la sauvegarde {filepath} : {e}")
+                if self.on_error is not None:
+                    self.on_error(filepath, e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
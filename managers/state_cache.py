@@ -0,0 +1,85 @@
+"""
+StateCache : réponses encodées de /get_state et /get_state_for_player, mises en cache par version du monde.
+
+Responsabilités :
+- Conserver les octets JSON déjà encodés par (vue, since, version) : les clients qui interrogent le serveur
+  entre deux modifications partagent la même réponse, sans nouveau to_dict ni nouvel encodage.
+- Conserver aussi la version compressée (gzip) d'une réponse, calculée à la première demande.
+- Fournir l'ETag d'une vue à une version donnée (réponse 304 si le client possède déjà cette version).
+- Limiter le règlement de la production par vue à un par settle_interval : sans modification réelle,
+  les interrogations rapprochées gardent la même version (et donc le même cache et le même ETag).
+L'invalidation suit WorldVersion : toute modification signalée change la version, les entrées des versions
+précédentes ne sont plus jamais servies et sont évincées à l'insertion suivante.
+"""
+
+import gzip
+import threading
+import time
+from collections import OrderedDict
+
+
+class StateCache:
+    def __init__(self, versions, max_entries: int = 64, settle_interval: float = 1.0):
+        self.versions = versions
+        self.max_entries = max_entries
+        self.settle_interval = settle_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (vue, since, version) -> octets encodés
+        self._gzipped = {}  # (vue, since, version) -> octets encodés puis compressés
+        self._settled_at = {}  # vue -> instant du dernier règlement
+        self.hits = 0
+        self.misses = 0
+
+    def settle_due(self, scope, now: float = None) -> bool:
+        """Vrai (et l'instant est retenu) si la production de la vue doit être réglée avant de répondre."""
+        now = time.time() if now is None else now
+        with self._lock:
+            last = self._settled_at.get(scope)
+            if last is not None and now - last < self.settle_interval:
+                return False
+            self._settled_at[scope] = now
+            return True
+
+    def etag(self, scope, version: int = None) -> str:
+        version = self.versions.version if version is None else version
+        return f"{self.versions.epoch}-{version}-{scope or ''}"
+
+    def get(self, scope, since, version: int):
+        with self._lock:
+            body = self._entries.get((scope, since, version))
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end((scope, since, version))
+            return body
+
+    def put(self, scope, since, version: int, body: bytes):
+        with self._lock:
+            self._entries[(scope, since, version)] = body
+            self._entries.move_to_end((scope, since, version))
+            # Une version dépassée n'est plus jamais servie
+            for key in [k for k in self._entries if k[2] < version]:
+                del self._entries[key]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            for key in [k for k in self._gzipped if k not in self._entries]:
+                del self._gzipped[key]
+
+    def gzipped(self, scope, since, version: int, body: bytes) -> bytes:
+        """body compressé, mis en cache tant que l'entrée (scope, since, version) l'est."""
+        key = (scope, since, version)
+        with self._lock:
+            compressed = self._gzipped.get(key)
+        if compressed is None:
+            compressed = gzip.compress(body, compresslevel=5)
+            with self._lock:
+                if key in self._entries:
+                    self._gzipped[key] = compressed
+        return compressed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._gzipped.clear()
+            self._settled_at.clear()
@@ -1,29 +1,117 @@
+import heapq
+import itertools
 import math
 from datetime import datetime
 from typing import Any, Dict, Optional, List
 
+from managers.persistence_queue import UnitOfWork
 from models.transport import EtatTransport, Transport
 
+
+def _id_of(obj: Any) -> Any:
+    """Identifiant d'un joueur (id_player) ou d'une ville (id) ; l'objet lui-même s'il s'agit déjà d'un id."""
+    return getattr(obj, "id_player", getattr(obj, "id", obj))
+
+
 class TransportManager:
     """
     Gère les transports locaux (file d'attente, progression, annulation, notifications).
     Aucun appel réseau ici : toute communication HTTP doit passer par un NetworkManager séparé.
+    Chaque transport porte l'échéance absolue de sa phase (t.deadline, en secondes de jeu sur self.clock) ;
+    un tas trié par échéance permet de ne traiter que les transports dont la phase se termine.
+    Registre indexé : id -> transport, joueur -> ids, ville source -> file du port (en attente / chargement).
+    Les fins de phase du tick sont journalisées comme les routes (voir _journal_phases).
     """
 
     def __init__(self, game_data):
         self.game_data = game_data
-        self.transports: List[Transport] = []
+        self._by_id: Dict[int, Transport] = {}  # Ordre d'insertion conservé pour to_dict
+        self._by_player: Dict[Any, set] = {}
+        self._port_queues: Dict[Any, List[Transport]] = {}
+        self.next_id = 1  # Allocateur monotone, sauvegardé avec la partie
+        self.clock = 0.0  # Temps de jeu écoulé, avancé par update_transports
+        self._events = []  # Tas de (échéance, séquence, transport) ; entrées périmées ignorées
+        self._event_seq = itertools.count()
+
+    # --- Échéances des phases ---
+    def schedule(self, t: Transport, remaining: float) -> None:
+        """Fixe l'échéance de la phase courante du transport à remaining secondes de jeu."""
+        self._schedule_at(t, self.clock + remaining)
+
+    def _schedule_at(self, t: Transport, deadline: float) -> None:
+        t.deadline = deadline
+        t.scheduler = self
+        heapq.heappush(self._events, (deadline, next(self._event_seq), t))
+        versions = self._versions()
+        if versions is not None:
+            versions.touch(t, key=("transport", t.id))  # Nouvelle phase : transmise à la prochaine synchronisation
+        self._publish("transport", t)
+
+    def _retirer(self, t: Transport) -> None:
+        """Retire le transport du registre ; son entrée dans le tas devient périmée."""
+        t.temps_restant = t.get_temps_restant()
+        t.deadline = None
+        self._quitter_port(t)
+        self._by_id.pop(t.id, None)
+        versions = self._versions()
+        if versions is not None:
+            versions.remove(("transport", t.id), "transports", t.id)
+        self._publish("transport_removed", t)
+        for joueur in (t.joueur_source, t.joueur_dest):
+            ids = self._by_player.get(_id_of(joueur))
+            if ids is not None:
+                ids.discard(t.id)
+                if not ids:
+                    del self._by_player[_id_of(joueur)]
+
+    def _versions(self):
+        save_load_manager = getattr(self.game_data, "save_load_manager", None)
+        return getattr(save_load_manager, "versions", None)
+
+    def _publish(self, event: str, t: Transport) -> None:
+        event_bus = getattr(self.game_data, "event_bus", None)
+        if event_bus is not None and event_bus.has_subscribers():
+            event_bus.publish(event, t.to_dict(), players=[_id_of(t.joueur_source), _id_of(t.joueur_dest)])
+
+    # --- Registre ---
+    @property
+    def transports(self) -> List[Transport]:
+        return list(self._by_id.values())
+
+    def get_transport(self, transport_id: Any) -> Optional[Transport]:
+        return self._by_id.get(transport_id)
+
+    def allocate_id(self) -> int:
+        id_ = self.next_id
+        self.next_id += 1
+        return id_
+
+    def _indexer(self, t: Transport) -> None:
+        if t.id is None:
+            t.id = self.allocate_id()
+        else:
+            self.next_id = max(self.next_id, t.id + 1)
+        self._by_id[t.id] = t
+        for joueur in (t.joueur_source, t.joueur_dest):
+            if joueur is not None:
+                self._by_player.setdefault(_id_of(joueur), set()).add(t.id)
+        if t.etat in (EtatTransport.CHARGEMENT.value, EtatTransport.EN_ATTENTE.value):
+            self._port_queues.setdefault(_id_of(t.ville_source), []).append(t)
+
+    def _quitter_port(self, t: Transport) -> None:
+        queue = self._port_queues.get(_id_of(t.ville_source))
+        if queue and t in queue:
+            queue.remove(t)
+            if not queue:
+                del self._port_queues[_id_of(t.ville_source)]
 
     def ajouter_transport(self, transport: Transport) -> bool:
-        transports_port = [
-            t for t in self.transports
-            if t.ville_source == transport.ville_source and t.etat in (EtatTransport.CHARGEMENT.value, EtatTransport.EN_ATTENTE.value)
-        ]
+        transports_port = self._port_queues.get(_id_of(transport.ville_source), [])
         if transports_port:
-            attente = sum(t.temps_restant for t in transports_port if t.etat == EtatTransport.CHARGEMENT.value)
+            attente = sum(t.get_temps_restant() for t in transports_port if t.etat == EtatTransport.CHARGEMENT.value)
             for t in transports_port:
                 if t.etat == EtatTransport.EN_ATTENTE.value:
-                    attente += t.temps_restant
+                    attente += t.get_temps_restant()
             transport.etat = EtatTransport.EN_ATTENTE.value
             transport.temps_restant = attente
         else:
@@ -32,7 +120,8 @@ class TransportManager:
             # Prélèvement immédiat si port libre
             self.prelever_ressources_et_bateaux(transport)
             transport._ressources_bateaux_preleves = True
-        self.transports.append(transport)
+        self._indexer(transport)
+        self.schedule(transport, transport.temps_restant)
         return True
 
     def create_and_add_transport(
@@ -49,11 +138,8 @@ class TransportManager:
         temps_restant: Optional[float] = None,
         id_: Optional[int] = None,
     ) -> Transport:
-        if id_ is None:
-            existing_ids = {t.id for t in self.transports if t.id is not None}
-            id_ = 1
-            while id_ in existing_ids:
-                id_ += 1
+        if id_ is None or id_ in self._by_id:
+            id_ = self.allocate_id()
         t = Transport(
             ville_source=ville_source,
             ville_dest=ville_dest,
@@ -73,91 +159,146 @@ class TransportManager:
     def to_dict(self) -> List[Dict[str, Any]]:
         return [t.to_dict() for t in self.transports]
 
-    def from_dict(self, transport_dicts: List[Dict[str, Any]], game_data: Any):
-        self.transports.clear()
+    def from_dict(self, transport_dicts: List[Dict[str, Any]], game_data: Any, next_id: Optional[int] = None):
+        """Recharge les transports ; next_id absent (anciennes sauvegardes) : repris après le plus grand id."""
+        for t in self._by_id.values():
+            t.deadline = None
+        self._by_id.clear()
+        self._by_player.clear()
+        self._port_queues.clear()
+        self._events = []
+        self.next_id = next_id or 1
+        for tdict in transport_dicts:
+            t = Transport.from_dict(tdict, game_data)
+            if t.id in self._by_id:
+                t.id = None  # Doublon dans la sauvegarde : nouvel id
+            self._indexer(t)
+            if t.etat != EtatTransport.ANNULE.value:
+                self.schedule(t, t.temps_restant or 0)
+
+    def apply_changes(self, transport_dicts: List[Dict[str, Any]], removed_ids: List[Any], game_data: Any,
+                      next_id: Optional[int] = None):
+        """
+        Applique des transports modifiés (remplacés par id, ou ajoutés) et retirés, sans recharger les autres :
+        rejeu d'un enregistrement du journal ou différentiel reçu par le client.
+        """
+        for transport_id in removed_ids:
+            t = self._by_id.get(transport_id)
+            if t is not None:
+                self._retirer(t)
         for tdict in transport_dicts:
             t = Transport.from_dict(tdict, game_data)
-            self.transports.append(t)
+            existing = self._by_id.get(t.id)
+            if existing is not None:
+                existing.deadline = None  # Son entrée dans le tas devient périmée
+                self._quitter_port(existing)
+            self._indexer(t)  # Même position dans le registre que le transport remplacé
+            if t.etat != EtatTransport.ANNULE.value:
+                self.schedule(t, t.temps_restant or 0)
+        if next_id is not None:
+            self.next_id = max(self.next_id, next_id)
 
     def get_transports_du_joueur(self, joueur: Any) -> List[Transport]:
-        return [
-            t for t in self.transports
-            if getattr(t, "joueur_source", None) == joueur or getattr(t, "joueur_dest", None) == joueur
-        ]
+        return self.get_transports_for_player(_id_of(joueur))
 
     def get_transports_for_player(self, joueur_id: Any) -> List[Transport]:
-        def id_of(j):
-            return getattr(j, "id_player", j)
-        return [
-            t for t in self.transports
-            if id_of(t.joueur_source) == joueur_id or id_of(t.joueur_dest) == joueur_id
-        ]
+        return [self._by_id[i] for i in sorted(self._by_player.get(joueur_id, ()))]
 
     def update_transports(self, dt: float = 1.0) -> None:
-        for t in list(self.transports):  # Copie pour modification sûre
-            if t.etat == EtatTransport.EN_ATTENTE.value:
-                t.temps_restant -= dt
-                if t.temps_restant <= 0:
-                    t.etat = EtatTransport.CHARGEMENT.value
-                    t.temps_restant = t.duree_chargement
-                    self.prelever_ressources_et_bateaux(t)
-                    t._ressources_bateaux_preleves = True
-            elif t.etat == EtatTransport.CHARGEMENT.value:
-                t.temps_restant -= dt
-                if t.temps_restant <= 0:
-                    t.etat = EtatTransport.TRANSPORT.value
-                    t.temps_restant = t.duree_transport
-            elif t.etat == EtatTransport.TRANSPORT.value:
-                t.temps_restant -= dt
-                if t.temps_restant <= 0:
-                    self.crediter_destinataire(t)
-                    # Propagation de la peste à l'arrivée
-                    if getattr(t.ville_source, "has_plague", False):
-                        t.ville_dest.has_plague = True
-                    notif_mgr = getattr(self.game_data, "notification_manager", None)
-                    try:
-                        dest_name = getattr(t.ville_dest, "name", str(t.ville_dest))
-                        src_name = getattr(t.ville_source, "name", str(t.ville_source))
-                        ressources_str = ", ".join(
-                            f"{k}: {v}" for k, v in t.ressources.items() if v > 0
-                        ) or "Aucune"
-                        if notif_mgr and hasattr(t.joueur_source, "id_player"):
-                            msg = (
-                                f"Transport de: {src_name}\n"
-                                f"Vers: {dest_name}\n"
-                                f"Ressources: {ressources_str}\n"
-                                f"Votre transport est arrivé à destination."
-                            )
-                            notif_mgr.add_notification(t.joueur_source.id_player, msg, type="transport")
-                        if notif_mgr and t.joueur_dest and hasattr(t.joueur_dest, "id_player"):
-                            msg = (
-                                f"Transport de: {src_name}\n"
-                                f"Vers: {dest_name}\n"
-                                f"Ressources: {ressources_str}\n"
-                                f"Vous avez reçu un transport."
-                            )
-                            notif_mgr.add_notification(t.joueur_dest.id_player, msg, type="transport")
-                    except Exception:
-                        pass
-                    dest_is_self = hasattr(t.ville_dest, "owner") and getattr(t.ville_dest, "owner", None) == getattr(t.joueur_source, "id_player", None)
-                    if dest_is_self:
-                        self.rendre_bateaux(t)
-                        self.transports.remove(t)
-                    else:
-                        t.etat = EtatTransport.RETOUR.value
-                        t.temps_restant = t.duree_transport
-            elif t.etat == EtatTransport.RETOUR.value:
-                t.temps_restant -= dt
-                if t.temps_restant <= 0:
-                    # Propagation de la peste au retour
-                    if getattr(t.ville_dest, "has_plague", False):
-                        t.ville_source.has_plague = True
-                    self.rendre_bateaux(t)
-                    self.transports.remove(t)
+        """Avance l'horloge de dt et ne traite que les transports dont la phase se termine."""
+        self.clock += dt
+        ended = []
+        while self._events and self._events[0][0] <= self.clock:
+            deadline, _, t = heapq.heappop(self._events)
+            if t.deadline != deadline:
+                continue  # Entrée périmée (transport annulé, replanifié ou terminé)
+            self._fin_de_phase(t, deadline)
+            ended.append(t)
+        if ended:
+            self._journal_phases(ended)
+
+    def _journal_phases(self, ended: List[Transport]) -> None:
+        """
+        Valide les fins de phase du tick dans la file de persistance, comme une unité de travail de route :
+        villes prélevées ou créditées, joueurs dont les bateaux reviennent et transports concernés.
+        Sans cela, le rejeu redonnerait le transport dans sa phase de l'instantané alors que la ville
+        créditée resterait dans son état de l'instantané.
+        """
+        save_load_manager = getattr(self.game_data, "save_load_manager", None)
+        if save_load_manager is None:
+            return
+        unit = UnitOfWork()
+        unit.add(
+            "transport_phase",
+            [{"id": t.id, "etat": t.etat} for t in ended],
+            cities=[ville for t in ended for ville in (t.ville_source, t.ville_dest) if hasattr(ville, "resources")],
+            players=[joueur for t in ended for joueur in (t.joueur_source, t.joueur_dest) if hasattr(joueur, "ships_available")],
+            transports=ended,
+        )
+        save_load_manager.persistence_queue.submit(unit)
+
+    def _fin_de_phase(self, t: Transport, deadline: float) -> None:
+        """Passe le transport à sa phase suivante ; la phase suivante démarre à l'échéance atteinte."""
+        if t.etat == EtatTransport.EN_ATTENTE.value:
+            t.etat = EtatTransport.CHARGEMENT.value
+            t.temps_restant = t.duree_chargement
+            self.prelever_ressources_et_bateaux(t)
+            t._ressources_bateaux_preleves = True
+            self._schedule_at(t, deadline + t.duree_chargement)
+        elif t.etat == EtatTransport.CHARGEMENT.value:
+            self._quitter_port(t)
+            t.etat = EtatTransport.TRANSPORT.value
+            t.temps_restant = t.duree_transport
+            self._schedule_at(t, deadline + t.duree_transport)
+        elif t.etat == EtatTransport.TRANSPORT.value:
+            self.crediter_destinataire(t)
+            # Propagation de la peste à l'arrivée
+            if getattr(t.ville_source, "has_plague", False):
+                t.ville_dest.has_plague = True
+            notif_mgr = getattr(self.game_data, "notification_manager", None)
+            try:
+                dest_name = getattr(t.ville_dest, "name", str(t.ville_dest))
+                src_name = getattr(t.ville_source, "name", str(t.ville_source))
+                ressources_str = ", ".join(
+                    f"{k}: {v}" for k, v in t.ressources.items() if v > 0
+                ) or "Aucune"
+                if notif_mgr and hasattr(t.joueur_source, "id_player"):
+                    msg = (
+                        f"Transport de: {src_name}\n"
+                        f"Vers: {dest_name}\n"
+                        f"Ressources: {ressources_str}\n"
+                        f"Votre transport est arrivé à destination."
+                    )
+                    notif_mgr.add_notification(t.joueur_source.id_player, msg, type="transport")
+                if notif_mgr and t.joueur_dest and hasattr(t.joueur_dest, "id_player"):
+                    msg = (
+                        f"Transport de: {src_name}\n"
+                        f"Vers: {dest_name}\n"
+                        f"Ressources: {ressources_str}\n"
+                        f"Vous avez reçu un transport."
+                    )
+                    notif_mgr.add_notification(t.joueur_dest.id_player, msg, type="transport")
+            except Exception:
+                pass
+            dest_is_self = hasattr(t.ville_dest, "owner") and getattr(t.ville_dest, "owner", None) == getattr(t.joueur_source, "id_player", None)
+            if dest_is_self:
+                self.rendre_bateaux(t)
+                self._retirer(t)
+            else:
+                t.etat = EtatTransport.RETOUR.value
+                t.temps_restant = t.duree_transport
+                self._schedule_at(t, deadline + t.duree_transport)
+        elif t.etat == EtatTransport.RETOUR.value:
+            # Propagation de la peste au retour
+            if getattr(t.ville_dest, "has_plague", False):
+                t.ville_source.has_plague = True
+            self.rendre_bateaux(t)
+            self._retirer(t)
 
     def prelever_ressources_et_bateaux(self, t: Transport) -> None:
         ville_source = t.ville_source
         joueur = t.joueur_source
+        self.game_data.resource_manager.settle_city(ville_source)
         print("[DEBUG] ville_source.resources.keys():", list(ville_source.resources.keys()))
         print("[DEBUG] t.ressources:", t.ressources)
         for res, qty in t.ressources.items():
@@ -170,6 +311,7 @@ class TransportManager:
 
     def crediter_destinataire(self, t: Transport) -> None:
         ville_dest = t.ville_dest
+        self.game_data.resource_manager.settle_city(ville_dest)
         for res, qty in t.ressources.items():
             if qty > 0 and hasattr(ville_dest, "resources"):
                 ville_dest.resources[res] = ville_dest.resources.get(res, 0) + qty
@@ -181,7 +323,7 @@ class TransportManager:
 
     def annuler_transport(self, transport_or_id: Any) -> bool:
         if isinstance(transport_or_id, int):
-            t = next((tt for tt in self.transports if tt.id == transport_or_id), None)
+            t = self._by_id.get(transport_or_id)
         else:
             t = transport_or_id
 
@@ -202,13 +344,14 @@ class TransportManager:
             t.date_annulation = datetime.utcnow()
             if notif_mgr and joueur_id:
                 notif_mgr.add_notification(joueur_id, "Votre transport a été annulé.", type="transport")
-            self.transports.remove(t)
+            self._retirer(t)
             return True
 
         elif t.etat == EtatTransport.TRANSPORT.value:
-            temps_navigue = t.duree_transport - t.temps_restant
+            temps_navigue = t.duree_transport - t.get_temps_restant()
             t.etat = EtatTransport.RETOUR.value
             t.temps_restant = max(temps_navigue, 1)
+            self.schedule(t, t.temps_restant)
             t.date_annulation = datetime.utcnow()
             if notif_mgr and joueur_id:
                 notif_mgr.add_notification(joueur_id, "Votre transport a été annulé : vos bateaux font demi-tour.", type="transport")
@@ -0,0 +1,81 @@
+"""
+WorldVersion : version du monde et versions de modification par entité (synchronisation différentielle).
+
+Responsabilités :
+- Incrémenter un numéro de version à chaque modification signalée (touch), ou une seule fois pour un groupe
+  de modifications (touch_many), et le retenir pour l'entité.
+- Garder les entités dans l'ordre de leur dernière modification : changes_since ne parcourt que
+  les entités modifiées depuis la version demandée.
+- Retenir les suppressions (remove) dans un historique borné ; une version plus ancienne que
+  l'historique ne peut plus être servie en différentiel (le client recharge l'état complet).
+- epoch identifie le processus serveur : après un redémarrage, les versions repartent de zéro.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict, deque
+
+
+class WorldVersion:
+    def __init__(self, max_removals: int = 10000):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self._lock = threading.Lock()
+        self._changes = OrderedDict()  # clé -> (entité, version), de la plus ancienne à la plus récente
+        self._removals = deque(maxlen=max_removals)  # (version, type, identifiant)
+        self._removals_floor = 0  # Plus petite version encore couverte par l'historique des suppressions
+
+    def touch(self, entity, key=None):
+        """Signale une modification de entity (clé par défaut : id(entity))."""
+        key = id(entity) if key is None else key
+        with self._lock:
+            self.version += 1
+            self._changes[key] = (entity, self.version)
+            self._changes.move_to_end(key)
+
+    def touch_many(self, changes):
+        """Signale d'un coup les modifications [(clé, entité)] : une seule nouvelle version pour toutes."""
+        with self._lock:
+            if not changes:
+                return
+            self.version += 1
+            for key, entity in changes:
+                self._changes[key] = (entity, self.version)
+                self._changes.move_to_end(key)
+
+    def remove(self, key, kind: str, ident):
+        """Signale la suppression de l'entité de clé key (transmise au client comme (kind, ident))."""
+        with self._lock:
+            self.version += 1
+            self._changes.pop(key, None)
+            if len(self._removals) == self._removals.maxlen:
+                self._removals_floor = self._removals[0][0]
+            self._removals.append((self.version, kind, ident))
+
+    def can_serve(self, since, epoch=None) -> bool:
+        """Vrai si un différentiel depuis since (pour ce processus) peut être calculé."""
+        if since is None or (epoch is not None and epoch != self.epoch):
+            return False
+        with self._lock:
+            return self._removals_floor <= since <= self.version
+
+    def changes_since(self, since: int):
+        """
+        Retourne (version, [(clé, entité)] modifiées, suppressions {type: [identifiants]}) depuis since.
+        La version est lue avant le parcours : une modification concurrente peut être renvoyée deux fois,
+        jamais perdue.
+        """
+        with self._lock:
+            version = self.version
+            changed = []
+            for key in reversed(self._changes):
+                entity, entity_version = self._changes[key]
+                if entity_version <= since:
+                    break
+                changed.append((key, entity))
+            removed = {}
+            for removal_version, kind, ident in reversed(self._removals):
+                if removal_version <= since:
+                    break
+                removed.setdefault(kind, []).append(ident)
+        return version, changed, removed
@@ -1,5 +1,6 @@
 import copy
 import logging
+import time
 logging.basicConfig(level=logging.INFO)
 from kivy.event import EventDispatcher
 from kivy.properties import (
@@ -9,6 +10,7 @@ from data.buildings_database import buildings_database
 from data.resources_database import RESOURCES
 from models.constants import DEFAULT_RESOURCES, DEFAULT_STORAGE_CAPACITY
 from models.building import Building
+from models.city_effects import CityEffects
 
 def safe_int(v):
     try:
@@ -46,6 +48,7 @@ class City(EventDispatcher):
     satisfaction = NumericProperty(100)  # Valeur initiale à 100 (satisfait)
     satisfaction_factors = DictProperty()
     windmill_cereal_multiplier = NumericProperty(1)  # Multiplicateur de consommation de céréales via le moulin
+    has_plague = BooleanProperty(False)
 
     def __init__(
         self,
@@ -83,6 +86,10 @@ class City(EventDispatcher):
         self.satisfaction = 100
         self.satisfaction_factors = {"bonus": {}, "malus": {}}
         self.has_plague = False
+        # Mode paresseux : instant du dernier règlement et taux de production associés (non sérialisés)
+        self.last_accrued_at = time.time()
+        self.production_rates = {}
+        self._effects = None  # Agrégat des effets des bâtiments (voir get_effects)
 
     # --- Accès bâtiments ---
     def get_building_by_index(self, idx) -> Building:
@@ -94,6 +101,7 @@ class City(EventDispatcher):
         while len(self.buildings) <= idx:
             self.buildings.append(None)
         self.buildings[idx] = Building.ensure_instance(building, city=self)
+        self.invalidate_effects()
 
     def get_building_by_name(self, building_name: str):
         for building in self.get_buildings():
@@ -108,12 +116,33 @@ class City(EventDispatcher):
             for i, b in enumerate(self.buildings):
                 if b is None:
                     self.buildings[i] = Building.ensure_instance(building, city=self)
+                    self.invalidate_effects()
                     return
             self.buildings.append(Building.ensure_instance(building, city=self))
+        self.invalidate_effects()
 
     def get_buildings(self):
         return [Building.ensure_instance(building, city=self) for building in self.buildings]
 
+    # --- Effets agrégés des bâtiments ---
+    def get_effects(self) -> CityEffects:
+        """Retourne l'agrégat des effets des bâtiments, recalculé après invalidation ou à la fin d'un timer de construction."""
+        effects = self._effects
+        if effects is None or (effects.expires_at is not None and time.time() >= effects.expires_at):
+            self._effects = CityEffects.from_city(self)
+        return self._effects
+
+    def invalidate_effects(self):
+        """À appeler dès qu'un bâtiment est lancé, terminé, détruit ou resynchronisé."""
+        self._effects = None
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        """Signale une modification non observée par les propriétés Kivy (bâtiments, taux d'impôt...)."""
+        save_load_manager = getattr(self.game_data, "save_load_manager", None)
+        if save_load_manager is not None:
+            save_load_manager.mark_dirty(self)
+
     @staticmethod
     def deserialize_buildings(buildings_data, city=None):
         return [Building.ensure_instance(b, city=city) for b in buildings_data]
@@ -249,6 +278,7 @@ class City(EventDispatcher):
         self.resources.update(saved_resources)
         self.storage_capacity = data.get("storage_capacity", copy.deepcopy(DEFAULT_STORAGE_CAPACITY))
         self.buildings = self.deserialize_buildings(data.get("buildings", []), city=self)
+        self.invalidate_effects()
         layout_key = None
         if self.game_data and hasattr(self.game_data, "get_city_layout_for_city"):
             layout_key = self.game_data.get_city_layout_for_city(self)
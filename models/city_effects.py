@@ -0,0 +1,105 @@
+"""
+CityEffects : agrégat des effets des bâtiments d'une ville, calculé en un seul parcours.
+
+Responsabilités :
+- Regrouper stockage, bonus de ressources, nourriture, capacité de population, hygiène,
+  bonus de satisfaction et réductions d'architecte d'une ville.
+- Éviter de reparcourir city.get_buildings() pour chaque ressource à chaque tick.
+
+Remarque : l'agrégat est mis en cache sur la ville (City.get_effects) et invalidé par
+BuildingsManager au lancement, à la complétion et à la destruction d'un bâtiment.
+Le niveau affiché d'un bâtiment en construction (get_display_level) change à la fin de son timer,
+avant même la complétion : l'agrégat expire alors de lui-même (expires_at).
+"""
+
+import time
+
+from data.buildings_database import buildings_database
+from models.constants import DEFAULT_STORAGE_CAPACITY
+
+
+def _level_effect(building_name, level):
+    """Effet d'un bâtiment à un niveau donné (niveau plancher à 1, comme PopulationManager.get_building_effect)."""
+    level = max(1, level)
+    try:
+        return buildings_database[building_name]["levels"][level - 1]["effect"]
+    except Exception:
+        return {}
+
+
+class CityEffects:
+    """
+    Effets agrégés des bâtiments d'une ville.
+    Les valeurs reproduisent exactement les parcours de Resource, PopulationManager et BuildingsManager.
+    """
+
+    def __init__(self):
+        self.storage = DEFAULT_STORAGE_CAPACITY.copy()
+        self.warehouse_storage = {}
+        self.bonuses = {}  # bonus_type -> {ressource: pourcentage}
+        self.food_supply = 0
+        self.windmill_max_multiplier = 1
+        self.population_limit = 0
+        self.population_growth = 0.0
+        self.cleanliness_capacity = 0
+        self.thermes_satisfaction_bonus = None  # None si aucun Thermes terminé
+        self.construction_cost_reduction = 0
+        self.construction_time_reduction = 0
+        self.expires_at = None  # Fin du premier timer de construction en cours (time.time()), None sinon
+
+    @classmethod
+    def from_city(cls, city):
+        effects = cls()
+        town_hall_seen = False
+        now = time.time()
+        for building in city.get_buildings():
+            if not building:
+                continue
+            name = building.get_name()
+            status = building.get_status()
+            finished = status == "Terminé"
+
+            remaining = building.get_remaining_time()
+            if remaining > 0:
+                # À cet instant get_display_level passe au niveau réel
+                effects.expires_at = min(effects.expires_at or float("inf"), now + remaining)
+
+            if finished:
+                for bonus_type, values in building.effect.items():
+                    if isinstance(values, dict):
+                        bucket = effects.bonuses.setdefault(bonus_type, {})
+                        for resource, value in values.items():
+                            if isinstance(value, (int, float)):
+                                bucket[resource] = bucket.get(resource, 0) + value
+
+            if name == "Entrepôt" and finished:
+                level_effect = buildings_database["Entrepôt"]["levels"][building.get_level() - 1]["effect"]
+                for resource, bonus in level_effect.get("storage", {}).items():
+                    effects.storage[resource] += bonus
+                    effects.warehouse_storage[resource] = effects.warehouse_storage.get(resource, 0) + bonus
+            elif name == "Windmill" and finished:
+                level_effect = _level_effect("Windmill", building.get_display_level())
+                effects.food_supply += level_effect.get("food_supply", 0)
+                effects.windmill_max_multiplier = max(
+                    effects.windmill_max_multiplier, level_effect.get("cereal_consumption_multiplier", 0)
+                )
+            elif name == "Thermes" and finished:
+                level_effect = _level_effect("Thermes", building.get_display_level())
+                effects.cleanliness_capacity += level_effect.get("cleanliness_capacity", 0)
+                effects.thermes_satisfaction_bonus = level_effect.get("satisfaction_bonus", 0)
+            elif name == "Hôtel de Ville":
+                level_effect = _level_effect("Hôtel de Ville", building.get_display_level())
+                effects.population_limit += level_effect.get("population_capacity", 0)
+                if not town_hall_seen:
+                    effects.population_growth = level_effect.get("population_growth", 0)
+                    town_hall_seen = True
+            elif name == "Atelier d'Architecte":
+                if finished:
+                    architect_effect = building.effect
+                elif status == "En construction" and hasattr(building, "previous_effect"):
+                    architect_effect = building.previous_effect
+                else:
+                    architect_effect = {}
+                effects.construction_cost_reduction += architect_effect.get("construction_cost_reduction", 0)
+                effects.construction_time_reduction += architect_effect.get("construction_time_reduction", 0)
+        return effects
@@ -12,9 +12,12 @@ from managers.population_manager import PopulationManager
 from managers.notification_manager import NotificationManager
 from managers.research_manager import ResearchManager
 from managers.city_manager import CityManager
-from managers.save_load_manager import SaveLoadManager
+from managers.save_load_manager import CITY_SETTLED_PROPERTIES, SaveLoadManager
 from managers.transport_manager import TransportManager
+from managers.event_bus import EventBus
 from models.building import Building
+from models.transport import Transport
+from models.world_layout import WorldLayout
 from data.resources_database import RESOURCES
 
 class GameData(EventDispatcher):
@@ -52,6 +55,12 @@ class GameData(EventDispatcher):
         self.position_x = 0
         self.position_y = 0
         self.islands = []
+        # Index de topologie du monde (voir rebuild_topology_index)
+        self._island_by_coords = {}
+        self._island_by_city_id = {}
+        self._island_position = {}
+        self._site_index = {}
+        self._site_location = {}
         self.resource_manager = ResourceManager(self)
         self.player_manager = PlayerManager(self)
         self.unlocked_buildings = []
@@ -65,11 +74,16 @@ class GameData(EventDispatcher):
         self.current_player_password = None
         self.population_manager = PopulationManager(self)
         self.header_bar = None
-        self.notification_manager = NotificationManager()
+        self.event_bus = EventBus()  # Côté serveur : événements poussés aux clients (/events)
+        self.notification_manager = NotificationManager(self.event_bus)
         self.research_manager = ResearchManager(self)
         self.city_manager = CityManager(self)
         self.save_load_manager = SaveLoadManager(self)
         self.transport_manager = TransportManager(self)
+        # Côté client : version et epoch serveur de l'état local (synchronisation différentielle)
+        self.state_version = None
+        self.state_epoch = None
+        self.state_scope = None  # Joueur de la vue limitée (/get_state_for_player), None pour le monde entier
 
         self.islands_json_path = islands_json_path
         self.city_json_path = city_json_path
@@ -87,8 +101,8 @@ class GameData(EventDispatcher):
 
     def load_islands_from_json(self, path):
         try:
-            with open(path, encoding="utf-8") as f:
-                islands_data = json.load(f)
+            layout = WorldLayout.get(path)
+            islands_data = layout.islands
             islands_list = []
             for island_dict in islands_data:
                 elements = []
@@ -116,21 +130,15 @@ class GameData(EventDispatcher):
                         city = self.city_manager.get_or_create_city_from_dict(city_dict, self, coords=tuple(coords))
                         elements.append(city)
                     else:
-                        # On ajoute l'élément tel quel (site de production, forum, etc.)
-                        elements.append(elem)
+                        # On ajoute une copie de l'élément (site de production, forum, etc.) : la disposition est partagée
+                        elements.append(copy.deepcopy(elem))
                 
                 # Traitement des sites de ressources : les convertir en éléments
                 resource_sites = island_dict.get("resource_sites", {})
                 island_name = island_dict.get("name")
                 
-                # Charger les positions des boutons pour cette île
-                try:
-                    with open("data/island_button_positions.json", encoding="utf-8") as f:
-                        button_positions = json.load(f)
-                    island_positions = button_positions.get(island_name, {})
-                except Exception as e:
-                    logging.warning(f"Impossible de charger les positions des boutons : {e}")
-                    island_positions = {}
+                # Positions des boutons pour cette île (lues une seule fois par WorldLayout)
+                island_positions = layout.get_button_positions(island_name)
                 
                 for site_name, site_data in resource_sites.items():
                     # Obtenir les coordonnées depuis le fichier de positions
@@ -141,7 +149,7 @@ class GameData(EventDispatcher):
                         "type": site_name,
                         "name": site_name,
                         "level": site_data.get("level", 1),
-                        "donations": site_data.get("donations", 0),
+                        "donations": copy.deepcopy(site_data.get("donations", 0)),
                         "city_coords": coords
                     }
                     elements.append(site_element)
@@ -163,6 +171,7 @@ class GameData(EventDispatcher):
         except Exception as e:
             logging.error(f"Erreur lors du chargement des îles : {e}")
             self.islands = []
+        self.rebuild_topology_index()
 
     def unlock_building(self, building_name: str):
         if building_name not in self.unlocked_buildings:
@@ -184,11 +193,59 @@ class GameData(EventDispatcher):
             self.player_manager.players[self.current_player_id] = Player(self.current_player_id, username, password)
         return self.player_manager.get_player(self.current_player_id) if self.current_player_id else None
 
+    # --- Index de topologie : coordonnées -> île, ville -> île, (île, type de site) -> site, site -> (île, position) ---
+    @staticmethod
+    def _coords_key(coords):
+        try:
+            return tuple(coords) if coords is not None else None
+        except TypeError:
+            return None
+
+    def rebuild_topology_index(self):
+        """Reconstruit les index de topologie à partir de self.islands (après chargement ou synchronisation)."""
+        self._island_by_coords = {}
+        self._island_by_city_id = {}
+        self._island_position = {}
+        self._site_index = {}
+        self._site_location = {}
+        for position, island in enumerate(self.islands):
+            key = self._coords_key(island.get("coords"))
+            self._island_by_coords.setdefault(key, island)
+            self._island_position.setdefault(key, position)
+            for elem_position, elem in enumerate(island.get("elements", [])):
+                self.index_island_element(island, elem, elem_position)
+
+    def index_island_element(self, island, elem, position=None):
+        """Indexe un élément (ville ou site de ressource) ajouté à une île (position : indice dans ses éléments)."""
+        key = self._coords_key(island.get("coords"))
+        if isinstance(elem, City):
+            if getattr(elem, "id", None):
+                self._island_by_city_id[elem.id] = island
+        elif isinstance(elem, dict) and "type" in elem:
+            self._site_index.setdefault((key, elem["type"]), elem)
+            if position is None:
+                position = len(island["elements"]) - 1
+            # La clé id(site) n'est valable que tant que le site est vivant : l'entrée garde le site et est vérifiée
+            self._site_location[id(elem)] = (elem, island, position)
+
     def get_island_by_coords(self, coords):
-        for island in self.islands:
-            if island["coords"] == coords:
-                return island
-        return None
+        return self._island_by_coords.get(self._coords_key(coords))
+
+    def get_island_for_city(self, city_id):
+        return self._island_by_city_id.get(city_id)
+
+    def get_first_island_of_player(self, player_id):
+        """Première île (dans l'ordre de self.islands) où le joueur possède une ville."""
+        islands = [self.get_island_for_city(city.id) for city in self.city_manager.get_cities_for_player(player_id)]
+        islands = [island for island in islands if island is not None]
+        if not islands:
+            return None
+        return min(islands, key=lambda island: self._island_position.get(self._coords_key(island.get("coords")), 0))
+
+    def get_resource_site(self, island, site_type):
+        if island is None:
+            return None
+        return self._site_index.get((self._coords_key(island.get("coords")), site_type))
 
     def to_dict(self) -> dict:
         active_city = self.get_active_city()
@@ -215,6 +272,7 @@ class GameData(EventDispatcher):
             "players": self.player_manager.to_dict(),
             "active_city": active_city.id if active_city else None,
             "transports": self.transport_manager.to_dict(),
+            "next_transport_id": self.transport_manager.next_id,
         }
 
     def from_dict(self, data: dict):
@@ -228,17 +286,9 @@ class GameData(EventDispatcher):
         islands_list = []
         cities_data = []
 
-        # Charger la config statique pour retrouver les positions des villes
-        with open("data/islands.json", encoding="utf-8") as f:
-            static_islands = json.load(f)
-        city_positions = {}
-        for island in static_islands:
-            iname = island.get("name")
-            for elem in island.get("elements", []):
-                if elem.get("type") == "city":
-                    cname = elem.get("name")
-                    coords = elem.get("city_coords", elem.get("coords", (0, 0)))
-                    city_positions[(iname, cname)] = coords
+        # Disposition statique (positions des villes et des sites), lue une seule fois par processus
+        layout = WorldLayout.get()
+        city_positions = layout.city_positions
 
         # Désérialisation des îles et villes
         for island_data in data.get("islands", []):
@@ -255,14 +305,7 @@ class GameData(EventDispatcher):
                     elements.append(city)
                     cities_data.append(city_dict)
                 else:
-                    typ = elem.get("type")
-                    coords = None
-                    static_island = next((e for e in static_islands if e.get("name") == iname), None)
-                    if static_island:
-                        for static_elem in static_island.get("elements", []):
-                            if static_elem.get("type") == typ:
-                                coords = static_elem.get("city_coords") or static_elem.get("coords")
-                                break
+                    coords = layout.get_site_coords(iname, elem.get("type"))
                     if coords is not None:
                         elem = dict(elem)
                         elem["city_coords"] = list(coords)
@@ -304,12 +347,251 @@ class GameData(EventDispatcher):
                     coords = city_positions.get((iname, cname))
                     if coords is not None:
                         elem.city_coords = list(coords)
+        self.rebuild_topology_index()
 
         # Désérialisation des joueurs et de la ville active
         self.player_manager.from_dict(data.get("players", {}), self)
         ac_id = data.get("active_city")
         self.city_manager.set_active_city(self.city_manager.get_city_by_id(ac_id) if ac_id else None)
-        self.transport_manager.from_dict(data.get("transports", []), self)
+        self.transport_manager.from_dict(data.get("transports", []), self, next_id=data.get("next_transport_id"))
+
+    # --- Synchronisation différentielle ---
+    def locate_site(self, site):
+        """
+        Retourne {island_coords, position, site} pour un site d'île (None s'il n'est plus dans le monde).
+        Le site est retrouvé par l'index de topologie ; si les éléments de l'île ont bougé depuis, l'index est reconstruit.
+        """
+        location = self._site_location.get(id(site))
+        if not self._location_is_current(location, site):
+            self.rebuild_topology_index()
+            location = self._site_location.get(id(site))
+            if not self._location_is_current(location, site):
+                return None
+        _, island, position = location
+        return {"island_coords": island.get("coords"), "position": position,
+                "site": {k: v for k, v in site.items() if k not in ("coords", "city_coords")}}
+
+    @staticmethod
+    def _location_is_current(location, site) -> bool:
+        if location is None or location[0] is not site:
+            return False
+        elements = location[1].get("elements", [])
+        return location[2] < len(elements) and elements[location[2]] is site
+
+    def apply_city_dict(self, city_dict):
+        """Met à jour une ville existante depuis son dict ; retourne la ville (None si elle est inconnue)."""
+        if self.city_manager._city_instance_cache.get(city_dict.get("id")) is None:
+            return None
+        return self.city_manager.get_or_create_city_from_dict(city_dict, self)
+
+    def apply_player_dict(self, player_id, player_dict):
+        """Met à jour le joueur en place (voir PlayerManager.apply_player_dict) ; retourne le joueur."""
+        return self.player_manager.apply_player_dict(player_id, player_dict)
+
+    def apply_site_dict(self, located):
+        """Remplace le contenu d'un site localisé par locate_site (coordonnées d'affichage conservées)."""
+        if located is None:
+            return
+        island = self.get_island_by_coords(located["island_coords"])
+        elements = island["elements"] if island else []
+        position = located["position"]
+        if position < len(elements) and isinstance(elements[position], dict):
+            site = elements[position]
+            for key in [k for k in site if k not in located["site"] and k not in ("coords", "city_coords")]:
+                del site[key]
+            site.update(located["site"])
+
+    # --- Vue limitée à un joueur (/get_state_for_player) ---
+    @staticmethod
+    def city_summary(city) -> dict:
+        """Ville d'un autre joueur réduite à ce qu'affichent WorldView et IslandView."""
+        return {
+            "type": "city",
+            "id": city.id,
+            "name": city.name,
+            "owner": city.owner if city.owner is not None else '',
+            "island_coords": city.island_coords,
+            "city_type": city.city_type,
+            "base_resource": city.base_resource,
+            "controlable": city.controlable,
+        }
+
+    @staticmethod
+    def site_summary(site) -> dict:
+        """Site d'une île où le joueur n'a pas de ville : type et niveau, sans les dons."""
+        return {k: v for k, v in site.items() if k not in ("coords", "city_coords", "donations", "donations_history")}
+
+    @staticmethod
+    def player_summary(player) -> dict:
+        """Autre joueur : identité et classement seulement (jamais le mot de passe)."""
+        return {
+            "id_player": player.id_player,
+            "username": player.username,
+            "password": "",
+            "points": player.points,
+            "military_points": player.military_points,
+        }
+
+    def _player_islands(self, player_id) -> set:
+        return {self._coords_key(city.island_coords) for city in self.city_manager.get_cities_for_player(player_id)}
+
+    def to_player_dict(self, player_id) -> dict:
+        """
+        État vu par un joueur, au format de to_dict : détail complet de ses villes, de son compte et de ses
+        transports ; résumés pour les autres villes, joueurs et sites (voir city_summary, site_summary).
+        """
+        own_islands = self._player_islands(player_id)
+        active_city = self.get_active_city()
+        islands = []
+        for island_data in self.islands:
+            detailed = self._coords_key(island_data["coords"]) in own_islands
+            elements = []
+            for elem in island_data["elements"]:
+                if isinstance(elem, City):
+                    elements.append(elem.to_dict() if elem.owner == player_id else self.city_summary(elem))
+                elif detailed:
+                    elements.append({k: v for k, v in elem.items() if k not in ("coords", "city_coords")})
+                else:
+                    elements.append(self.site_summary(elem))
+            islands.append({
+                "name": island_data["name"],
+                "coords": island_data["coords"],
+                "background": island_data.get("background"),
+                "base_resource": island_data.get("base_resource"),
+                "advanced_resource": island_data.get("advanced_resource"),
+                "elements": elements,
+                "city_layout": island_data.get("city_layout"),
+            })
+        return {
+            "score": self.score,
+            "position_x": self.position_x,
+            "position_y": self.position_y,
+            "islands": islands,
+            "players": {
+                pid: player.to_dict() if pid == player_id else self.player_summary(player)
+                for pid, player in self.player_manager.players.items()
+            },
+            "active_city": active_city.id if active_city is not None and active_city.owner == player_id else None,
+            "transports": [t.to_dict() for t in self.transport_manager.get_transports_for_player(player_id)],
+            "next_transport_id": self.transport_manager.next_id,
+            "scope": player_id,
+        }
+
+    def to_delta(self, since: int, player_id=None) -> dict:
+        """
+        Différentiel de l'état depuis la version since (voir WorldVersion) : en-tête, villes, joueurs,
+        sites et transports modifiés, identifiants retirés. Appliqué côté client par apply_state.
+        Avec player_id, le différentiel suit la vue limitée de to_player_dict.
+        """
+        versions = self.save_load_manager.versions
+        version, changed, removed = versions.changes_since(since)
+        if player_id is not None:
+            own_islands = self._player_islands(player_id)
+            own_transports = {t.id for t in self.transport_manager.get_transports_for_player(player_id)}
+        cities, settled, players, sites, transports = {}, {}, {}, [], []
+        for key, entity in changed:
+            if isinstance(entity, City):
+                own = player_id is None or entity.owner == player_id
+                if isinstance(key, tuple) and key[0] == "settled":
+                    if own:
+                        settled[entity.id] = {prop: getattr(entity, prop) for prop in CITY_SETTLED_PROPERTIES}
+                else:
+                    cities[entity.id] = entity.to_dict() if own else self.city_summary(entity)
+            elif isinstance(entity, Player):
+                if self.player_manager.players.get(entity.id_player) is entity:
+                    own = player_id is None or entity.id_player == player_id
+                    players[entity.id_player] = entity.to_dict() if own else self.player_summary(entity)
+            elif isinstance(entity, Transport):
+                if player_id is None or entity.id in own_transports:
+                    transports.append(entity.to_dict())
+            elif isinstance(entity, dict):
+                located = self.locate_site(entity)
+                if located is not None:
+                    if player_id is not None and self._coords_key(located["island_coords"]) not in own_islands:
+                        located["site"] = self.site_summary(located["site"])
+                    sites.append(located)
+        active_city = self.get_active_city()
+        if player_id is not None and active_city is not None and active_city.owner != player_id:
+            active_city = None
+        return {
+            "full": False,
+            "scope": player_id,
+            "since": since,
+            "version": version,
+            "epoch": versions.epoch,
+            "score": self.score,
+            "position_x": self.position_x,
+            "position_y": self.position_y,
+            "active_city": active_city.id if active_city else None,
+            "next_transport_id": self.transport_manager.next_id,
+            "cities": list(cities.values()),
+            "settled": {k: v for k, v in settled.items() if k not in cities},  # Villes dont seule la production a changé
+            "players": players,
+            "sites": sites,
+            "transports": transports,
+            "removed": removed,
+        }
+
+    def apply_state(self, state: dict) -> bool:
+        """
+        Côté client : applique une réponse de /get_state, complète (from_dict) ou différentielle.
+        Retourne False si le différentiel n'a pas pu être appliqué ; la version locale est alors oubliée
+        et la synchronisation suivante redemande l'état complet.
+        """
+        if not state:
+            return False
+        if state.get("not_modified"):
+            return state.get("version") == self.state_version  # 304 : l'état local est à jour
+        if state.get("full", True):
+            self.from_dict(state)
+        else:
+            since = state.get("since")
+            if (state.get("epoch") != self.state_epoch or state.get("scope") != self.state_scope
+                    or self.state_version is None or since > self.state_version):
+                self.state_version = None
+                return False
+            if state.get("version", 0) <= self.state_version:
+                return True  # Réponse en retard sur l'état local : ignorée
+            if not self.apply_delta(state):
+                self.state_version = None
+                return False
+        self.state_version = state.get("version")
+        self.state_epoch = state.get("epoch")
+        self.state_scope = state.get("scope")
+        return True
+
+    def apply_delta(self, delta: dict) -> bool:
+        self.score = delta.get("score", self.score)
+        self.position_x = delta.get("position_x", self.position_x)
+        self.position_y = delta.get("position_y", self.position_y)
+        for city_dict in delta.get("cities", []):
+            if self.apply_city_dict(city_dict) is None:
+                logging.error(f"apply_delta: ville inconnue {city_dict.get('id')}")
+                return False
+        for city_id, values in delta.get("settled", {}).items():
+            city = self.city_manager._city_instance_cache.get(city_id)
+            if city is None:
+                logging.error(f"apply_delta: ville inconnue {city_id}")
+                return False
+            for prop, value in values.items():
+                setattr(city, prop, value)
+        for player_id, player_dict in delta.get("players", {}).items():
+            self.apply_player_dict(player_id, player_dict)
+        for located in delta.get("sites", []):
+            self.apply_site_dict(located)
+        removed = delta.get("removed", {})
+        for player_id in removed.get("players", []):
+            self.player_manager.players.pop(player_id, None)
+        if delta.get("transports") or removed.get("transports"):
+            transports = {t["id"]: t for t in self.transport_manager.to_dict()}
+            for transport_id in removed.get("transports", []):
+                transports.pop(transport_id, None)
+            for transport_dict in delta.get("transports", []):
+                transports[transport_dict["id"]] = transport_dict
+            self.transport_manager.from_dict(list(transports.values()), self, next_id=delta.get("next_transport_id"))
+        ac_id = delta.get("active_city")
+        self.city_manager.set_active_city(self.city_manager.get_city_by_id(ac_id) if ac_id else None)
+        return True
 
     def load_city_layouts_from_json(self, path):
         try:
@@ -55,20 +55,22 @@ class Player(EventDispatcher):
         if not isinstance(data, dict):
             raise TypeError("Expected a dictionary for player data")
         
-        id_player = data.get("id_player")
-        username = data.get("username")
-        password = data.get("password")
-        player = cls(id_player, username, password)
-        
-        player.unlocked_research = data.get("unlocked_research", [])
-        player.points = data.get("points", 0)
-        player.military_points = data.get("military_points", 0)
-        player.ships = data.get("ships", 1)
-        player.ships_available = data.get("ships_available", player.ships)
-        player.research_points = data.get("research_points", 0)
-        player.diamonds = data.get("diamonds", STARTING_DIAMONDS)
+        player = cls(data.get("id_player"), data.get("username"), data.get("password"))
+        player.from_dict_instance(data)
         return player
 
+    def from_dict_instance(self, data: dict):
+        """Met à jour ce joueur depuis son dictionnaire (les widgets liés à ses propriétés restent valides)."""
+        self.username = data.get("username") or self.username
+        self.password = data.get("password") or self.password
+        self.unlocked_research = data.get("unlocked_research", [])
+        self.points = data.get("points", 0)
+        self.military_points = data.get("military_points", 0)
+        self.ships = data.get("ships", 1)
+        self.ships_available = data.get("ships_available", self.ships)
+        self.research_points = data.get("research_points", 0)
+        self.diamonds = data.get("diamonds", STARTING_DIAMONDS)
+
     def get_points(self) -> int:
         """Retourne le nombre de points du joueur."""
         return self.points
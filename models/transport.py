@@ -59,6 +59,15 @@ class Transport(EventDispatcher):
         self.etat = etat.value if isinstance(etat, EtatTransport) else str(etat)
         self.id = id_
         self.event = None
+        # Échéance absolue de la phase courante, tenue par le TransportManager qui la planifie
+        self.deadline = None
+        self.scheduler = None
+
+    def get_temps_restant(self) -> float:
+        """Temps restant dans la phase courante, calculé à la demande depuis l'échéance planifiée."""
+        if self.deadline is not None and self.scheduler is not None:
+            return max(0, self.deadline - self.scheduler.clock)
+        return self.temps_restant
 
     def to_dict(self) -> Dict[str, Any]:
         """Sérialise l'objet pour l'API ou la sauvegarde."""
@@ -72,7 +81,7 @@ class Transport(EventDispatcher):
             "duree_chargement": self.duree_chargement,
             "duree_transport": self.duree_transport,
             "etat": self.etat,
-            "temps_restant": self.temps_restant,
+            "temps_restant": self.get_temps_restant(),
             "id": self.id,
         }
 
@@ -81,7 +90,7 @@ class Transport(EventDispatcher):
         return (
             f"{getattr(self.ville_source, 'name', self.ville_source)} → "
             f"{getattr(self.ville_dest, 'name', self.ville_dest)} : "
-            f"{self.ressources} ({self.etat}, {round(max(0, self.temps_restant))}s, {self.nb_bateaux} ships)"
+            f"{self.ressources} ({self.etat}, {round(max(0, self.get_temps_restant()))}s, {self.nb_bateaux} ships)"
         )
 
     @classmethod
@@ -0,0 +1,79 @@
+"""
+WorldLayout : disposition statique du monde (data/islands.json, data/island_button_positions.json).
+
+Les fichiers sont lus et indexés une seule fois par processus, puis partagés par le serveur et le client :
+- island_by_name : île statique par nom ;
+- city_positions : (île, ville) -> coordonnées de la ville sur la carte de l'île ;
+- site_coords : (île, type d'élément) -> coordonnées du premier élément statique de ce type ;
+- button_positions : île -> {site: coordonnées du bouton}.
+Les données statiques ne doivent pas être modifiées : copier un élément avant de l'insérer dans l'état du jeu.
+"""
+
+import json
+import logging
+import threading
+
+ISLANDS_PATH = "data/islands.json"
+BUTTON_POSITIONS_PATH = "data/island_button_positions.json"
+
+
+class WorldLayout:
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, islands, button_positions):
+        self.islands = islands
+        self.button_positions = button_positions
+        self.island_by_name = {}
+        self.city_positions = {}
+        self.site_coords = {}
+        for island in islands:
+            iname = island.get("name")
+            self.island_by_name.setdefault(iname, island)
+            for elem in island.get("elements", []):
+                typ = elem.get("type")
+                if typ == "city":
+                    coords = elem.get("city_coords", elem.get("coords", (0, 0)))
+                    self.city_positions[(iname, elem.get("name"))] = coords
+                else:
+                    coords = elem.get("city_coords") or elem.get("coords")
+                    self.site_coords.setdefault((iname, typ), coords)
+
+    @classmethod
+    def get(cls, islands_path: str = ISLANDS_PATH, button_positions_path: str = BUTTON_POSITIONS_PATH):
+        """Retourne la disposition pour ces fichiers, lue au premier appel puis servie depuis le cache."""
+        key = (islands_path, button_positions_path)
+        layout = cls._cache.get(key)
+        if layout is None:
+            with cls._cache_lock:
+                layout = cls._cache.get(key)
+                if layout is None:
+                    layout = cls._cache[key] = cls._load(islands_path, button_positions_path)
+        return layout
+
+    @classmethod
+    def clear_cache(cls):
+        """Oublie les dispositions lues (ex. après modification des fichiers de données)."""
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    @classmethod
+    def _load(cls, islands_path, button_positions_path):
+        with open(islands_path, encoding="utf-8") as f:
+            islands = json.load(f)
+        try:
+            with open(button_positions_path, encoding="utf-8") as f:
+                button_positions = json.load(f)
+        except Exception as e:
+            logging.warning(f"Impossible de charger les positions des boutons : {e}")
+            button_positions = {}
+        return cls(islands, button_positions)
+
+    def get_city_position(self, island_name, city_name, default=None):
+        return self.city_positions.get((island_name, city_name), default)
+
+    def get_site_coords(self, island_name, element_type):
+        return self.site_coords.get((island_name, element_type))
+
+    def get_button_positions(self, island_name) -> dict:
+        return self.button_positions.get(island_name, {})
@@ -0,0 +1,134 @@
+"""
+Canal d'événements poussés par le serveur (GET /events, Server-Sent Events), côté client.
+
+- EventStream : une connexion longue lue dans un thread d'arrière-plan, reconnectée automatiquement ;
+  chaque événement (type, données JSON décodées) est remis à on_event depuis ce thread.
+  Si le serveur refuse le canal (503, trop de canaux ouverts), la reconnexion attend son Retry-After.
+- EventListener : abonnement d'un widget à un type d'événement, avec repli sur un abonnement au RefreshHub
+  (même sujet) tant que le canal n'est pas connecté. Même interface cancel() qu'un événement Clock.
+"""
+
+import json
+import logging
+import threading
+
+import requests
+
+from network.refresh_hub import RefreshHub
+
+
+class EventStream:
+    def __init__(self, url, params_provider, on_event, read_timeout: float = 40.0, reconnect_delay: float = 3.0,
+                 session=None):
+        self.url = url
+        self.session = session if session is not None else requests.Session()
+        self.params_provider = params_provider
+        self.on_event = on_event
+        self.read_timeout = read_timeout
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self.logger = logging.getLogger("EventStream")
+        self._stop = threading.Event()
+        self._response = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="EventStream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.reconnect()
+
+    def reconnect(self):
+        """Ferme la connexion en cours ; le thread se reconnecte (avec les paramètres du moment) sauf après stop."""
+        response = self._response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            delay = self.reconnect_delay
+            try:
+                with self.session.get(self.url, params=self.params_provider(), stream=True,
+                                  timeout=(5, self.read_timeout)) as response:
+                    self._response = response
+                    if response.status_code == 503:
+                        # Serveur saturé en canaux : on reste sur l'interrogation périodique jusqu'au prochain essai
+                        delay = self._retry_after(response, delay)
+                        self.logger.info(f"events: canal refusé, nouvel essai dans {delay:.0f} s")
+                    elif response.status_code != 200:
+                        self.logger.warning(f"events: HTTP {response.status_code}")
+                    else:
+                        self.connected = True
+                        self._read(response)
+            except Exception as e:
+                if not self._stop.is_set():
+                    self.logger.warning(f"events: connexion interrompue ({e})")
+            finally:
+                self._response = None
+                self.connected = False
+            self._stop.wait(delay)
+
+    @staticmethod
+    def _retry_after(response, default: float) -> float:
+        try:
+            return max(default, float(response.headers.get("Retry-After", default)))
+        except ValueError:
+            return default
+
+    def _read(self, response):
+        event, data = "message", []
+        for line in response.iter_lines(decode_unicode=True):
+            if self._stop.is_set():
+                return
+            if not line:
+                if data:
+                    try:
+                        self.on_event(event, json.loads("\n".join(data)))
+                    except Exception as e:
+                        self.logger.error(f"événement {event} ignoré : {e}")
+                event, data = "message", []
+            elif line.startswith(":"):
+                continue  # Maintien de connexion
+            elif line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].lstrip())
+            elif line.startswith("retry:"):
+                try:
+                    self.reconnect_delay = int(line[6:].strip()) / 1000
+                except ValueError:
+                    pass
+
+
+class EventListener:
+    def __init__(self, network_manager, event, callback, poll_interval=None, widget=None):
+        self.network_manager = network_manager
+        self.event = event
+        self.callback = callback
+        if network_manager is not None:
+            network_manager.subscribe(event, self._on_event)
+        # Repli : widget affiché et canal déconnecté uniquement
+        self._poll = RefreshHub.shared().subscribe(
+            event, callback, poll_interval, widget=widget, condition=self._polling
+        ) if poll_interval else None
+
+    def _on_event(self, data):
+        self.callback(data)
+
+    def _polling(self) -> bool:
+        return self.network_manager is None or not self.network_manager.event_stream_connected
+
+    def cancel(self):
+        if self.network_manager is not None:
+            self.network_manager.unsubscribe(self.event, self._on_event)
+        if self._poll is not None:
+            self._poll.cancel()
+            self._poll = None
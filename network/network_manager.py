@@ -1,5 +1,17 @@
 import requests
 import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.config import EVENT_KEEPALIVE, HTTP_TIMEOUT, HTTP_RETRIES, HTTP_RETRY_BACKOFF, HTTP_POOL_SIZE, HTTP_GZIP, HTTP_WORKERS
+from config.config import STATE_POLL_INTERVAL
+from network.event_stream import EventListener, EventStream
+from network.refresh_hub import RefreshHub
 
 class NetworkManager:
     """
@@ -13,13 +25,140 @@ class NetworkManager:
         self.server_url = server_url
         print(f"NetworkManager initialisé avec server_url = {self.server_url}")  # Ajout debug
         self.logger = logging.getLogger("NetworkManager")
+        self.session = self._make_session()
+        self._executor = ThreadPoolExecutor(max_workers=HTTP_WORKERS, thread_name_prefix="NetworkManager")
+        self._in_flight = {}  # clé -> (future, rappels) des requêtes non bloquantes en cours
+        self._in_flight_lock = threading.RLock()
+        self._state_etags = {}  # (endpoint, joueur) -> (ETag, version) de la dernière réponse d'état
+        self._listeners = defaultdict(list)  # événement poussé -> rappels (thread principal Kivy)
+        self.event_stream = None
+
+    @staticmethod
+    def _make_session():
+        """
+        Session partagée par toutes les requêtes du client : connexions persistantes (keep-alive) en pool,
+        nouvelles tentatives avec attente exponentielle pour les seules requêtes idempotentes.
+        """
+        session = requests.Session()
+        retry = Retry(
+            total=HTTP_RETRIES, backoff_factor=HTTP_RETRY_BACKOFF,
+            status_forcelist=(502, 503, 504), allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Accept-Encoding"] = "gzip, deflate" if HTTP_GZIP else "identity"
+        return session
+
+    def request(self, method, endpoint, **kwargs):
+        """Requête HTTP vers le serveur par la session partagée (délai HTTP_TIMEOUT par défaut) ; lève en cas d'échec réseau."""
+        kwargs.setdefault("timeout", HTTP_TIMEOUT)
+        return self.session.request(method, f"{self.server_url}{endpoint}", **kwargs)
+
+    def close(self):
+        """Ferme le canal d'événements, abandonne les requêtes non bloquantes en attente et ferme les connexions du pool."""
+        self.stop_event_stream()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    # === REQUÊTES NON BLOQUANTES ===
+    def submit(self, fn, *args, callback=None, key=None):
+        """
+        Exécute fn(*args) (une requête bloquante, en général une méthode de ce manager) sur le pool de threads
+        et retourne le Future.
+        callback(résultat) est appelé sur le thread principal Kivy (None si fn a levé une exception).
+        Avec key, tant qu'une requête de même clé est en cours, elle est réutilisée au lieu d'en lancer
+        une nouvelle ; callback lui est ajouté s'il n'y est pas déjà (pas d'empilement d'un tick à l'autre).
+        """
+        with self._in_flight_lock:
+            entry = self._in_flight.get(key) if key is not None else None
+            created = entry is None
+            if created:
+                entry = (self._executor.submit(fn, *args), [])
+                if key is not None:
+                    self._in_flight[key] = entry
+            future, callbacks = entry
+            if callback is not None and callback not in callbacks:
+                callbacks.append(callback)
+            if created:
+                future.add_done_callback(lambda f: self._request_done(key, entry))
+        return future
+
+    def _request_done(self, key, entry):
+        with self._in_flight_lock:
+            if key is not None and self._in_flight.get(key) is entry:
+                del self._in_flight[key]
+            future, callbacks = entry[0], list(entry[1])
+        if callbacks and not future.cancelled():
+            Clock.schedule_once(lambda dt: self._deliver(future, callbacks), 0)
+
+    def _deliver(self, future, callbacks):
+        try:
+            result = future.result()
+        except Exception as e:
+            self.logger.error(f"requête non bloquante échouée : {e}")
+            result = None
+        for callback in callbacks:
+            try:
+                callback(result)
+            except Exception as e:
+                self.logger.error(f"rappel {callback} : {e}")
+
+    def fetch_state_async(self, game_data, callback, full=False):
+        """fetch_state sans bloquer : callback(état ou None) sur le thread principal ; une seule requête d'état en cours."""
+        return self.submit(self.fetch_state, game_data, full, callback=callback,
+                           key=("state", game_data.current_player_id, full))
+
+    def get_transports_for_player_async(self, joueur_id, callback):
+        """get_transports_for_player sans bloquer : callback(réponse) sur le thread principal."""
+        return self.submit(self.get_transports_for_player, joueur_id, callback=callback, key=("transports", joueur_id))
+
+    def get_notifications_async(self, joueur_id, callback):
+        """get_notifications sans bloquer : callback(notifications ou None) sur le thread principal."""
+        return self.submit(self.get_notifications, joueur_id, callback=callback, key=("notifications", joueur_id))
+
+    def get_state(self, since=None, epoch=None):
+        """
+        Récupère l'état du serveur (GET /get_state). Avec since/epoch (game_data.state_version/state_epoch),
+        le serveur peut ne renvoyer que le différentiel depuis cette version (voir GameData.apply_state).
+        """
+        return self._get_state("/get_state", {"since": since, "epoch": epoch})
+
+    def get_state_for_player(self, player_id, since=None, epoch=None):
+        """État vu par le joueur (GET /get_state_for_player) : ses villes en détail, le reste du monde résumé."""
+        return self._get_state("/get_state_for_player", {"player_id": player_id, "since": since, "epoch": epoch})
 
-    def get_state(self):
-        """Récupère l'état complet du serveur (GET /get_state)."""
+    def fetch_state(self, game_data, full=False):
+        """
+        Récupère l'état à appliquer à game_data (GameData.apply_state) : vue du joueur courant s'il est connu,
+        sinon le monde entier ; différentiel depuis la version locale sauf si full.
+        """
+        player_id = game_data.current_player_id
+        since = epoch = None
+        if not full and game_data.state_scope == player_id:
+            since, epoch = game_data.state_version, game_data.state_epoch
+        if player_id:
+            return self.get_state_for_player(player_id, since, epoch)
+        return self.get_state(since, epoch)
+
+    def _get_state(self, endpoint, params):
+        """
+        GET d'état avec If-None-Match quand la version demandée est celle de la dernière réponse :
+        un monde inchangé coûte un 304 sans corps, rendu comme {"not_modified": True} (voir GameData.apply_state).
+        """
+        key = (endpoint, params.get("player_id"))
+        etag, version = self._state_etags.get(key, (None, None))
+        headers = {"If-None-Match": etag} if etag and params.get("since") is not None and params["since"] == version else None
         try:
-            r = requests.get(f"{self.server_url}/get_state")
+            r = self.request("GET", endpoint, params=params, headers=headers)
+            if r.status_code == 304:
+                return {"not_modified": True, "version": version}
             if r.status_code == 200:
-                return r.json()
+                state = r.json()
+                if r.headers.get("ETag"):
+                    self._state_etags[key] = (r.headers["ETag"], state.get("version"))
+                return state
             else:
                 self.logger.warning(f"get_state: HTTP {r.status_code} - {r.text}")
             return None
@@ -27,13 +166,95 @@ class NetworkManager:
             self.logger.error(f"get_state failed: {e}")
             return None
 
+    def batch(self, actions, game_data=None, stop_on_error=True):
+        """
+        Envoie plusieurs actions en un seul aller-retour (POST /batch). actions : [(endpoint, payload), ...].
+        Avec game_data, l'état renvoyé (vue du joueur courant, différentiel si possible) lui est appliqué.
+        Retourne la réponse du serveur : {"success", "results": [{"endpoint", "status", "response"}], "state"}.
+        """
+        payload = {
+            "actions": [{"endpoint": endpoint, "payload": action_payload} for endpoint, action_payload in actions],
+            "stop_on_error": stop_on_error,
+        }
+        if game_data is not None:
+            payload["player_id"] = game_data.current_player_id
+            if game_data.state_scope == game_data.current_player_id:
+                payload.update(since=game_data.state_version, epoch=game_data.state_epoch)
+        resp = self._post("/batch", payload)
+        if game_data is not None and resp.get("state") and not game_data.apply_state(resp["state"]):
+            self.sync_game_data(game_data)
+        return resp
+
     def sync_game_data(self, game_data):
-        """Récupère l'état complet du serveur et met à jour game_data."""
-        state = self.get_state()
-        if state:
-            game_data.from_dict(state)
-        else:
-            self.logger.error("sync_game_data: Impossible de récupérer l'état serveur")
+        """
+        Met à jour game_data depuis le serveur (différentiel si possible, sinon état complet).
+        Retourne True si game_data a été synchronisé.
+        """
+        state = self.fetch_state(game_data)
+        if state and not game_data.apply_state(state):
+            state = self.fetch_state(game_data, full=True)  # Différentiel inapplicable : état complet
+            if state and game_data.apply_state(state):
+                return True
+        elif state:
+            return True
+        self.logger.error("sync_game_data: Impossible de récupérer l'état serveur")
+        return False
+
+    # === ÉVÉNEMENTS POUSSÉS (GET /events) ===
+    def start_event_stream(self, game_data):
+        """
+        Ouvre le canal d'événements du joueur courant. Les différentiels d'état reçus ("state") sont appliqués
+        à game_data, puis chaque événement est transmis aux abonnés (subscribe) sur le thread principal.
+        """
+        self.stop_event_stream()
+        self.game_data = game_data
+
+        def params():
+            since = game_data.state_version if game_data.state_scope == game_data.current_player_id else None
+            return {"player_id": game_data.current_player_id, "since": since, "epoch": game_data.state_epoch}
+
+        self.event_stream = EventStream(
+            f"{self.server_url}/events", params,
+            lambda event, data: Clock.schedule_once(lambda dt: self._dispatch(event, data), 0),
+            read_timeout=EVENT_KEEPALIVE * 2 + 10, session=self.session,
+        )
+        self.event_stream.start()
+
+    def stop_event_stream(self):
+        if self.event_stream is not None:
+            self.event_stream.stop()
+            self.event_stream = None
+
+    @property
+    def event_stream_connected(self) -> bool:
+        return self.event_stream is not None and self.event_stream.connected
+
+    def subscribe(self, event, callback):
+        """callback(data) à chaque événement poussé de ce type ("state", "notification", "transport", ...)."""
+        self._listeners[event].append(callback)
+
+    def unsubscribe(self, event, callback):
+        if callback in self._listeners.get(event, ()):
+            self._listeners[event].remove(callback)
+
+    def listen(self, event, callback, poll_interval=None, widget=None) -> EventListener:
+        """
+        Abonnement avec repli sur un appel toutes les poll_interval secondes (RefreshHub) tant que le canal
+        est déconnecté et, si widget est donné, qu'il est affiché.
+        """
+        return EventListener(self, event, callback, poll_interval, widget=widget)
+
+    def _dispatch(self, event, data):
+        if event == "state" and not self.game_data.apply_state(data):
+            # Différentiel inapplicable : la reconnexion (sans version) renvoie l'état complet
+            if self.event_stream is not None:
+                self.event_stream.reconnect()
+            return
+        for callback in list(self._listeners.get(event, ())):
+            try:
+                callback(data)
+            except Exception as e:
+                self.logger.error(f"événement {event}: {e}")
 
     def build_batiment(self, username=None, player_id=None, city_id=None, building_name=None, slot_index=0):
         """Envoie une requête pour construire ou améliorer un bâtiment."""
@@ -139,6 +360,19 @@ class NetworkManager:
         """Retourne la liste à jour des transports du joueur (POST /get_transports_for_player)."""
         return self._post("/get_transports_for_player", {"joueur_id": joueur_id})
 
+    def get_notifications(self, joueur_id):
+        """Retourne les notifications du joueur (POST /get_notifications), liste vide en cas d'échec."""
+        resp = self._post("/get_notifications", {"joueur_id": joueur_id})
+        return resp.get("notifications", []) if resp.get("success") else []
+
+    def mark_notifications_read(self, joueur_id):
+        """Marque toutes les notifications du joueur comme lues (POST /mark_notifications_read)."""
+        return self._post("/mark_notifications_read", {"joueur_id": joueur_id})
+
+    def cure_plague(self, city_id):
+        """Soigne la peste d'une ville (POST /cure_plague)."""
+        return self._post("/cure_plague", {"city_id": city_id})
+
     def buy_ship(self, joueur_id, ville_id):
         """Achète un bateau pour une ville donnée (POST /buy_ship)."""
         payload = {"joueur_id": joueur_id, "ville_id": ville_id}
@@ -146,7 +380,6 @@ class NetworkManager:
 
     def get_building_details(self, building_name, level, city_id, player_id):
         """Récupère les détails d'un bâtiment (coût, effets, can_finish_instantly, etc.) depuis le serveur."""
-        url = self.server_url + "/building/details"
         payload = {
             "building_name": building_name,
             "level": level,
@@ -154,7 +387,7 @@ class NetworkManager:
             "player_id": player_id
         }
         try:
-            resp = requests.post(url, json=payload, timeout=2)
+            resp = self.request("POST", "/building/details", json=payload, timeout=(HTTP_TIMEOUT[0], 2))
             if resp.status_code == 200:
                 return resp.json()
             else:
@@ -165,8 +398,24 @@ class NetworkManager:
             return {}
 
     def set_game_data(self, game_data):
-        """Définit les données du jeu."""
+        """Définit les données du jeu et en fait la source du sujet "state" du RefreshHub."""
         self.game_data = game_data
+        RefreshHub.shared().set_source("state", self._poll_state, min_interval=STATE_POLL_INTERVAL)
+
+    def _poll_state(self, deliver):
+        """
+        Source "state" du RefreshHub : une seule requête d'état par intervalle pour tous les abonnés, appliquée
+        à game_data avant diffusion. Canal d'événements connecté : l'état est déjà à jour, rien à demander.
+        """
+        if self.event_stream_connected:
+            deliver(None)
+            return
+
+        def apply(state):
+            if state:
+                self.game_data.apply_state(state)  # En cas d'échec, la requête suivante recharge l'état complet
+            deliver(state)
+        self.fetch_state_async(self.game_data, apply)
 
     def update_city(self, city):
         """Met à jour les informations d'une ville."""
@@ -201,8 +450,7 @@ class NetworkManager:
         """
         print(f"POST {endpoint} avec {payload}")  # Ajout pour debug
         try:
-            url = f"{self.server_url}{endpoint}"
-            r = requests.post(url, json=payload)
+            r = self.request("POST", endpoint, json=payload)
             try:
                 resp = r.json()
                 if "success" not in resp:
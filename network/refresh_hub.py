@@ -0,0 +1,159 @@
+"""
+RefreshHub : rafraîchissement périodique centralisé de l'interface du client.
+
+Responsabilités :
+- Une seule horloge (Clock.schedule_interval) pour tout le client, active uniquement tant qu'il existe
+  des abonnements : le coût ne dépend pas du nombre de popups ouvertes.
+- Abonnements par sujet ("state", "notification", "tick", ...) avec leur propre intervalle, arrondi au pas
+  de l'horloge ; annulation par cancel(), comme un événement Clock.
+- Source par sujet (set_source) : les données sont obtenues une seule fois pour tous les abonnés dus
+  (ex. "state" : une requête d'état au serveur, appliquée puis diffusée) ; sans source, les abonnés
+  reçoivent dt. Une source qui n'a pas encore répondu n'est pas relancée.
+- Abonnements suspendus tant que leur widget n'est pas affiché (popup fermée, écran inactif) ou que leur
+  condition est fausse ; suspend/resume arrêtent l'horloge (application en arrière-plan sur Android).
+- Comme Clock, une méthode liée et le widget sont référencés faiblement : un widget détruit sans cancel()
+  (ex. timer d'un emplacement recréé) fait disparaître son abonnement.
+"""
+
+import logging
+import time
+import weakref
+
+from kivy.clock import Clock
+
+from config.config import REFRESH_TICK
+
+
+class RefreshSubscription:
+    def __init__(self, hub, topic, callback, interval, widget=None, condition=None):
+        self.hub = hub
+        self.topic = topic
+        try:
+            self._callback = weakref.WeakMethod(callback)
+        except TypeError:
+            self._callback = lambda: callback
+        self._widget = weakref.ref(widget) if widget is not None else None
+        self.interval = interval
+        self.condition = condition
+        self.next_due = 0.0
+
+    @property
+    def callback(self):
+        return self._callback()
+
+    @property
+    def alive(self) -> bool:
+        return self.callback is not None and (self._widget is None or self._widget() is not None)
+
+    def active(self) -> bool:
+        widget = self._widget() if self._widget is not None else None
+        if widget is not None and widget.get_root_window() is None:
+            return False
+        return self.condition is None or self.condition()
+
+    def cancel(self):
+        self.hub._remove(self)
+
+
+class RefreshHub:
+    _shared = None
+
+    def __init__(self, tick: float = REFRESH_TICK):
+        self.tick = tick
+        self.logger = logging.getLogger("RefreshHub")
+        self._subscriptions = []
+        self._sources = {}  # sujet -> {"source", "min_interval", "last_run", "data", "waiting"}
+        self._event = None
+        self.suspended = False
+
+    @classmethod
+    def shared(cls):
+        """Hub commun à toute l'interface (créé au premier appel)."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def set_source(self, topic, source, min_interval: float = 0.0):
+        """
+        source(deliver) obtient les données du sujet et appelle deliver(data) (immédiatement ou plus tard,
+        sur le thread principal). Au plus un appel par min_interval : entre-temps, la dernière donnée est resservie.
+        """
+        self._sources[topic] = {"source": source, "min_interval": min_interval, "last_run": None, "data": None, "waiting": None}
+
+    def remove_source(self, topic):
+        self._sources.pop(topic, None)
+
+    def subscribe(self, topic, callback, interval: float = 1.0, widget=None, condition=None) -> RefreshSubscription:
+        """callback(data) toutes les interval secondes, tant que widget est affiché et condition() vraie."""
+        subscription = RefreshSubscription(self, topic, callback, max(interval, self.tick), widget, condition)
+        self._subscriptions.append(subscription)
+        self._schedule()
+        return subscription
+
+    def suspend(self):
+        self.suspended = True
+        self._unschedule()
+
+    def resume(self):
+        self.suspended = False
+        self._schedule()
+
+    def _remove(self, subscription):
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+        if not self._subscriptions:
+            self._unschedule()
+
+    def _schedule(self):
+        if self._event is None and self._subscriptions and not self.suspended:
+            self._event = Clock.schedule_interval(self._tick, self.tick)
+
+    def _unschedule(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def _tick(self, dt):
+        now = time.monotonic()
+        due = {}
+        for subscription in list(self._subscriptions):
+            if not subscription.alive:
+                self._remove(subscription)
+                continue
+            if subscription.next_due - now > self.tick / 2:
+                continue
+            subscription.next_due = now + subscription.interval
+            if subscription.active():
+                due.setdefault(subscription.topic, []).append(subscription)
+        for topic, subscriptions in due.items():
+            entry = self._sources.get(topic)
+            if entry is None:
+                self._fan_out(subscriptions, dt)
+            elif entry["waiting"] is not None:
+                # Source en cours : ces abonnés recevront sa réponse
+                entry["waiting"].extend(s for s in subscriptions if s not in entry["waiting"])
+            elif entry["last_run"] is not None and now - entry["last_run"] < entry["min_interval"]:
+                self._fan_out(subscriptions, entry["data"])
+            else:
+                entry["last_run"] = now
+                entry["waiting"] = list(subscriptions)
+                try:
+                    entry["source"](lambda data, entry=entry: self._deliver(entry, data))
+                except Exception as e:
+                    self.logger.error(f"source {topic} : {e}")
+                    self._deliver(entry, None)
+
+    def _deliver(self, entry, data):
+        waiting, entry["waiting"] = entry["waiting"] or [], None
+        entry["data"] = data
+        self._fan_out([s for s in waiting if s in self._subscriptions], data)
+
+    def _fan_out(self, subscriptions, data):
+        for subscription in subscriptions:
+            callback = subscription.callback
+            if callback is None:
+                continue
+            try:
+                callback(data)
+            except Exception as e:
+                self.logger.error(f"rafraîchissement {subscription.topic} : {e}")
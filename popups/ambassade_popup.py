@@ -1,6 +1,5 @@
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
-from kivy.clock import Clock
 from .base_popup import BasePopup
 
 def make_adaptive_label(text, min_height=22, **kwargs):
@@ -57,7 +56,7 @@ class AmbassadePopup(BasePopup):
             **kwargs
         )
 
-        self.ambassade_info_event = Clock.schedule_interval(self.update_ambassade_info, 1)
+        self.ambassade_info_event = self.listen_state(self.update_ambassade_info, 1)
 
     def get_city(self):
         if self.city_view and hasattr(self.city_view, "city_data") and self.city_view.city_data is not None:
@@ -1,6 +1,5 @@
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
-from kivy.clock import Clock
 from .base_popup import BasePopup
 
 class ArchitectWorkshopPopup(BasePopup):
@@ -27,7 +26,7 @@ class ArchitectWorkshopPopup(BasePopup):
         )
         # Ajoute la section dynamique bonus architecte en bas du layout principal
         self.add_dynamic_info(self.main_layout)
-        self.architect_info_event = Clock.schedule_interval(self.update_architect_info, 1)
+        self.architect_info_event = self.listen_state(self.update_architect_info, 1)
 
     def add_dynamic_info(self, layout):
         # Layout dynamique avec hauteur auto
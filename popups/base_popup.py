@@ -6,6 +6,7 @@ from kivy.uix.label import Label
 from widgets.timer_widget import TimerWidget
 from kivy.clock import Clock
 from models.building import Building
+from network.event_stream import EventListener
 from widgets.ui_helpers import make_adaptive_label, show_alert_popup, show_confirmation_popup
 
 class BasePopup(Popup):
@@ -102,9 +103,18 @@ class BasePopup(Popup):
         player_id = getattr(city, "owner", None) if city else None
         return city, slot_index, player_id
 
+    def listen_state(self, callback, poll_interval):
+        """
+        Rafraîchissement sur chaque état poussé par le serveur (canal /events), ou toutes les poll_interval
+        secondes (RefreshHub, popup ouverte uniquement) tant que le canal n'est pas connecté.
+        Retourne un abonnement à annuler (cancel) à la fermeture.
+        """
+        network_manager = self.network_manager or getattr(self.buildings_manager, "network_manager", None)
+        return EventListener(network_manager, "state", callback, poll_interval=poll_interval, widget=self)
+
     def _start_refresh_complete_button(self):
         if self._refresh_event is None:
-            self._refresh_event = Clock.schedule_interval(lambda dt: self.refresh_common_info_labels(), 0.5)
+            self._refresh_event = self.listen_state(lambda *args: self.refresh_common_info_labels(), 0.5)
 
     def _stop_refresh_complete_button(self):
         if self._refresh_event is not None:
@@ -1,6 +1,5 @@
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
-from kivy.clock import Clock
 from .base_popup import BasePopup
 
 def make_adaptive_label(text, min_height=22, **kwargs):
@@ -49,7 +48,7 @@ class MinePopup(BasePopup):
             city_view=city_view,
             **kwargs
         )
-        self.mine_info_event = Clock.schedule_interval(self.update_mine_info, 1)
+        self.mine_info_event = self.listen_state(self.update_mine_info, 1)
 
     def add_dynamic_info(self, layout):
         self.dynamic_info_layout = BoxLayout(orientation='vertical', size_hint_y=None, padding=30, spacing=30)
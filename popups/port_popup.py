@@ -1,6 +1,5 @@
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
-from kivy.clock import Clock
 from kivy.uix.button import Button
 from .base_popup import BasePopup
 from popups.transport_list_popup import PortTransportsManager
@@ -67,7 +66,7 @@ class PortPopup(BasePopup):
             **kwargs
         )
 
-        self.port_info_event = Clock.schedule_interval(self.update_port_info, 1)
+        self.port_info_event = self.listen_state(self.update_port_info, 1)
 
     def get_city(self):
         # Recherche la ville à partir de city_id si possible (game_data accessible via buildings_manager)
@@ -1,6 +1,5 @@
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
-from kivy.clock import Clock
 from .base_popup import BasePopup
 
 def make_adaptive_label(text, min_height=22, **kwargs):
@@ -57,7 +56,7 @@ class SawmillPopup(BasePopup):
             city_view=city_view,
             **kwargs
         )
-        self.sawmill_info_event = Clock.schedule_interval(self.update_sawmill_info, 1)
+        self.sawmill_info_event = self.listen_state(self.update_sawmill_info, 1)
 
     def get_city(self):
         # Recherche la ville à partir de city_id si possible (game_data accessible via buildings_manager)
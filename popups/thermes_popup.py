@@ -9,7 +9,6 @@ from .base_popup import BasePopup
 from kivy.uix.button import Button
 from kivy.clock import Clock
 import random
-import requests
 
 def make_adaptive_label(text, min_height=22, **kwargs):
     if 'halign' not in kwargs:
@@ -334,11 +333,11 @@ class ThermesPopup(BasePopup):
             del self.result_label
 
     def send_cure_plague_to_server(self, city_id):
-        url = "http://localhost:5000/cure_plague"
-        data = {"city_id": city_id}
+        network_manager = self.network_manager or getattr(self.buildings_manager, "network_manager", None)
+        if network_manager is None:
+            return None
         try:
-            response = requests.post(url, json=data)
-            result = response.json()
+            result = network_manager.cure_plague(city_id)
             print("[DEBUG][Serveur] Réponse cure_plague :", result)
             return result
         except Exception as e:
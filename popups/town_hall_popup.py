@@ -1,6 +1,5 @@
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
-from kivy.clock import Clock
 from kivy.uix.slider import Slider
 from kivy.uix.button import Button
 from .base_popup import BasePopup
@@ -132,7 +131,7 @@ class TownHallPopup(BasePopup):
 
             layout.add_widget(self.dynamic_info_layout)
             self.update_town_hall_info()
-            self.town_hall_info_event = Clock.schedule_interval(self.update_town_hall_info, 1)
+            self.town_hall_info_event = self.listen_state(self.update_town_hall_info, 1)
         except Exception as e:
             Logger.error(f"TownHallPopup: Erreur add_dynamic_info : {e}")
             layout.add_widget(make_adaptive_label(
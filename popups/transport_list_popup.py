@@ -1,12 +1,15 @@
+import time
+
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.popup import Popup
 from kivy.uix.progressbar import ProgressBar
 from kivy.uix.scrollview import ScrollView
-from kivy.clock import Clock
 
 from models.transport import Transport
+from network.event_stream import EventListener
+from network.refresh_hub import RefreshHub
 
 class TransportsListPopup(Popup):
     """
@@ -33,18 +36,49 @@ class TransportsListPopup(Popup):
         main_layout.add_widget(btn_fermer)
         self.add_widget(main_layout)
 
+        # Mode connecté : liste rechargée à chaque changement de phase poussé par le serveur (canal /events),
+        # comptes à rebours avancés localement chaque seconde ; sans canal, rechargement chaque seconde.
+        # Le rechargement ne bloque pas l'interface : la liste en cache reste affichée jusqu'à la réponse
+        self._transports = None
+        self._fetched_at = 0.0
+        self._fetch_failed = False
+        self._listeners = [
+            EventListener(network_manager, event, lambda data: self.update_transports_list())
+            for event in ("transport", "transport_removed")
+        ] if network_manager is not None else []
         self.update_transports_list()
-        self.event = Clock.schedule_interval(lambda dt: self.update_transports_list(), 1)
+        self.event = RefreshHub.shared().subscribe("tick", self._tick, 1, widget=self)
 
     def on_dismiss(self):
         if hasattr(self, "event") and self.event:
             self.event.cancel()
+        for listener in getattr(self, "_listeners", []):
+            listener.cancel()
+
+    def _tick(self, dt):
+        stream_connected = self.network_manager is not None and self.network_manager.event_stream_connected
+        self.update_transports_list(refetch=not stream_connected)
+
+    def update_transports_list(self, refetch=True):
+        joueur = self.game_data.get_current_player()
+        if joueur and self.network_manager is not None and (refetch or self._transports is None):
+            self.network_manager.get_transports_for_player_async(joueur.id_player, self._on_transports_fetched)
+        self._render_transports(joueur)
+
+    def _on_transports_fetched(self, response):
+        if response and response.get("success"):
+            self._transports = [Transport.from_dict(t, self.game_data) for t in response.get("transports", [])]
+            self._fetched_at = time.monotonic()
+            self._fetch_failed = False
+        else:
+            self._transports = None
+            self._fetch_failed = True
+        self._render_transports(self.game_data.get_current_player())
 
-    def update_transports_list(self):
+    def _render_transports(self, joueur):
         self.transports_list_layout.clear_widgets()
         self.transports_list_layout.add_widget(Label(text="", size_hint_y=None, height=40))
 
-        joueur = self.game_data.get_current_player()
         if not joueur:
             self.transports_list_layout.add_widget(
                 Label(text="Aucun joueur courant.", size_hint_y=None, height=20)
@@ -52,16 +86,18 @@ class TransportsListPopup(Popup):
             return
 
         transports = []
+        elapsed = 0.0
 
         if self.network_manager is not None:
-            response = self.network_manager.get_transports_for_player(joueur.id_player)
-            if response and response.get("success"):
-                transports = [Transport.from_dict(t, self.game_data) for t in response.get("transports", [])]
-            else:
-                self.transports_list_layout.add_widget(
-                    Label(text="Erreur réseau: impossible de charger les transports.", size_hint_y=None, height=20)
-                )
+            if self._transports is None:
+                if self._fetch_failed:
+                    text = "Erreur réseau: impossible de charger les transports."
+                else:
+                    text = "Chargement des transports..."
+                self.transports_list_layout.add_widget(Label(text=text, size_hint_y=None, height=20))
                 return
+            transports = self._transports
+            elapsed = time.monotonic() - self._fetched_at
         else:
             transports = self.transport_manager.get_transports_du_joueur(joueur)
 
@@ -75,6 +111,7 @@ class TransportsListPopup(Popup):
                 etat = etat.split(".", 1)[-1]
             infos = ""
             progress = 0.0
+            temps_restant = max(0, t.temps_restant - elapsed)
 
             # Masquer les transports annulés
             if etat in ("annule", "cancelled"):
@@ -83,22 +120,22 @@ class TransportsListPopup(Popup):
             if hasattr(t, "duree_chargement") and hasattr(t, "duree_transport"):
                 if etat in ("waiting", "en_attente"):
                     progress = 0.0
-                    infos = f"En attente ({round(t.temps_restant)}s avant chargement), puis {round(t.duree_chargement)}s chargement, {t.nb_bateaux} bateaux"
+                    infos = f"En attente ({round(temps_restant)}s avant chargement), puis {round(t.duree_chargement)}s chargement, {t.nb_bateaux} bateaux"
                 elif etat in ("chargement", "loading"):
                     total = t.duree_chargement or 1
-                    ecoule = max(0, total - t.temps_restant)
+                    ecoule = max(0, total - temps_restant)
                     progress = min(1.0, ecoule / float(total))
-                    infos = f"Chargement, {round(t.temps_restant)}s restant, {t.nb_bateaux} bateaux"
+                    infos = f"Chargement, {round(temps_restant)}s restant, {t.nb_bateaux} bateaux"
                 elif etat in ("transport", "en_transport"):
                     total = t.duree_transport or 1
-                    ecoule = max(0, total - t.temps_restant)
+                    ecoule = max(0, total - temps_restant)
                     progress = min(1.0, ecoule / float(total))
-                    infos = f"Transport, {round(t.temps_restant)}s restant, {t.nb_bateaux} bateaux"
+                    infos = f"Transport, {round(temps_restant)}s restant, {t.nb_bateaux} bateaux"
                 elif etat in ("retour", "return"):
                     total = t.duree_transport or 1
-                    ecoule = max(0, total - t.temps_restant)
+                    ecoule = max(0, total - temps_restant)
                     progress = min(1.0, ecoule / float(total))
-                    infos = f"Retour, {round(t.temps_restant)}s restant, {t.nb_bateaux} bateaux"
+                    infos = f"Retour, {round(temps_restant)}s restant, {t.nb_bateaux} bateaux"
                 elif etat in ("fini", "termine", "done", "terminé", "terminated"):
                     progress = 1.0
                     infos = "Transport terminé"
@@ -134,9 +171,8 @@ class TransportsListPopup(Popup):
         puis rafraîchit l'état du jeu côté client pour voir les ressources à jour.
         """
         if self.network_manager:
-            self.network_manager.cancel_transport(transport_id)
-            # PATCH : rafraîchit l'état du jeu (important pour les ressources)
-            self.network_manager.sync_game_data(self.game_data)
+            # Annulation et état du jeu à jour (important pour les ressources) en un seul aller-retour
+            self.network_manager.batch([("/cancel_transport", {"transport_id": transport_id})], game_data=self.game_data)
             self.update_transports_list()
 
     def confirm_cancel_transport(self, transport):
@@ -1,6 +1,5 @@
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
-from kivy.clock import Clock
 from .base_popup import BasePopup
 from data.buildings_database import buildings_database
 from models.constants import DEFAULT_STORAGE_CAPACITY
@@ -52,7 +51,7 @@ class WarehousePopup(BasePopup):
             city_id=city_id,
             **kwargs
         )
-        self.warehouse_info_event = Clock.schedule_interval(self.update_warehouse_info, 1)
+        self.warehouse_info_event = self.listen_state(self.update_warehouse_info, 1)
 
     def get_city(self):
         # Recherche la ville à partir de city_id si possible (game_data accessible via buildings_manager)
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify
+from routes.unit_of_work import current_unit_of_work, mutates_state
 
 server_buildings_bp = Blueprint('server_buildings', __name__)
 
@@ -14,6 +15,7 @@ def inject_dependencies(gd, bm, slm):
     save_load_manager = slm
 
 @server_buildings_bp.route("/build", methods=["POST"])
+@mutates_state
 def build():
     data = request.get_json()
     username = data.get("username")
@@ -30,7 +32,7 @@ def build():
     if not player:
         return jsonify({"error": "Player not found"}), 404
 
-    city = game_data.city_manager.get_city_by_id(city_id)
+    city = game_data.city_manager.get_settled_city(city_id)
     if not city or city.owner != player.id_player:
         return jsonify({"error": "City not found or not owned by player"}), 404
 
@@ -54,7 +56,7 @@ def build():
         building = None
 
     if res.get("success", False):
-        save_load_manager.save_game()
+        current_unit_of_work().add("build", data, cities=[city], players=[player])
         return jsonify({
             "success": True,
             "message": res.get("message", "Construction ou développement réussi."),
@@ -72,6 +74,7 @@ def build():
         }), 400
 
 @server_buildings_bp.route("/destroy_building", methods=["POST"])
+@mutates_state
 def destroy_building():
     data = request.get_json()
     player_id = data.get("player_id")
@@ -81,7 +84,7 @@ def destroy_building():
         return jsonify({"success": False, "error": "Missing player_id, city_id or slot_index"}), 400
 
     player = game_data.player_manager.get_player(player_id)
-    city = game_data.city_manager.get_city_by_id(city_id)
+    city = game_data.city_manager.get_settled_city(city_id)
     if not player:
         return jsonify({"success": False, "error": "Player not found"}), 404
     if not city or city.owner != player.id_player:
@@ -94,6 +97,8 @@ def destroy_building():
     )
     if isinstance(result, bool):
         result = {"success": result, "message": ""}
+    if result.get("success", False):
+        current_unit_of_work().add("destroy_building", data, cities=[city], players=[player])
 
     city = game_data.city_manager.get_city_by_id(city_id)
     player = game_data.player_manager.get_player(player.id_player)
@@ -155,6 +160,7 @@ def building_details():
     })
 
 @server_buildings_bp.route("/complete_instantly", methods=["POST"])
+@mutates_state
 def complete_instantly():
     data = request.get_json()
     player_id = data.get("player_id")
@@ -173,6 +179,8 @@ def complete_instantly():
         return jsonify({"success": False, "error": "City not found or not owned by player"}), 404
 
     res = buildings_manager.complete_instantly(city, slot_index, building_name=building_name)
+    if res:
+        current_unit_of_work().add("complete_instantly", data, cities=[city], players=[player])
 
     building = None
     try:
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify, current_app
+from routes.unit_of_work import current_unit_of_work, mutates_state
 
 server_cities_bp = Blueprint('server_cities', __name__)
 
@@ -12,6 +13,7 @@ def inject_dependencies(gd, slm):
     save_load_manager = slm
 
 @server_cities_bp.route('/set_tax_rate', methods=['POST'])
+@mutates_state
 def set_tax_rate():
     data = request.get_json()
     city_id = data.get("city_id")
@@ -19,7 +21,7 @@ def set_tax_rate():
     tax_rate = data.get("tax_rate")
     if game_data is None or save_load_manager is None:
         return jsonify({"success": False, "error": "Dépendances non injectées"}), 500
-    city = game_data.city_manager.get_city_by_id(city_id)
+    city = game_data.city_manager.get_settled_city(city_id)
     player = game_data.player_manager.get_player(player_id)
     if not city or not player or city.owner != player.id_player:
         return jsonify({"success": False, "error": "Ville ou joueur non trouvé"}), 404
@@ -38,18 +40,18 @@ def set_tax_rate():
     else:
         city.satisfaction_factors["malus"]["impots"] = 0
         city.satisfaction_factors["bonus"].pop("impots", None)
-
-    save_load_manager.save_game()
+    current_unit_of_work().add("set_tax_rate", data, cities=[city])
     return jsonify({"success": True, "city": city.to_dict()})
 
 @server_cities_bp.route('/set_windmill_multiplier', methods=['POST'])
+@mutates_state
 def set_windmill_multiplier():
     data = request.get_json()
     city_id = data.get("city_id")
     windmill_cereal_multiplier = data.get("windmill_cereal_multiplier")
     if game_data is None or save_load_manager is None:
         return jsonify({"success": False, "error": "Dépendances non injectées"}), 500
-    city = game_data.city_manager.get_city_by_id(city_id)
+    city = game_data.city_manager.get_settled_city(city_id)
     if not city:
         return jsonify({"success": False, "error": "Ville non trouvée"}), 404
 
@@ -58,18 +60,19 @@ def set_windmill_multiplier():
         city.windmill_cereal_multiplier = float(windmill_cereal_multiplier)
     except Exception:
         city.windmill_cereal_multiplier = 1.0
-    save_load_manager.save_game()
+    current_unit_of_work().add("set_windmill_multiplier", data, cities=[city])
     return jsonify({"success": True, "city": city.to_dict()})
 
 # Ajoute ici d'autres routes liées aux villes (ex : /update_city, /rename_city, etc.)
 
 @server_cities_bp.route('/cure_plague', methods=['POST'])
+@mutates_state
 def cure_plague():
     data = request.get_json()
     city_id = data.get("city_id")
     if game_data is None or save_load_manager is None:
         return jsonify({"success": False, "error": "Dépendances non injectées"}), 500
-    city = game_data.city_manager.get_city_by_id(city_id)
+    city = game_data.city_manager.get_settled_city(city_id)
     if not city:
         return jsonify({"success": False, "error": "Ville non trouvée"}), 404
 
@@ -77,36 +80,38 @@ def cure_plague():
     if not city.has_plague:
         return jsonify({"success": False, "error": "Pas de peste à guérir"}), 400
     city.has_plague = False
-    save_load_manager.save_game()
+    current_unit_of_work().add("cure_plague", data, cities=[city])
     return jsonify({"success": True, "city": city.to_dict()})
 
 @server_cities_bp.route('/sync/city', methods=['POST'])
 def sync_city():
     data = request.get_json()
     city_id = data.get("city_id")
-    city = game_data.city_manager.get_city_by_id(city_id)
-    if not city:
-        return jsonify({"success": False, "error": "Ville introuvable"}), 404
-    # Ajout du retour du joueur associé à la ville
-    player = None
-    if hasattr(city, "owner") and city.owner:
-        player = game_data.player_manager.get_player(city.owner)
-    return jsonify({
-        "success": True,
-        "city": city.to_dict(),
-        "player": player.to_dict() if player else None
-    })
+    with save_load_manager.state_lock:  # Le règlement de la production modifie la ville
+        city = game_data.city_manager.get_settled_city(city_id)
+        if not city:
+            return jsonify({"success": False, "error": "Ville introuvable"}), 404
+        # Ajout du retour du joueur associé à la ville
+        player = None
+        if hasattr(city, "owner") and city.owner:
+            player = game_data.player_manager.get_player(city.owner)
+        return jsonify({
+            "success": True,
+            "city": city.to_dict(),
+            "player": player.to_dict() if player else None
+        })
 
 @server_cities_bp.route('/rename_city', methods=['POST'])
+@mutates_state
 def rename_city():
     data = request.get_json()
     city_id = data.get("city_id")
     new_name = data.get("new_name")
     if game_data is None or save_load_manager is None:
         return jsonify({"success": False, "error": "Dépendances non injectées"}), 500
-    city = game_data.city_manager.get_city_by_id(city_id)
+    city = game_data.city_manager.get_settled_city(city_id)
     if not city:
         return jsonify({"success": False, "error": "Ville non trouvée"}), 404
     city.name = new_name
-    save_load_manager.save_game()
+    current_unit_of_work().add("rename_city", data, cities=[city])
     return jsonify({"success": True, "city": city.to_dict()})
\ No newline at end of file
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timezone
 from data.resource_sites_database import RESOURCE_SITE_LEVELS
+from routes.unit_of_work import current_unit_of_work, mutates_state
 
 resource_sites_bp = Blueprint('resource_sites', __name__)
 
@@ -8,7 +9,14 @@ game_data = None
 save_load_manager = None
 RESOURCE_TO_SITE = None
 
+def _publish_site_upgrade(island, site):
+    """Passage de niveau d'un site : visible par tous les joueurs (résumés des îles)."""
+    game_data.event_bus.publish("site_upgraded", {
+        "island_coords": island.get("coords"), "type": site.get("type"), "level": site.get("level", 1),
+    })
+
 @resource_sites_bp.route("/assign_workers", methods=["POST"])
+@mutates_state
 def assign_workers():
     data = request.get_json()
     city_id = data.get("city_id")
@@ -16,33 +24,21 @@ def assign_workers():
     workers = int(data.get("workers", 0))
     player_id = data.get("player_id")
 
-    global game_data, RESOURCE_TO_SITE
-    city = game_data.city_manager.get_city_by_id(city_id)
+    global game_data, save_load_manager, RESOURCE_TO_SITE
+    city = game_data.city_manager.get_settled_city(city_id)
     if not city or city.owner != player_id:
         return jsonify({"success": False, "status": "error", "error": "Ville introuvable ou non possédée"})
 
     # Limite le nombre d’ouvriers à la capacité max du site
-    island = None
-    for ile in game_data.islands:
-        elements = ile.get("elements", []) if isinstance(ile, dict) else getattr(ile, "elements", [])
-        for c in elements:
-            if hasattr(c, "id") and getattr(c, "id") == city_id:
-                island = ile
-                break
-        if island:
-            break
+    island = game_data.get_island_for_city(city_id)
+    site = game_data.get_resource_site(island, RESOURCE_TO_SITE.get(resource, resource))
 
     max_workers = None
-    if island:
-        resource_sites = [e for e in (island.get("elements", []) if isinstance(island, dict) else getattr(island, "elements", [])) if isinstance(e, dict) and "type" in e]
-        site_type_backend = RESOURCE_TO_SITE.get(resource, resource)
-        for s in resource_sites:
-            if s.get("type") == site_type_backend:
-                level = s.get("level", 1)
-                site_config = RESOURCE_SITE_LEVELS.get(resource, {})
-                level_config = site_config.get(level, {})
-                max_workers = level_config.get("max_workers_per_city", None)
-                break
+    if site:
+        level = site.get("level", 1)
+        site_config = RESOURCE_SITE_LEVELS.get(resource, {})
+        level_config = site_config.get(level, {})
+        max_workers = level_config.get("max_workers_per_city", None)
 
     if max_workers is not None:
         workers = min(workers, max_workers)
@@ -56,6 +52,7 @@ def assign_workers():
         city.resource_workers = {}
     city.resource_workers[resource] = workers
     city.workers_assigned[resource] = workers
+    current_unit_of_work().add("assign_workers", data, cities=[city])
 
     return jsonify({
         "success": True,
@@ -64,7 +61,9 @@ def assign_workers():
         "free_population": getattr(city, "free_population", None)
     })
 
+# Lecture qui modifie l'état : termine l'amélioration échue du site et réduit les ouvriers en surplus
 @resource_sites_bp.route('/resource_site_info', methods=['POST'])
+@mutates_state
 def resource_site_info():
     data = request.get_json()
     site_type = data.get("site_type")   # <-- CORRECTION : récupère bien le site_type
@@ -74,56 +73,33 @@ def resource_site_info():
     # --- ici, il faut accéder à game_data, save_load_manager, RESOURCE_TO_SITE depuis l'app principale ---
     global game_data, save_load_manager, RESOURCE_TO_SITE
 
-    islands = getattr(game_data, "islands", [])
-    ile_trouvee = None
     if island_coords:
-        for ile in islands:
-            coords = ile.get("coords") if isinstance(ile, dict) else getattr(ile, "coords", None)
-            if coords and tuple(coords) == tuple(island_coords):
-                ile_trouvee = ile
-                break
+        ile_trouvee = game_data.get_island_by_coords(island_coords)
     else:
-        for ile in islands:
-            elements = ile.get("elements", []) if isinstance(ile, dict) else getattr(ile, "elements", [])
-            for city in elements:
-                if hasattr(city, "owner") and getattr(city, "owner") == player_id:
-                    ile_trouvee = ile
-                    break
-            if ile_trouvee:
-                break
+        ile_trouvee = game_data.get_first_island_of_player(player_id)
 
     if not ile_trouvee:
         return jsonify({"error": "Île ou site non trouvé", "success": False})
 
     elements = ile_trouvee.get("elements", []) if isinstance(ile_trouvee, dict) else getattr(ile_trouvee, "elements", [])
-    cities = []
-    resource_sites = []
-    for elem in elements:
-        if hasattr(elem, "owner"):  # City object
-            cities.append(elem)
-        elif isinstance(elem, dict) and "type" in elem:
-            resource_sites.append(elem)
-
-    site = None
-    site_type_backend = RESOURCE_TO_SITE.get(site_type, site_type)
-    for s in resource_sites:
-        if s.get("type") == site_type_backend:
-            # Gestion du timer et passage de niveau
-            if s.get("upgrade_start_time"):
-                start_time = s["upgrade_start_time"]
-                if isinstance(start_time, str):
-                    start_time = datetime.fromisoformat(start_time)
-                now = datetime.now(timezone.utc)
-                upgrade_time = s.get("upgrade_time", 0)
-                elapsed = (now - start_time).total_seconds()
-                if elapsed >= upgrade_time:
-                    s["level"] = s.get("level", 1) + 1
-                    s.pop("upgrade_start_time", None)
-                    s.pop("upgrade_time", None)
-                    s["donations"] = {}  # Remise à zéro des dons pour le nouveau niveau
-                    save_load_manager.save_game()
-            site = s
-            break
+    cities = [elem for elem in elements if hasattr(elem, "owner")]  # City objects
+
+    site = game_data.get_resource_site(ile_trouvee, RESOURCE_TO_SITE.get(site_type, site_type))
+    # Gestion du timer et passage de niveau
+    if site and site.get("upgrade_start_time"):
+        start_time = site["upgrade_start_time"]
+        if isinstance(start_time, str):
+            start_time = datetime.fromisoformat(start_time)
+        now = datetime.now(timezone.utc)
+        upgrade_time = site.get("upgrade_time", 0)
+        elapsed = (now - start_time).total_seconds()
+        if elapsed >= upgrade_time:
+            site["level"] = site.get("level", 1) + 1
+            site.pop("upgrade_start_time", None)
+            site.pop("upgrade_time", None)
+            site["donations"] = {}  # Remise à zéro des dons pour le nouveau niveau
+            current_unit_of_work().add("resource_site_level_up", data, sites=[site])
+            _publish_site_upgrade(ile_trouvee, site)
     if not site:
         return jsonify({"error": "Île ou site non trouvé", "success": False})
 
@@ -241,6 +217,7 @@ def resource_site_info():
     })
 
 @resource_sites_bp.route('/donate_to_resource_site', methods=['POST'])
+@mutates_state
 def donate_to_resource_site():
     data = request.get_json()
     site_type = data.get("site_type")   # <-- AJOUT ICI pour cohérence
@@ -252,62 +229,41 @@ def donate_to_resource_site():
 
     global game_data, save_load_manager, RESOURCE_TO_SITE
 
-    islands = getattr(game_data, "islands", [])
-
     # Recherche de l’île
-    ile_trouvee = None
     if island_coords:
-        for ile in islands:
-            coords = ile.get("coords") if isinstance(ile, dict) else getattr(ile, "coords", None)
-            if coords and tuple(coords) == tuple(island_coords):
-                ile_trouvee = ile
-                break
+        ile_trouvee = game_data.get_island_by_coords(island_coords)
     else:
-        for ile in islands:
-            elements = ile.get("elements", []) if isinstance(ile, dict) else getattr(ile, "elements", [])
-            for city in elements:
-                if hasattr(city, "owner") and getattr(city, "owner") == player_id:
-                    ile_trouvee = ile
-                    break
-            if ile_trouvee:
-                break
+        ile_trouvee = game_data.get_first_island_of_player(player_id)
 
     if not ile_trouvee:
         return jsonify({"success": False, "error": "Île introuvable"}), 404
 
-    # Trouver la ville demandée par le client (ville active)
+    # Trouver la ville demandée par le client (ville active), uniquement si elle est sur cette île
     city_obj = None
-    elements = ile_trouvee.get("elements", []) if isinstance(ile_trouvee, dict) else getattr(ile_trouvee, "elements", [])
-    for elem in elements:
-        if hasattr(elem, "id") and getattr(elem, "id", None) == city_id:
-            city_obj = elem
-            break
+    if game_data.get_island_for_city(city_id) is ile_trouvee:
+        city_obj = game_data.city_manager.get_settled_city(city_id)
 
     # Vérifier que la ville existe, appartient au joueur, et est bien sur cette île
     if not city_obj or getattr(city_obj, "owner", None) != player_id:
         return jsonify({"success": False, "error": "Veuillez sélectionner une ville à vous présente sur cette île pour faire un don."}), 400
 
     # Recherche du site de ressource sur l'île
-    site = None
-    site_type_backend = RESOURCE_TO_SITE.get(site_type, site_type)
-    for s in elements:
-        if isinstance(s, dict) and s.get("type") == site_type_backend:
-            # Vérification passage de niveau si timer terminé
-            if s.get("upgrade_start_time"):
-                start_time = s["upgrade_start_time"]
-                if isinstance(start_time, str):
-                    start_time = datetime.fromisoformat(start_time)
-                now = datetime.now(timezone.utc)
-                upgrade_time = s.get("upgrade_time", 0)
-                elapsed = (now - start_time).total_seconds()
-                if elapsed >= upgrade_time:
-                    s["level"] = s.get("level", 1) + 1
-                    s.pop("upgrade_start_time", None)
-                    s.pop("upgrade_time", None)
-                    s["donations"] = {}  # Remise à zéro des dons pour le nouveau niveau
-                    save_load_manager.save_game()
-            site = s
-            break
+    site = game_data.get_resource_site(ile_trouvee, RESOURCE_TO_SITE.get(site_type, site_type))
+    # Vérification passage de niveau si timer terminé
+    if site and site.get("upgrade_start_time"):
+        start_time = site["upgrade_start_time"]
+        if isinstance(start_time, str):
+            start_time = datetime.fromisoformat(start_time)
+        now = datetime.now(timezone.utc)
+        upgrade_time = site.get("upgrade_time", 0)
+        elapsed = (now - start_time).total_seconds()
+        if elapsed >= upgrade_time:
+            site["level"] = site.get("level", 1) + 1
+            site.pop("upgrade_start_time", None)
+            site.pop("upgrade_time", None)
+            site["donations"] = {}  # Remise à zéro des dons pour le nouveau niveau
+            current_unit_of_work().add("resource_site_level_up", data, sites=[site])
+            _publish_site_upgrade(ile_trouvee, site)
     if not site:
         return jsonify({"success": False, "error": "Site non trouvé sur l'île"}), 404
 
@@ -359,7 +315,7 @@ def donate_to_resource_site():
             site.pop("upgrade_time", None)
             site["donations"] = {}  # On ne touche PAS à donations_history !
             upgraded = True
-            save_load_manager.save_game()
+            _publish_site_upgrade(ile_trouvee, site)
 
     # 2. Si pas de timer, vérifier si on peut le démarrer (après la donation)
     if not site.get("upgrade_start_time"):
@@ -373,9 +329,8 @@ def donate_to_resource_site():
             site["upgrade_start_time"] = datetime.now(timezone.utc).isoformat()
             site["upgrade_time"] = level_config.get("upgrade_time", 0)
             upgraded = False
-            save_load_manager.save_game()
 
-    save_load_manager.save_game()
+    current_unit_of_work().add("donate_to_resource_site", data, cities=[city_obj], sites=[site])
 
     return jsonify({
         "success": True,
@@ -0,0 +1,69 @@
+from flask import request
+
+from config.config import HTTP_GZIP_MIN_SIZE
+
+# Réponses d'état (/get_state, /get_state_for_player, /events, /batch) servies depuis le cache par version
+# (managers.state_cache) : 304 si le client possède déjà la version, sinon différentiel ou état complet,
+# encodé et compressé une seule fois par version.
+
+# L'application est injectée (et non lue par current_app) : le flux /events encode hors contexte de requête
+app = None
+state_cache = None
+save_load_manager = None
+
+def inject_dependencies(flask_app, cache, slm):
+    global app, state_cache, save_load_manager
+    app = flask_app
+    state_cache = cache
+    save_load_manager = slm
+
+def versioned_state(scope, full_state, delta_since):
+    """
+    Réponse de la vue scope (sous state_lock) : 304 si If-None-Match désigne la version courante,
+    sinon différentiel depuis ?since=&epoch= ou état complet (voir encoded_state).
+    """
+    save_load_manager.publish_settled()
+    versions = save_load_manager.versions
+    etag = state_cache.etag(scope, versions.version)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    since = request.args.get("since", type=int)
+    if not versions.can_serve(since, request.args.get("epoch")):
+        since = None  # Première synchronisation, redémarrage du serveur ou version trop ancienne : état complet
+    version, body = encoded_state(scope, since, full_state, delta_since)
+    gzipped = accepts_gzip(body)
+    if gzipped:
+        body = state_cache.gzipped(scope, since, version, body)
+    response = app.response_class(body, mimetype="application/json")
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+    response.set_etag(state_cache.etag(scope, version))
+    return response
+
+def accepts_gzip(body) -> bool:
+    """Vrai si le client accepte gzip et que body est assez grand pour que la compression soit rentable."""
+    return len(body) >= HTTP_GZIP_MIN_SIZE and "gzip" in request.accept_encodings
+
+def encoded_state(scope, since, full_state, delta_since):
+    """
+    (version, octets JSON) du différentiel depuis since ou de l'état complet (since None), encodés une fois
+    par version. Les villes réglées juste avant (sous state_lock) sont d'abord versionnées (publish_settled).
+    """
+    save_load_manager.publish_settled()
+    versions = save_load_manager.versions
+    version = versions.version
+    body = state_cache.get(scope, since, version)
+    if body is None:
+        if since is None:
+            save_load_manager.track_all()
+            state = full_state()
+            state.update({"full": True, "version": version, "epoch": versions.epoch})
+        else:
+            state = delta_since(since)
+            version = state["version"]
+        body = app.json.dumps(state).encode("utf-8")
+        state_cache.put(scope, since, version, body)
+    return version, body
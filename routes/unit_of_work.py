@@ -0,0 +1,58 @@
+import functools
+
+from flask import current_app, request
+
+from managers.persistence_queue import UnitOfWork
+
+SAVE_LOAD_MANAGER = "game.save_load_manager"
+UNIT_OF_WORK = "game.unit_of_work"
+
+# Unité de travail par requête : les routes y déclarent les entités modifiées (current_unit_of_work().add(...)),
+# et elle est validée une seule fois à la fin de la requête dans la file de persistance temporisée.
+# Elle est portée par l'environnement WSGI de la requête : une sous-requête (action d'un lot /batch) ne la partage
+# que si elle la reçoit explicitement (voir unit_of_work_environ).
+# Les routes qui modifient l'état sont décorées par mutates_state : elles s'exécutent sous
+# save_load_manager.state_lock, comme un pas du tick, et un instantané, un état envoyé ou un lot /batch ne voient
+# jamais une requête à moitié appliquée. Les routes de lecture ne prennent pas le verrou.
+
+
+def current_unit_of_work() -> UnitOfWork:
+    """Retourne l'unité de travail de la requête en cours (créée au premier appel)."""
+    unit = request.environ.get(UNIT_OF_WORK)
+    if unit is None:
+        unit = request.environ[UNIT_OF_WORK] = UnitOfWork()
+    return unit
+
+
+def unit_of_work_environ(unit: UnitOfWork) -> dict:
+    """
+    Environnement d'une sous-requête (app.test_request_context(..., environ_overrides=...)) dont les actions
+    s'ajoutent à unit. La sous-requête n'exécute pas les hooks : unit est validée par la requête qui l'a créée.
+    """
+    return {UNIT_OF_WORK: unit}
+
+
+def mutates_state(view):
+    """Décorateur des routes qui modifient l'état du jeu : la vue s'exécute sous state_lock."""
+
+    @functools.wraps(view)
+    def locked_view(*args, **kwargs):
+        with current_app.extensions[SAVE_LOAD_MANAGER].state_lock:
+            return view(*args, **kwargs)
+
+    return locked_view
+
+
+def init_unit_of_work(app, save_load_manager):
+    """
+    Rend save_load_manager.state_lock disponible pour mutates_state et valide l'unité de travail de chaque
+    requête dans save_load_manager.persistence_queue.
+    """
+    app.extensions[SAVE_LOAD_MANAGER] = save_load_manager
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        unit = request.environ.pop(UNIT_OF_WORK, None)
+        if unit is not None:
+            save_load_manager.persistence_queue.submit(unit)
+        return response
@@ -1,25 +1,35 @@
 from flask import Flask, request, jsonify
+from werkzeug.exceptions import HTTPException
 from datetime import datetime
+import atexit
+import gzip
+import json
 import logging
+import time
 
 from models.game_data import GameData
 from managers.buildings_manager import BuildingsManager
-from managers.save_load_manager import SaveLoadManager
 from data.research_data import RESEARCH_TREE
 from managers.game_loop_manager import GameLoopManager
+from managers.state_cache import StateCache
 from data.resource_sites_database import RESOURCE_SITE_LEVELS
+from config.config import RESOURCE_ACCRUAL, SAVE_BACKEND, SQLITE_SAVE_PATH, SNAPSHOT_FORMAT, BINARY_SAVE_PATH, STATE_SETTLE_INTERVAL
+from config.config import EVENT_STATE_INTERVAL, EVENT_KEEPALIVE, EVENT_MAX_STREAMS, EVENT_RETRY_AFTER, SERVER_THREADS
 
 from routes import server_resource_sites as resource_sites
 from routes import server_cities
 from routes import server_buildings
+from routes import state_responses
+from routes.unit_of_work import current_unit_of_work, init_unit_of_work, mutates_state, unit_of_work_environ
 
 # Initialisation des dépendances
 game_data = GameData()
-save_load_manager = SaveLoadManager(game_data)
+save_load_manager = game_data.save_load_manager  # Instance unique : elle suit les entités modifiées
+state_cache = StateCache(save_load_manager.versions, settle_interval=STATE_SETTLE_INTERVAL)
+# Les canaux /events occupent des threads du serveur : les autres requêtes gardent au moins la moitié du pool
+game_data.event_bus.max_subscriptions = min(EVENT_MAX_STREAMS, SERVER_THREADS // 2)
 city_view = None
 buildings_manager = BuildingsManager(game_data, city_view, update_all_callback=None)
-game_data.last_update_time = datetime.utcnow()
-game_data.accumulated_dt = 0.0
 game_data.buildings_manager = buildings_manager
 
 RESOURCE_TO_SITE = {
@@ -47,12 +57,25 @@ server_cities.inject_dependencies(game_data, save_load_manager)
 server_buildings.inject_dependencies(game_data, buildings_manager, save_load_manager)
 
 app = Flask(__name__)
+# Une validation par requête, regroupée par la file de persistance
+init_unit_of_work(app, save_load_manager)
+state_responses.inject_dependencies(app, state_cache, save_load_manager)
 
 # Enregistrement des Blueprints (une seule fois chacun)
 app.register_blueprint(server_cities.server_cities_bp)
 app.register_blueprint(resource_sites.resource_sites_bp)
 app.register_blueprint(server_buildings.server_buildings_bp)
 
+# Le mode paresseux est activé avant le chargement : load_game rattrape la production jusqu'à la sauvegarde
+if RESOURCE_ACCRUAL == "lazy":
+    game_data.resource_manager.enable_lazy_accrual()
+
+# Stockage SQLite : au premier démarrage, load_game reprend savegame.json puis écrit un point complet dans la base
+if SAVE_BACKEND == "sqlite":
+    save_load_manager.use_sqlite_backend(SQLITE_SAVE_PATH)
+elif SNAPSHOT_FORMAT == "binary":
+    save_load_manager.use_binary_snapshots(BINARY_SAVE_PATH)
+
 # Robustesse au démarrage
 try:
     save_load_manager.load_game()
@@ -61,73 +84,208 @@ try:
 except Exception:
     game_data.load_islands_from_json("data/islands.json")
 
-def update_resources(dt):
-    game_data.resource_manager.update_all(dt)
-
-def update_transports(dt):
-    game_data.transport_manager.update_transports(dt)
-
-def update_constructions(dt):
-    if hasattr(game_data, "buildings_manager"):
-        buildings_manager = game_data.buildings_manager
-        for city in game_data.city_manager.get_all_cities():
-            for i, building in enumerate(city.get_buildings()):
-                if building and getattr(building, "status", None) == "En construction":
-                    if buildings_manager.get_remaining_time(building) <= 0:
-                        construction_key = (city.coords, city.name, i)
-                        buildings_manager.complete_task(
-                            construction_key=construction_key,
-                            city_data=city,
-                            slot_index=i
-                        )
-
-def update_game_resources_and_transports():
-    now = datetime.utcnow()
-    dt = (now - game_data.last_update_time).total_seconds()
-    game_data.last_update_time = now
-    game_data.accumulated_dt += dt
-    while game_data.accumulated_dt >= 1.0:
-        update_resources(1.0)
-        update_transports(1.0)
-        update_constructions(1.0)
-        game_data.accumulated_dt -= 1.0
+# Mode "numpy" : les tableaux du moteur sont construits depuis les villes chargées
+if RESOURCE_ACCRUAL == "numpy":
+    game_data.resource_manager.enable_batch_engine()
 
+# GameLoopManager est l'unique ordonnanceur du temps simulé (ressources, transports, constructions)
 game_loop_manager = GameLoopManager(
     game_data=game_data,
     save_load_manager=save_load_manager,
 )
-game_loop_manager.register_callback(update_game_resources_and_transports)
 game_loop_manager.start()
+# Dernière sauvegarde écrite sur disque à l'arrêt du serveur
+atexit.register(game_loop_manager.stop)
 
 # --- ROUTES PRINCIPALES (hors bâtiments et villes) ---
 
 @app.route("/join", methods=["POST"])
+@mutates_state
 def join():
     data = request.get_json()
     username = data.get("username")
     password = data.get("password", "")
-    player = game_data.player_manager.get_player_by_username(username)
-    if not player:
-        game_data.player_manager.create_account(username, password)
-        player = game_data.player_manager.get_player_by_username(username)
-        if player:
-            game_data.player_manager.players[player.id_player] = player
-    else:
-        if player.id_player not in game_data.player_manager.players:
-            game_data.player_manager.players[player.id_player] = player
+    player = game_data.player_manager.join(username, password)
+    if player is None:
+        return jsonify({"status": "error", "error": "Unable to create player"}), 400
+    current_unit_of_work().add("join", {"username": username}, players=[player])
     return jsonify({"status": "ok", "player_id": player.id_player})
 
 @app.route("/get_state", methods=["GET"])
 def get_state():
     if not game_data.islands:
         game_data.load_islands_from_json("data/islands.json")
-    state = game_data.to_dict()
-    return jsonify(state)
+    with save_load_manager.state_lock:
+        if state_cache.settle_due(None):
+            game_data.resource_manager.settle_all()
+        return state_responses.versioned_state(None, game_data.to_dict, game_data.to_delta)
+
+@app.route("/get_state_for_player", methods=["GET"])
+def get_state_for_player():
+    """État vu par un joueur : ses villes et transports en détail, le reste du monde résumé."""
+    player_id = request.args.get("player_id")
+    if player_id not in game_data.player_manager.players:
+        return jsonify({"success": False, "error": "Player not found"}), 404
+    with save_load_manager.state_lock:
+        _settle_player(player_id)
+        return state_responses.versioned_state(player_id, *_player_view(player_id))
+
+@app.route("/events", methods=["GET"])
+def events():
+    """
+    Canal Server-Sent Events d'un joueur : différentiel de sa vue toutes les EVENT_STATE_INTERVAL secondes
+    (s'il a changé) et événements de jeu (notifications, constructions, transports, sites) dès leur publication.
+    Au-delà de max_subscriptions canaux ouverts, répond 503 + Retry-After : le client reste sur l'interrogation.
+    """
+    player_id = request.args.get("player_id")
+    if player_id not in game_data.player_manager.players:
+        return jsonify({"success": False, "error": "Player not found"}), 404
+    subscription = game_data.event_bus.subscribe(player_id)
+    if subscription is None:
+        response = jsonify({"success": False, "error": "Too many event streams"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(EVENT_RETRY_AFTER)
+        return response
+    since = request.args.get("since", type=int)
+    epoch = request.args.get("epoch")
+
+    def stream(since, epoch):
+        try:
+            yield "retry: 3000\n\n"
+            next_state = 0.0
+            last_sent = time.monotonic()
+            while True:
+                if time.monotonic() >= next_state:
+                    with save_load_manager.state_lock:
+                        _settle_player(player_id)
+                        if not save_load_manager.versions.can_serve(since, epoch):
+                            since = None
+                        version, body = state_responses.encoded_state(player_id, since, *_player_view(player_id))
+                    if version != since:
+                        yield _sse("state", body.decode("utf-8"))
+                        last_sent = time.monotonic()
+                    since, epoch = version, save_load_manager.versions.epoch
+                    next_state = time.monotonic() + EVENT_STATE_INTERVAL
+                for event, text in subscription.drain(max(0.0, next_state - time.monotonic())):
+                    yield _sse(event, text)
+                    last_sent = time.monotonic()
+                if time.monotonic() - last_sent >= EVENT_KEEPALIVE:
+                    yield ": keepalive\n\n"  # Détecte les clients partis (l'écriture échoue)
+                    last_sent = time.monotonic()
+        finally:
+            game_data.event_bus.unsubscribe(subscription)
+
+    return app.response_class(
+        stream(since, epoch), mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route("/batch", methods=["POST"])
+def batch():
+    """
+    Exécute une liste ordonnée d'actions [{"endpoint": "/assign_workers", "payload": {...}}, ...] sous state_lock
+    (tenu pour tout le lot : ni le tick ni une autre requête qui modifie l'état ne s'intercalent)
+    et une seule unité de travail, puis renvoie le résultat de chaque action et un seul état : vue du
+    joueur si player_id est fourni (sinon le monde), différentiel depuis since/epoch si possible.
+    Avec stop_on_error (par défaut), la première action en échec arrête le lot.
+    Réponse : {"success": ..., "results": [{"endpoint", "status", "response"}, ...], "state": état au format
+    de /get_state}.
+    """
+    data = request.get_json() or {}
+    actions = data.get("actions")
+    if not isinstance(actions, list):
+        return jsonify({"success": False, "error": "Missing actions"}), 400
+    stop_on_error = data.get("stop_on_error", True)
+    player_id = data.get("player_id")
+    adapter = app.url_map.bind("")
+    unit = current_unit_of_work()  # Unité de travail du lot, transmise à chaque action et validée après la réponse
+    results = []
+    with save_load_manager.state_lock:
+        for action in actions:
+            results.append(_run_batch_action(adapter, action, unit))
+            if stop_on_error and results[-1]["status"] >= 400:
+                break
+        versions = save_load_manager.versions
+        since = data.get("since")
+        if not versions.can_serve(since, data.get("epoch")):
+            since = None
+        if player_id in game_data.player_manager.players:
+            _settle_player(player_id)
+            _, state = state_responses.encoded_state(player_id, since, *_player_view(player_id))
+        else:
+            if state_cache.settle_due(None):
+                game_data.resource_manager.settle_all()
+            _, state = state_responses.encoded_state(None, since, game_data.to_dict, game_data.to_delta)
+    success = len(results) == len(actions) and all(result["status"] < 400 for result in results)
+    # L'état déjà encodé (cache par version) est repris tel quel comme valeur du membre "state"
+    body = _json_object({
+        "success": app.json.dumps(success).encode("utf-8"),
+        "results": app.json.dumps(results).encode("utf-8"),
+        "state": state,
+    })
+    return app.response_class(body, mimetype="application/json")
+
+def _json_object(members):
+    """Objet JSON {"clé": valeur, ...} assemblé à partir de valeurs déjà encodées (octets JSON complets)."""
+    return b"{" + b", ".join(json.dumps(key).encode("utf-8") + b": " + value for key, value in members.items()) + b"}"
+
+def _run_batch_action(adapter, action, unit):
+    """
+    Exécute une action du lot en appelant la vue de sa route dans une sous-requête. Les hooks de requête ne
+    s'exécutent pas : l'action s'ajoute explicitement à l'unité de travail unit du lot (validée une fois par la
+    requête /batch), et state_lock, tenu par le lot, est repris par les vues décorées par mutates_state.
+    """
+    endpoint = action.get("endpoint") if isinstance(action, dict) else None
+    if not endpoint or endpoint == "/batch":
+        return {"endpoint": endpoint, "status": 400, "response": {"success": False, "error": "Invalid endpoint"}}
+    try:
+        view_name, view_args = adapter.match(endpoint, method="POST")
+        with app.test_request_context(endpoint, method="POST", json=action.get("payload") or {},
+                                      environ_overrides=unit_of_work_environ(unit)):
+            response = app.make_response(app.view_functions[view_name](**view_args))
+        return {"endpoint": endpoint, "status": response.status_code, "response": response.get_json(silent=True)}
+    except HTTPException as e:
+        return {"endpoint": endpoint, "status": e.code, "response": {"success": False, "error": e.description}}
+    except Exception as e:
+        logging.error(f"batch {endpoint}: {e}")
+        return {"endpoint": endpoint, "status": 500, "response": {"success": False, "error": str(e)}}
+
+def _sse(event, text):
+    return f"event: {event}\ndata: {text}\n\n"
+
+def _settle_player(player_id):
+    # Seules les villes du joueur sont réglées : les autres ne sont envoyées que résumées
+    if state_cache.settle_due(player_id):
+        for city in game_data.city_manager.get_cities_for_player(player_id):
+            game_data.resource_manager.settle_city(city)
+
+def _player_view(player_id):
+    return (
+        lambda: game_data.to_player_dict(player_id),
+        lambda since: game_data.to_delta(since, player_id=player_id),
+    )
+
+@app.after_request
+def _compress_response(response):
+    """Compresse les autres réponses JSON volumineuses (les états sont compressés une fois par version, voir StateCache)."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or response.mimetype != "application/json" or "Content-Encoding" in response.headers):
+        return response
+    body = response.get_data()
+    if state_responses.accepts_gzip(body):
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+    return response
 
 @app.route("/ping", methods=["GET"])
 def ping():
     return jsonify({"success": True, "message": "pong"})
 
+@app.route("/tick_stats", methods=["GET"])
+def tick_stats():
+    return jsonify({"success": True, "stats": game_loop_manager.get_stats()})
+
 
 @app.route("/push_city_state", methods=["POST"])
 def push_city_state():
@@ -141,6 +299,7 @@ def find_research_by_name(research_name):
     return None
 
 @app.route("/unlock_research", methods=["POST"])
+@mutates_state
 def unlock_research():
     data = request.get_json()
     player_id = data.get("player_id")
@@ -153,6 +312,8 @@ def unlock_research():
         return jsonify({"success": False, "error": "Invalid player or research"}), 400
     try:
         success = game_data.research_manager.unlock_research(player_id, research)
+        if success:
+            current_unit_of_work().add("unlock_research", data, players=[player])
         return jsonify({
             "success": success,
             "available_points": player.research_points if player else 0,
@@ -162,6 +323,7 @@ def unlock_research():
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route("/add_notification", methods=["POST"])
+@mutates_state
 def add_notification():
     data = request.get_json()
     joueur_id = data.get("joueur_id")
@@ -189,6 +351,7 @@ def get_notifications():
     return jsonify({"success": True, "notifications": notifications_serialized})
 
 @app.route("/mark_notifications_read", methods=["POST"])
+@mutates_state
 def mark_notifications_read():
     data = request.get_json()
     joueur_id = data.get("joueur_id")
@@ -198,12 +361,13 @@ def mark_notifications_read():
     return jsonify({"success": True})
 
 @app.route("/add_transport", methods=["POST"])
+@mutates_state
 def add_transport():
     data = request.get_json()
     if not data:
         return jsonify({"success": False, "error": "Missing payload"}), 400
     try:
-        ville_source = game_data.city_manager.get_city_by_id(data["ville_source"])
+        ville_source = game_data.city_manager.get_settled_city(data["ville_source"])
         ville_dest = game_data.city_manager.get_city_by_id(data["ville_dest"])
         joueur_source = game_data.player_manager.get_player(data["joueur_source"])
         joueur_dest = game_data.player_manager.get_player(data["joueur_dest"]) if data.get("joueur_dest") else None
@@ -225,6 +389,9 @@ def add_transport():
             ville_source, ville_dest, ressources, nb_bateaux, joueur_source, joueur_dest, 
             duree_chargement, duree_transport, etat=etat, temps_restant=temps_restant
         )
+        current_unit_of_work().add(
+            "add_transport", data, cities=[ville_source], players=[joueur_source], transports=[t]
+        )
         return jsonify({
             "success": True,
             "transport": t.to_dict() if hasattr(t, "to_dict") else t,
@@ -236,14 +403,20 @@ def add_transport():
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route("/cancel_transport", methods=["POST"])
+@mutates_state
 def cancel_transport():
     data = request.get_json()
     transport_id = data.get("transport_id")
     if not transport_id:
         return jsonify({"success": False, "error": "Missing transport_id"}), 400
     try:
+        transport = game_data.transport_manager.get_transport(transport_id)
         result = game_data.transport_manager.cancel_transport_by_id(transport_id)
         if result:
+            current_unit_of_work().add(
+                "cancel_transport", data, cities=[transport.ville_source], players=[transport.joueur_source],
+                transports=[transport]
+            )
             return jsonify({"success": True})
         else:
             return jsonify({"success": False, "error": "Transport not found or already completed"}), 404
@@ -266,6 +439,7 @@ def get_transports_for_player():
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route("/buy_ship", methods=["POST"])
+@mutates_state
 def buy_ship():
     data = request.get_json()
     joueur_id = data.get("joueur_id")
@@ -274,7 +448,7 @@ def buy_ship():
         return jsonify({"success": False, "error": "Missing joueur_id or ville_id"}), 400
     try:
         joueur = game_data.player_manager.get_player(joueur_id)
-        ville = game_data.city_manager.get_city_by_id(ville_id)
+        ville = game_data.city_manager.get_settled_city(ville_id)
         if not joueur or not ville:
             return jsonify({"success": False, "error": "City or player not found"}), 400
         price = int(100 * (1.5 ** (getattr(joueur, 'ships', 1) - 1)))
@@ -283,6 +457,7 @@ def buy_ship():
         ville.resources["gold"] -= price
         joueur.ships = getattr(joueur, "ships", 0) + 1
         joueur.ships_available = getattr(joueur, "ships_available", 0) + 1
+        current_unit_of_work().add("buy_ship", data, cities=[ville], players=[joueur])
         return jsonify({
             "success": True,
             "ships": joueur.ships,
@@ -293,6 +468,7 @@ def buy_ship():
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/add_diamonds', methods=['POST'])
+@mutates_state
 def add_diamonds():
     data = request.get_json()
     player_id = data.get('player_id')
@@ -301,9 +477,11 @@ def add_diamonds():
     if not player:
         return jsonify({"success": False, "message": "Joueur introuvable"})
     player.add_diamonds(amount)
+    current_unit_of_work().add("add_diamonds", data, players=[player])
     return jsonify({"success": True, "diamonds": player.diamonds})
 
 @app.route("/select_city", methods=["POST"])
+@mutates_state
 def select_city():
     data = request.get_json()
     username = data.get("username")
@@ -311,17 +489,27 @@ def select_city():
     if not username or not city_id:
         return jsonify({"error": "Missing parameters"}), 400
     player = game_data.player_manager.get_player_by_username(username)
-    city = game_data.city_manager.get_city_by_id(city_id)
+    city = game_data.city_manager.get_settled_city(city_id)
     if not player or not city:
         return jsonify({"error": "Player or city not found"}), 404
     if city.owner not in ["", player.id_player]:
         return jsonify({"error": "City already owned by someone else"}), 403
+    if game_data.player_manager.players.get(player.id_player) is not player:
+        # Compte connu mais pas encore entré dans la partie : /join (avec mot de passe) d'abord
+        return jsonify({"error": "Player has not joined the game"}), 409
     city.owner = player.id_player
-    save_load_manager.save_game()
+    current_unit_of_work().add("select_city", data, cities=[city], players=[player])
     return jsonify({"status": "city_selected", "city": city.to_dict(), "city_id": getattr(city, 'id', None)})
 
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
+    try:
+        # waitress est optionnel : le serveur de développement de Flask ferme la connexion après chaque réponse,
+        # ce qui annule le keep-alive de la session du client (NetworkManager)
+        from waitress import serve
+    except ImportError:
+        app.run(host="0.0.0.0", port=5000, threaded=True)
+    else:
+        serve(app, host="0.0.0.0", port=5000, threads=SERVER_THREADS)
\ No newline at end of file
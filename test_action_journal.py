@@ -0,0 +1,83 @@
+"""
+Test du journal d'actions (SaveLoadManager.record_action / _replay_journal).
+Simule un arrêt brutal entre deux instantanés et vérifie que le rejeu du journal redonne l'état en mémoire.
+"""
+
+from models.game_data import GameData
+from managers.persistence_queue import UnitOfWork
+from managers.save_load_manager import SaveLoadManager
+
+PLAYER_ID = "player_1"
+
+
+def _game(tmp_path):
+    """Partie dont l'instantané et le journal sont écrits dans tmp_path."""
+    game_data = GameData()
+    game_data.save_load_manager = SaveLoadManager(game_data, journal_path=str(tmp_path / "actions_journal.jsonl"))
+    game_data.save_load_manager.snapshot_path = str(tmp_path / "savegame.json")
+    return game_data
+
+
+def _add_transport(game_data, source, dest, wood):
+    """Crée un transport comme la route /add_transport (unité de travail validée dans la file de persistance)."""
+    player = game_data.player_manager.get_player(PLAYER_ID)
+    transport = game_data.transport_manager.create_and_add_transport(
+        source, dest, {"wood": wood}, 1, player, player, duree_chargement=1, duree_transport=2
+    )
+    unit = UnitOfWork()
+    unit.add("add_transport", {"wood": wood}, cities=[source], players=[player], transports=[transport])
+    game_data.save_load_manager.persistence_queue.submit(unit)
+    return transport
+
+
+def test_replay_keeps_cargo_credited_by_tick(tmp_path):
+    game_data = _game(tmp_path)
+    save_load_manager = game_data.save_load_manager
+    source, dest = game_data.city_manager.get_all_cities()[:2]
+    source.owner = dest.owner = PLAYER_ID
+    source.resources["wood"] = 500
+    dest.resources["wood"] = 0
+    game_data.player_manager.get_player(PLAYER_ID).ships_available = 5
+
+    first = _add_transport(game_data, source, dest, 100)
+    save_load_manager.persistence_queue.flush()
+    assert save_load_manager.save_game(force=True)
+    save_load_manager.flush()
+
+    # Le tick fait arriver le premier transport : la ville de destination est créditée hors de toute route
+    game_data.transport_manager.update_transports(1.0)
+    game_data.transport_manager.update_transports(2.0)
+    assert game_data.transport_manager.get_transport(first.id) is None
+    assert dest.resources["wood"] == 100
+
+    # Une autre action crée un second transport, puis le serveur s'arrête brutalement
+    second = _add_transport(game_data, source, dest, 50)
+    save_load_manager.persistence_queue.flush()
+
+    # Le journal ne contient que les transports touchés : l'arrivée retire le premier, la création écrit le second
+    records = save_load_manager.journal.read_after(0)
+    assert all("transports" not in record for record in records)
+    assert [t["id"] for record in records for t in record.get("transport_changes", [])] == [second.id]
+    assert [i for record in records for i in record.get("removed_transports", [])] == [first.id]
+    assert records[-1]["next_transport_id"] == second.id + 1
+
+    restored = _game(tmp_path)
+    restored.save_load_manager.load_game()
+    restored_source = restored.city_manager.get_city_by_id(source.id)
+    restored_dest = restored.city_manager.get_city_by_id(dest.id)
+    assert restored_dest.resources["wood"] == 100
+    assert restored_source.resources["wood"] == 350
+    assert [t.id for t in restored.transport_manager.transports] == [second.id]
+    assert restored.player_manager.get_player(PLAYER_ID).ships_available == 4
+
+
+def test_replayed_player_is_updated_in_place(tmp_path):
+    game_data = _game(tmp_path)
+    player = game_data.player_manager.get_player(PLAYER_ID)
+    player_dict = dict(player.to_dict(), diamonds=7, ships=3, ships_available=2)
+
+    # Les références tenues ailleurs (transports, vues liées aux propriétés) voient l'état rejoué
+    assert game_data.apply_player_dict(PLAYER_ID, player_dict) is player
+    assert game_data.player_manager.get_player(PLAYER_ID) is player
+    assert (player.diamonds, player.ships, player.ships_available) == (7, 3, 2)
+    assert game_data.player_manager.get_player_by_username(player.username) is player
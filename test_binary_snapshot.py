@@ -0,0 +1,53 @@
+"""
+Test du format binaire des sauvegardes (database.binary_snapshot).
+Vérifie l'aller-retour valeur par valeur, types compris : 50 == 50.0 masquerait un entier relu en flottant.
+"""
+
+import json
+
+import pytest
+
+from database.binary_snapshot import decode_snapshot, encode_snapshot
+
+
+def _assert_same(actual, expected, path="document"):
+    assert type(actual) is type(expected), f"{path}: {type(actual).__name__} au lieu de {type(expected).__name__}"
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected), path
+        for key in expected:
+            _assert_same(actual[key], expected[key], f"{path}/{key}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            _assert_same(a, e, f"{path}/{i}")
+    else:
+        assert actual == expected, path
+
+
+def test_round_trip_keeps_number_types():
+    document = {
+        "effect": {"max_workers": 50, "resource_bonus": 2.5, "population_capacity": 120},
+        "storage": {"wood": 1000, "stone": 1000},
+        "resources": {"wood": 12.75, "stone": 3.0},
+        "same_keys": [{"wood": 1, "stone": 2.0}, {"wood": 1.5, "stone": 2}],
+        "big": 2**70,
+        "flags": [True, False, None, 0, -1, 1.0],
+        "text": "Hôtel de Ville",
+        "repeated": ["Hôtel de Ville", "Hôtel de Ville"],
+        "empty": {},
+    }
+    _assert_same(decode_snapshot(encode_snapshot(document)), document)
+
+
+def test_round_trip_savegame():
+    with open("savegame.json", encoding="utf-8") as f:
+        document = json.load(f)
+    blob = encode_snapshot(document)
+    _assert_same(decode_snapshot(blob), document)
+    assert len(blob) < len(json.dumps(document))
+
+
+def test_truncated_snapshot_is_rejected():
+    blob = encode_snapshot({"wood": 1, "stone": 2})
+    with pytest.raises(Exception):
+        decode_snapshot(blob[:-4])
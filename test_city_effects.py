@@ -0,0 +1,34 @@
+"""
+Test du cache des effets de bâtiments (City.get_effects / CityEffects).
+Pendant une amélioration, l'Hôtel de Ville compte à son niveau précédent jusqu'à la fin du timer,
+puis à son nouveau niveau, même avant que la construction ne soit marquée terminée.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from data.buildings_database import buildings_database
+from models.building import Building
+from models.game_data import GameData
+
+TOWN_HALL = "Hôtel de Ville"
+
+
+def _capacity(level):
+    return buildings_database[TOWN_HALL]["levels"][level - 1]["effect"]["population_capacity"]
+
+
+def test_effects_follow_display_level_during_upgrade():
+    city = GameData().city_manager.get_all_cities()[0]
+    duration = 100
+    started_at = datetime.now(timezone.utc) - timedelta(seconds=duration - 1.5)
+    city.set_building_by_index(11, Building(
+        name=TOWN_HALL, level=2, status="En construction", started_at=started_at.isoformat(), build_duration=duration,
+    ))
+    assert _capacity(1) != _capacity(2)
+
+    assert city.get_effects().population_limit == _capacity(1)
+    time.sleep(1.6)
+    # Aucune invalidation explicite : le timer est écoulé, le bâtiment est encore « En construction »
+    assert city.get_buildings()[11].get_status() == "En construction"
+    assert city.get_effects().population_limit == _capacity(2)
@@ -0,0 +1,23 @@
+"""
+Test du bus d'événements du canal /events (EventBus).
+Vérifie la limite d'abonnements ouverts : au-delà, le client reste sur l'interrogation périodique.
+"""
+
+from managers.event_bus import EventBus
+
+
+def test_subscriptions_are_capped_and_released():
+    bus = EventBus(max_subscriptions=2)
+    first = bus.subscribe("player_1")
+    second = bus.subscribe("player_2")
+    assert first is not None and second is not None
+    assert bus.subscribe("player_3") is None
+
+    bus.unsubscribe(first)
+    bus.unsubscribe(first)  # Double désabonnement (fin du flux après une erreur) : compté une seule fois
+    third = bus.subscribe("player_3")
+    assert third is not None
+    assert bus.subscribe("player_1") is None
+
+    bus.publish("notification", {"text": "ok"}, players=["player_3"])
+    assert third.drain(0) == [("notification", '{"text": "ok"}')]
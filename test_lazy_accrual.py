@@ -0,0 +1,91 @@
+"""
+Test du règlement paresseux (ResourceManager.settle_city).
+Vérifie qu'un seul règlement après une longue absence donne le même état que le tick d'une seconde,
+famine comprise, sur les villes de savegame.json.
+"""
+
+import json
+import math
+
+from models.constants import RESOURCE_KEYS
+from models.game_data import GameData
+
+ELAPSED = 600
+COMPARED = ("population_total", "cereal", "gold", "satisfaction") + tuple(RESOURCE_KEYS)
+
+
+def _load_world(cereal, cereal_workers=None):
+    game_data = GameData()
+    with open("savegame.json", encoding="utf-8") as f:
+        game_data.from_dict(json.load(f))
+    cities = [city for city in game_data.city_manager.get_all_cities() if city.owner]
+    for city in cities:
+        city.resources["cereal"] = cereal
+        if cereal_workers is not None:
+            city.workers_assigned["cereal"] = cereal_workers
+    return game_data, cities
+
+
+def _state(city):
+    return {key: city.get_resources().get(key, 0) for key in COMPARED} | {
+        "famine": "famine" in city.satisfaction_factors.get("malus", {}),
+    }
+
+
+def _assert_settle_matches_ticks(cereal, cereal_workers=None):
+    reference, reference_cities = _load_world(cereal, cereal_workers)
+    for _ in range(ELAPSED):
+        reference.resource_manager.update_all(1.0)
+
+    game_data, cities = _load_world(cereal, cereal_workers)
+    resource_manager = game_data.resource_manager
+    resource_manager.lazy_accrual = True
+    for city in cities:
+        city.last_accrued_at = 0
+        resource_manager.settle_city(city, now=ELAPSED)
+
+    for expected_city, city in zip(reference_cities, cities):
+        expected, settled = _state(expected_city), _state(city)
+        assert settled["famine"] == expected["famine"], f"{city.id}: {settled} != {expected}"
+        for key in COMPARED:
+            assert math.isclose(settled[key], expected[key], rel_tol=1e-9, abs_tol=1e-6), (
+                f"{city.id}/{key}: règlement={settled[key]} tick={expected[key]}"
+            )
+
+
+def test_settle_matches_ticks_with_cereal_production():
+    _assert_settle_matches_ticks(cereal=200)
+
+
+def test_settle_matches_ticks_through_famine():
+    _assert_settle_matches_ticks(cereal=200, cereal_workers=0)
+
+
+def test_settle_matches_ticks_with_full_granary():
+    _assert_settle_matches_ticks(cereal=5000, cereal_workers=0)
+
+
+def test_settle_steps_only_at_threshold_crossings():
+    game_data, cities = _load_world(cereal=200)
+    resource_manager = game_data.resource_manager
+    resource_manager.lazy_accrual = True
+    population = resource_manager.resources["population"]
+    update_population_growth = population.update_population_growth
+    steps = []
+    population.update_population_growth = lambda city, dt: steps.append(dt) or update_population_growth(city, dt)
+    for city in cities:
+        city.last_accrued_at = 0
+        resource_manager.settle_city(city, now=ELAPSED)
+    # Croissance, famine et plafonds sont franchis pas à pas ; le reste est réglé d'un bloc
+    assert len(steps) < len(cities) * ELAPSED / 10
+
+
+def test_lookup_does_not_settle():
+    game_data, cities = _load_world(cereal=200)
+    game_data.resource_manager.lazy_accrual = True
+    city = cities[0]
+    city.last_accrued_at = 0
+    assert game_data.city_manager.get_city_by_id(city.id) is city
+    assert city.last_accrued_at == 0
+    assert game_data.city_manager.get_settled_city(city.id) is city
+    assert city.last_accrued_at > 0
@@ -0,0 +1,152 @@
+"""
+Test de la validation temporisée des unités de travail (managers.persistence_queue, routes.unit_of_work).
+Une rafale de validations devient une seule écriture de journal ; une route qui modifie l'état s'exécute sous
+state_lock et son unité de travail est validée après réponse.
+"""
+
+import threading
+import time
+
+from flask import Flask
+
+from models.game_data import GameData  # noqa: F401 (ordre d'import des managers)
+from managers.persistence_queue import PersistenceQueue, UnitOfWork
+from routes.unit_of_work import current_unit_of_work, init_unit_of_work, mutates_state, unit_of_work_environ
+
+
+class _SaveLoadManager:
+    """Remplace SaveLoadManager : retient les entités marquées et les enregistrements de journal."""
+
+    def __init__(self, delay=0.05, max_delay=1.0):
+        self.state_lock = threading.Lock()
+        self.persistence_queue = PersistenceQueue(self, delay=delay, max_delay=max_delay)
+        self.dirty = []
+        self.records = []
+
+    def mark_dirty(self, entity):
+        self.dirty.append(entity)
+
+    def record_action(self, action, data, cities=(), players=(), sites=(), transports=()):
+        self.records.append({"action": action, "data": data, "cities": cities, "players": players,
+                             "transports": transports, "at": time.monotonic()})
+
+
+def _unit(action, data, city):
+    unit = UnitOfWork()
+    unit.add(action, data, cities=[city])
+    return unit
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_burst_is_written_once_after_delay():
+    manager = _SaveLoadManager(delay=0.1, max_delay=2.0)
+    queue = manager.persistence_queue
+    city = {"id": "city_id_1"}
+    started = time.monotonic()
+    for amount in range(5):
+        queue.submit(_unit("donate", {"amount": amount}, city))
+    assert manager.dirty == [city] * 5  # Marquées pour l'instantané dès la validation
+
+    assert _wait_for(lambda: manager.records)
+    time.sleep(0.2)
+    assert queue.commits == 5 and queue.writes == 1
+    record = manager.records[0]
+    assert record["action"] == "donate"
+    assert record["data"] == [{"amount": amount} for amount in range(5)]
+    assert record["cities"] == [city]  # Une ville touchée cinq fois n'est écrite qu'une fois
+    assert record["at"] - started >= 0.1
+
+
+def test_continuous_commits_are_written_within_max_delay():
+    manager = _SaveLoadManager(delay=0.1, max_delay=0.3)
+    queue = manager.persistence_queue
+    city = {"id": "city_id_1"}
+    started = time.monotonic()
+    while time.monotonic() - started < 0.8:
+        queue.submit(_unit("upgrade", None, city))
+        time.sleep(0.02)
+    # La rafale ne s'arrête jamais plus de delay : seules les écritures forcées par max_delay ont lieu
+    assert manager.records
+    assert manager.records[0]["at"] - started < 0.3 + 0.2
+    assert queue.flush(timeout=2.0)
+    assert sum(len(record["data"]) for record in manager.records) == queue.commits
+
+
+def test_flush_writes_pending_work_immediately():
+    manager = _SaveLoadManager(delay=60, max_delay=60)
+    queue = manager.persistence_queue
+    queue.submit(_unit("build", {"slot": 2}, {"id": "city_id_1"}))
+    assert not manager.records
+    assert queue.flush(timeout=2.0)
+    assert [record["data"] for record in manager.records] == [[{"slot": 2}]]
+
+
+def test_mutating_route_runs_under_state_lock_and_commits_after_response():
+    manager = _SaveLoadManager(delay=60, max_delay=60)
+    app = Flask(__name__)
+    init_unit_of_work(app, manager)
+    city = {"id": "city_id_1"}
+    seen = {}
+
+    @app.route("/donate", methods=["POST"])
+    @mutates_state
+    def donate():
+        seen["locked"] = manager.state_lock.locked()
+        current_unit_of_work().add("donate", {"amount": 10}, cities=[city])
+        current_unit_of_work().add("donate", {"amount": 5}, cities=[city])
+        seen["commits"] = manager.persistence_queue.commits
+        return "ok"
+
+    @app.route("/details", methods=["POST"])
+    def details():
+        seen["read_locked"] = manager.state_lock.locked()
+        return "ok"
+
+    client = app.test_client()
+    assert client.post("/donate").status_code == 200
+    assert seen["locked"] and seen["commits"] == 0  # Validée après la route, pas pendant
+    assert not manager.state_lock.locked()
+    assert manager.persistence_queue.commits == 1  # Une seule validation par requête
+
+    # Une lecture, même en POST, ne prend pas le verrou et n'a rien à valider
+    assert client.post("/details").status_code == 200
+    assert not seen["read_locked"]
+    assert manager.persistence_queue.commits == 1
+
+    assert manager.persistence_queue.flush(timeout=2.0)
+    assert [record["data"] for record in manager.records] == [[{"amount": 10}, {"amount": 5}]]
+
+
+def test_sub_requests_share_only_the_unit_of_work_they_are_given():
+    manager = _SaveLoadManager(delay=60, max_delay=60)
+    app = Flask(__name__)
+    init_unit_of_work(app, manager)
+    city = {"id": "city_id_1"}
+
+    @app.route("/rename", methods=["POST"])
+    @mutates_state
+    def rename():
+        current_unit_of_work().add("rename", {"name": "Rome"}, cities=[city])
+        return "ok"
+
+    @app.route("/lot", methods=["POST"])
+    def lot():
+        # Comme /batch : chaque action reçoit explicitement l'unité de travail du lot
+        unit = current_unit_of_work()
+        for _ in range(2):
+            with app.test_request_context("/rename", method="POST", environ_overrides=unit_of_work_environ(unit)):
+                app.view_functions["rename"]()
+        with app.test_request_context("/rename", method="POST"):
+            assert current_unit_of_work() is not unit  # Sans environnement explicite : unité distincte
+        return "ok"
+
+    assert app.test_client().post("/lot").status_code == 200
+    assert manager.persistence_queue.commits == 1
+    assert manager.persistence_queue.flush(timeout=2.0)
+    assert [record["data"] for record in manager.records] == [[{"name": "Rome"}, {"name": "Rome"}]]
@@ -0,0 +1,47 @@
+"""
+Test des comptes joueurs (PlayerManager) : créations simultanées ajoutées au journal des comptes.
+"""
+
+import threading
+
+from models.game_data import GameData
+
+
+def test_concurrent_accounts_are_all_journaled(tmp_path):
+    game_data = GameData()
+    player_manager = game_data.player_manager
+    player_manager.PLAYERS_JOURNAL_FILE = str(tmp_path / "players_table.jsonl")
+    names = [f"joueur_{i}" for i in range(20)]
+    threads = [threading.Thread(target=player_manager.create_account, args=(name, "pw")) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    journaled = {account["username"] for account in player_manager._load_players_journal()}
+    assert journaled == set(names)
+    ids = [player_manager.get_player_by_username(name).id_player for name in names]
+    assert len(set(ids)) == len(names)
+
+
+def test_compaction_moves_journaled_accounts_into_table(tmp_path):
+    game_data = GameData()
+    player_manager = game_data.player_manager
+    player_manager.PLAYERS_FILE = str(tmp_path / "players_table.json")
+    player_manager.PLAYERS_JOURNAL_FILE = str(tmp_path / "players_table.jsonl")
+    for name in ("alice", "bob"):
+        player_manager.create_account(name, "pw")
+    assert len(player_manager._load_players_journal()) == 2
+
+    player_manager.save_players_table()
+    assert player_manager._load_players_journal() == []
+    tabled = {account["username"] for account in player_manager._load_players_file()}
+    assert {"alice", "bob"} <= tabled
+
+    # Un compte créé après la compaction repart dans le journal ; la relecture voit la table et le journal
+    player_manager.create_account("carol", "pw")
+    reloaded = GameData().player_manager
+    reloaded.PLAYERS_FILE = player_manager.PLAYERS_FILE
+    reloaded.PLAYERS_JOURNAL_FILE = player_manager.PLAYERS_JOURNAL_FILE
+    reloaded._accounts = None
+    assert reloaded.authenticate_user("carol", "pw") and reloaded.authenticate_user("alice", "pw")
@@ -0,0 +1,129 @@
+"""
+Script de test du moteur de production vectorisé (ResourceEngine).
+Vérifie que ResourceManager.update_all donne le même état avec NumPy qu'avec la boucle Python historique,
+y compris dans le mode "numpy" du serveur (villes réglées et modifiées par les routes entre deux ticks).
+"""
+
+import copy
+import math
+import random
+
+import pytest
+
+from data.buildings_database import buildings_database
+from models.building import Building
+from models.constants import RESOURCE_KEYS
+from models.game_data import GameData
+
+TICKS = 60
+DT = 1.0
+
+
+def _prepare_cities(game_data):
+    """
+    Affecte des propriétaires, une population, des ouvriers, des stocks et quelques bâtiments
+    de bonus/stockage de façon reproductible. Certaines villes ont plus d'ouvriers que d'habitants
+    et peu de céréales : la population décroît et retire des ouvriers pendant le test.
+    """
+    rng = random.Random(42)
+    player_ids = list(game_data.player_manager.players)
+    for i, city in enumerate(game_data.city_manager.get_all_cities()):
+        if i % 5:
+            city.owner = player_ids[i % len(player_ids)]
+        city.resources["population_total"] = rng.choice([5, 40, 120])
+        for key in RESOURCE_KEYS:
+            city.workers_assigned[key] = rng.choice([0, 0, 3, 10, 25])
+            city.resources[key] = rng.uniform(0, 2500)
+        for slot, name in enumerate(["Entrepôt", "Scierie", "Mine"][: i % 4]):
+            level = 1 + (i % 3)
+            effect = buildings_database[name]["levels"][level - 1]["effect"]
+            city.set_building_by_index(slot, Building(name=name, level=level, status="Terminé", effect=effect))
+        if i % 3 == 0:
+            effect = buildings_database["Hôtel de Ville"]["levels"][1]["effect"]
+            city.set_building_by_index(11, Building(name="Hôtel de Ville", level=2, status="Terminé", effect=effect))
+
+
+def _snapshot(game_data):
+    cities = {
+        city.id: copy.deepcopy(dict(city.resources)) | {"workers": dict(city.workers_assigned)}
+        for city in game_data.city_manager.get_all_cities()
+    }
+    players = {player_id: player.research_points for player_id, player in game_data.player_manager.players.items()}
+    return cities, players
+
+
+def _run(batch):
+    game_data = GameData()
+    resource_manager = game_data.resource_manager
+    _prepare_cities(game_data)
+    if batch:
+        assert resource_manager.enable_batch_engine(), "NumPy indisponible"
+    for _ in range(TICKS):
+        resource_manager.update_all(DT)
+    resource_manager.settle_all()
+    return _snapshot(game_data)
+
+
+def _assert_close(actual, expected, label):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys(), label
+        for key in expected:
+            _assert_close(actual[key], expected[key], f"{label}/{key}")
+    elif isinstance(expected, (int, float)):
+        assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-6), f"{label}: moteur={actual} référence={expected}"
+    else:
+        assert actual == expected, label
+
+
+def test_resource_engine_matches_reference():
+    # Référence : boucle Python historique de ResourceManager.update_all
+    expected_cities, expected_players = _run(batch=False)
+    # Moteur vectorisé depuis le même état initial
+    cities, players = _run(batch=True)
+
+    _assert_close(cities, expected_cities, "villes")
+    _assert_close(players, expected_players, "joueurs")
+
+
+def _run_numpy_mode(batch):
+    """Mode "numpy" du serveur : ticks, et entre deux ticks des routes qui lisent puis dépensent des ressources."""
+    game_data = GameData()
+    resource_manager = game_data.resource_manager
+    _prepare_cities(game_data)
+    if batch:
+        assert resource_manager.enable_batch_engine(), "NumPy indisponible"
+    cities = game_data.city_manager.get_all_cities()
+    seen = []
+    for tick in range(TICKS):
+        resource_manager.update_all(DT)
+        if tick % 10 == 0:
+            # Comme une route : ville réglée (stock rendu par le moteur), lue puis modifiée
+            city = game_data.city_manager.get_settled_city(cities[tick % len(cities)].id)
+            seen.append(city.resources["wood"])
+            city.resources["wood"] = city.resources["wood"] / 2
+    resource_manager.settle_all()
+    return seen, _snapshot(game_data)
+
+
+def test_numpy_mode_serves_settled_cities():
+    expected_seen, (expected_cities, expected_players) = _run_numpy_mode(batch=False)
+    seen, (cities, players) = _run_numpy_mode(batch=True)
+
+    assert len(seen) == len(expected_seen)
+    for actual, expected in zip(seen, expected_seen):
+        _assert_close(actual, expected, "lecture des routes")
+    _assert_close(cities, expected_cities, "villes")
+    _assert_close(players, expected_players, "joueurs")
+
+
+def test_numpy_mode_excludes_lazy_accrual():
+    resource_manager = GameData().resource_manager
+    resource_manager.enable_lazy_accrual()
+    with pytest.raises(ValueError):
+        resource_manager.enable_batch_engine()
+    assert resource_manager.batch_engine is None
+
+
+if __name__ == "__main__":
+    test_resource_engine_matches_reference()
+    print("✅ ResourceEngine conforme à ResourceManager.update_all")
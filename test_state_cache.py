@@ -0,0 +1,94 @@
+"""
+Test du cache des réponses d'état par version (managers.state_cache, routes.state_responses).
+Un client qui possède la version courante reçoit 304 ; toute modification change la version, l'ETag et la réponse.
+"""
+
+import json
+
+from flask import Flask
+
+from models.game_data import GameData
+from managers.save_load_manager import SaveLoadManager
+from managers.state_cache import StateCache
+from routes import state_responses
+
+
+def _server(tmp_path):
+    game_data = GameData()
+    game_data.save_load_manager = SaveLoadManager(game_data, journal_path=str(tmp_path / "actions_journal.jsonl"))
+    save_load_manager = game_data.save_load_manager
+    state_cache = StateCache(save_load_manager.versions)
+    app = Flask(__name__)
+    state_responses.inject_dependencies(app, state_cache, save_load_manager)
+
+    @app.route("/get_state")
+    def get_state():
+        with save_load_manager.state_lock:
+            return state_responses.versioned_state(None, game_data.to_dict, game_data.to_delta)
+
+    return game_data, state_cache, app.test_client()
+
+
+def test_current_version_is_answered_with_304(tmp_path):
+    game_data, state_cache, client = _server(tmp_path)
+    first = client.get("/get_state")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert json.loads(first.data)["full"]
+
+    not_modified = client.get("/get_state", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
+    assert not_modified.headers["ETag"] == etag
+
+    # Sans If-None-Match, la réponse déjà encodée est resservie telle quelle
+    misses = state_cache.misses
+    again = client.get("/get_state")
+    assert again.data == first.data
+    assert state_cache.misses == misses and state_cache.hits >= 1
+
+
+def test_modification_invalidates_cached_state(tmp_path):
+    game_data, state_cache, client = _server(tmp_path)
+    first = client.get("/get_state")
+    etag = first.headers["ETag"]
+    full = json.loads(first.data)
+
+    city = game_data.city_manager.get_all_cities()[0]
+    city.name = "Nouvelle Rome"
+    changed = client.get("/get_state", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    state = json.loads(changed.data)
+    assert state["version"] > full["version"]
+    names = {elem["id"]: elem["name"] for island in state["islands"] for elem in island["elements"] if elem.get("type") == "city"}
+    assert names[city.id] == "Nouvelle Rome"
+    # L'ancienne version n'est plus servie
+    assert state_cache.get(None, None, full["version"]) is None
+
+    delta = client.get("/get_state", query_string={"since": full["version"], "epoch": full["epoch"]})
+    assert delta.status_code == 200
+    delta_state = json.loads(delta.data)
+    assert not delta_state["full"]
+    assert [c["name"] for c in delta_state["cities"] if c["id"] == city.id] == ["Nouvelle Rome"]
+
+
+def test_settled_production_is_versioned_once_per_state(tmp_path):
+    game_data, state_cache, client = _server(tmp_path)
+    versions = game_data.save_load_manager.versions
+    first = client.get("/get_state")
+    etag = first.headers["ETag"]
+
+    # Règlement de la production de toutes les villes : aucune action de joueur, aucune nouvelle version
+    version = versions.version
+    for city in game_data.city_manager.get_all_cities():
+        city.resources["wood"] = city.resources.get("wood", 0) + 1
+        city.resources["gold"] = city.resources.get("gold", 0) + 1
+    assert versions.version == version
+
+    # L'état suivant les versionne toutes d'un coup ; sans nouveau règlement, 304 ensuite
+    changed = client.get("/get_state", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and versions.version == version + 1
+    assert client.get("/get_state", headers={"If-None-Match": changed.headers["ETag"]}).status_code == 304
+    delta = json.loads(client.get("/get_state", query_string={"since": version, "epoch": versions.epoch}).data)
+    assert len(delta["settled"]) == len(game_data.city_manager.get_all_cities())
@@ -0,0 +1,111 @@
+"""
+Test de la synchronisation différentielle (GameData.to_delta / apply_state) et de la vue limitée (to_player_dict).
+Un client synchronisé reçoit, par différentiel, les modifications faites par un autre joueur sur le serveur ;
+la vue d'un joueur ne détaille que ses villes, son compte, ses transports et les sites de ses îles.
+"""
+
+import json
+
+from models.game_data import GameData
+from managers.save_load_manager import SaveLoadManager
+
+
+def _server(tmp_path):
+    game_data = GameData()
+    game_data.save_load_manager = SaveLoadManager(game_data, journal_path=str(tmp_path / "actions_journal.jsonl"))
+    game_data.player_manager.PLAYERS_JOURNAL_FILE = str(tmp_path / "players_table.jsonl")
+    game_data.save_load_manager.track_all()
+    return game_data
+
+
+def _full_state(server):
+    """État complet tel qu'envoyé par /get_state (voir server._encoded_state)."""
+    versions = server.save_load_manager.versions
+    state = server.to_dict()
+    state.update({"full": True, "version": versions.version, "epoch": versions.epoch})
+    return json.loads(json.dumps(state))
+
+
+def _delta(server, since, player_id=None):
+    return json.loads(json.dumps(server.to_delta(since, player_id=player_id)))
+
+
+def test_delta_carries_city_change(tmp_path):
+    server = _server(tmp_path)
+    client = GameData()
+    full = _full_state(server)
+    assert client.apply_state(full)
+
+    city = server.city_manager.get_all_cities()[0]
+    city.name = "Nouvelle Rome"
+    city.resources["wood"] = 1234
+    assert client.apply_state(_delta(server, full["version"]))
+
+    synced = client.city_manager.get_city_by_id(city.id)
+    assert synced.name == "Nouvelle Rome"
+    assert synced.resources["wood"] == 1234
+    assert client.state_version == server.save_load_manager.versions.version
+
+
+def test_delta_after_join_reaches_other_clients(tmp_path):
+    server = _server(tmp_path)
+    watcher = GameData()
+    full = _full_state(server)
+    assert watcher.apply_state(full)
+
+    # Un nouveau joueur rejoint la partie (/join) puis choisit une ville libre (/select_city)
+    player = server.player_manager.join("nouveau_joueur", "secret")
+    city = next(c for c in server.city_manager.get_all_cities() if not c.owner)
+    city.owner = player.id_player
+
+    assert watcher.apply_state(_delta(server, full["version"]))
+    assert watcher.player_manager.players[player.id_player].username == "nouveau_joueur"
+    assert watcher.city_manager.get_city_by_id(city.id).owner == player.id_player
+
+    # Dans la vue du nouveau joueur, les sites de son île passent du résumé au détail
+    island = server.get_island_for_city(city.id)
+    own_sites = [elem for elem in island["elements"] if isinstance(elem, dict)]
+    delta = _delta(server, full["version"], player_id=player.id_player)
+    located = {site["position"]: site["site"] for site in delta["sites"] if site["island_coords"] == list(island["coords"])}
+    expected = {}
+    for site in own_sites:
+        own = json.loads(json.dumps(server.locate_site(site)))
+        expected[own["position"]] = own["site"]
+    assert located == expected
+
+
+def test_player_view_details_only_own_entities(tmp_path):
+    server = _server(tmp_path)
+    mine, theirs, theirs_too = (server.city_manager.get_city_by_id(city_id) for city_id in ("city_id_1", "city_id_4", "city_id_5"))
+    mine.owner = "player_1"
+    theirs.owner = theirs_too.owner = "player_2"
+    player_2 = server.player_manager.get_player("player_2")
+    player_2.password = "secret"
+    player_2.ships_available = 5
+    server.transport_manager.create_and_add_transport(
+        theirs, theirs_too, {"wood": 10}, 1, player_2, player_2, duree_chargement=1, duree_transport=2
+    )
+    for city in (mine, theirs):
+        for site in server.get_island_for_city(city.id)["elements"]:
+            if isinstance(site, dict):
+                site["donations"] = {city.id: {"wood": 5}}
+
+    view = json.loads(json.dumps(server.to_player_dict("player_1")))
+    cities = {elem["id"]: elem for island in view["islands"] for elem in island["elements"] if elem.get("type") == "city"}
+    assert cities[mine.id]["resources"] == json.loads(json.dumps(mine.to_dict()))["resources"]
+    assert cities[theirs.id] == json.loads(json.dumps(server.city_summary(theirs)))
+    assert view["players"]["player_1"] == json.loads(json.dumps(server.player_manager.get_player("player_1").to_dict()))
+    assert view["players"]["player_2"]["password"] == ""
+    assert view["transports"] == []  # Transport entre deux villes d'un autre joueur
+    for island in view["islands"]:
+        sites = [elem for elem in island["elements"] if elem.get("type") != "city"]
+        own_island = island["coords"] == list(mine.island_coords)
+        assert all(("donations" in site) == own_island for site in sites), island["name"]
+
+    # Le client applique la vue limitée comme un état complet
+    client = GameData()
+    versions = server.save_load_manager.versions
+    view.update({"full": True, "version": versions.version, "epoch": versions.epoch})
+    assert client.apply_state(view)
+    assert client.city_manager.get_city_by_id(mine.id).resources["wood"] == mine.resources["wood"]
+    assert client.city_manager.get_city_by_id(theirs.id).owner == "player_2"
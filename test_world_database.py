@@ -0,0 +1,99 @@
+"""
+Test du stockage SQLite normalisé (database.sauvegarde.WorldDatabase).
+Sauvegarde la partie dans la base puis la relit (load_world, load_game) et compare avec l'état d'origine.
+"""
+
+import json
+
+from models.game_data import GameData
+from managers.save_load_manager import SaveLoadManager
+
+PLAYER_ID = "player_1"
+
+
+def _game(tmp_path):
+    """Partie dont l'instantané, le journal et la base sont écrits dans tmp_path."""
+    game_data = GameData()
+    game_data.save_load_manager = SaveLoadManager(game_data, journal_path=str(tmp_path / "actions_journal.jsonl"))
+    game_data.save_load_manager.snapshot_path = str(tmp_path / "savegame.json")
+    return game_data
+
+
+def _first_site(game_data):
+    for island in game_data.islands:
+        for elem in island["elements"]:
+            if isinstance(elem, dict) and elem.get("type") != "city":
+                return elem
+    return None
+
+
+def _prepare(game_data):
+    """Ajoute un bâtiment, un transport et des dons de site pour remplir toutes les tables."""
+    source, dest = game_data.city_manager.get_all_cities()[:2]
+    source.owner = dest.owner = PLAYER_ID
+    source.resources["wood"] = 500
+    source.set_building_by_index(3, {"name": "Scierie", "level": 2, "status": "Terminé"})
+    player = game_data.player_manager.get_player(PLAYER_ID)
+    player.ships_available = 5
+    transport = game_data.transport_manager.create_and_add_transport(
+        source, dest, {"wood": 100}, 1, player, player, duree_chargement=1, duree_transport=2
+    )
+    site = _first_site(game_data)
+    site["donations"] = {source.id: {"wood": 40}}
+    site["donations_history"] = {source.id: {"wood": 40, "marble": 5}}
+    game_data.save_load_manager.mark_dirty(site)
+    return source, dest, site, transport
+
+
+def test_load_world_matches_json_snapshot(tmp_path):
+    game_data = _game(tmp_path)
+    save_load_manager = game_data.save_load_manager
+    _prepare(game_data)
+
+    assert save_load_manager.save_game(force=True)
+    save_load_manager.flush()
+    with open(tmp_path / "savegame.json", encoding="utf-8") as f:
+        expected = json.load(f)
+
+    save_load_manager.use_sqlite_backend(str(tmp_path / "savegame.db"))
+    assert save_load_manager.save_game(force=True)
+    save_load_manager.flush()
+    world = save_load_manager.database.load_world()
+
+    assert expected["transports"] and world["transports"] == expected["transports"]
+    expected.pop("saved_at")
+    world.pop("saved_at")
+    assert world == expected
+
+
+def test_incremental_batches_round_trip(tmp_path):
+    game_data = _game(tmp_path)
+    save_load_manager = game_data.save_load_manager
+    save_load_manager.use_sqlite_backend(str(tmp_path / "savegame.db"))
+    source, dest, site, transport = _prepare(game_data)
+    assert save_load_manager.save_game(force=True)
+    save_load_manager.flush()
+
+    # Point de sauvegarde incrémental : le transport est annulé, la ville source et le site changent
+    site["donations"] = {}
+    save_load_manager.mark_dirty(site)
+    assert game_data.transport_manager.annuler_transport(transport)
+    source.resources["wood"] = 123
+    assert save_load_manager.save_game()
+    save_load_manager.flush()
+
+    restored = _game(tmp_path)
+    restored.save_load_manager.use_sqlite_backend(str(tmp_path / "savegame.db"))
+    restored.save_load_manager.load_game()
+    restored_source = restored.city_manager.get_city_by_id(source.id)
+    restored_dest = restored.city_manager.get_city_by_id(dest.id)
+    assert restored_source.resources["wood"] == 123
+    assert restored_source.owner == restored_dest.owner == PLAYER_ID
+    assert restored.transport_manager.to_dict() == []
+    assert restored.player_manager.get_player(PLAYER_ID).ships_available == 5
+    restored_site = _first_site(restored)
+    assert restored_site["donations"] == {}
+    assert restored_site["donations_history"] == {source.id: {"wood": 40, "marble": 5}}
+    restored_building = restored_source.get_building_by_index(3)
+    assert (restored_building.get_name(), restored_building.level) == ("Scierie", 2)
+    assert restored_source.get_building_by_index(2) is None
@@ -0,0 +1,34 @@
+"""
+Conversion des sauvegardes entre savegame.json et le format binaire compact (savegame.bin).
+
+Utilisation :
+    python tools/convert_savegame.py to-binary [savegame.json] [savegame.bin]
+    python tools/convert_savegame.py to-json [savegame.bin] [savegame.json]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.binary_snapshot import convert_binary_to_json, convert_json_to_binary  # noqa: E402
+
+
+def main(argv):
+    if not argv or argv[0] not in ("to-binary", "to-json"):
+        print(__doc__)
+        return 1
+    if argv[0] == "to-binary":
+        source = argv[1] if len(argv) > 1 else "savegame.json"
+        target = argv[2] if len(argv) > 2 else "savegame.bin"
+        convert_json_to_binary(source, target)
+    else:
+        source = argv[1] if len(argv) > 1 else "savegame.bin"
+        target = argv[2] if len(argv) > 2 else "savegame.json"
+        convert_binary_to_json(source, target)
+    print(f"{source} -> {target} ({os.path.getsize(source)} -> {os.path.getsize(target)} octets)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
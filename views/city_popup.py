@@ -6,7 +6,6 @@ from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
 from models.transport import open_transport_popup_generic
 from models.transport import calculer_distance
-import requests
 
 class CityPopup:
     def __init__(self, game_data, manager, network_manager=None):
@@ -177,19 +176,18 @@ class CityPopup:
                 self.selected_city = city
 
                 # Synchronisation côté serveur
+                network_manager = self.network_manager or getattr(self.manager, "network_manager", None)
                 username = player.username  # ou adapte selon ton modèle
-                payload = {"username": username, "city_id": city_id}
-                try:
-                    resp = requests.post("http://localhost:5000/select_city", json=payload)
-                    print("[DEBUG][SYNC COLONIZATION]", resp.json())
-                except Exception as e:
-                    print("[ERROR][SYNC COLONIZATION]", e)
-
-                # Recharge l'état du jeu
-                response = requests.get("http://localhost:5000/get_state")
-                if response.ok:
-                    state = response.json()
-                    self.game_data.from_dict(state)
+                state = None
+                if network_manager is not None:
+                    print("[DEBUG][SYNC COLONIZATION]", network_manager.select_city(username, city_id))
+
+                    # Recharge l'état du jeu
+                    since = epoch = None
+                    if self.game_data.state_scope == player.id_player:
+                        since, epoch = self.game_data.state_version, self.game_data.state_epoch
+                    state = network_manager.get_state_for_player(player.id_player, since, epoch)
+                if state and self.game_data.apply_state(state):
                     self.game_data.current_player_id = player.id_player
                     print("[DEBUG] Etat du jeu rafraîchi après colonisation.")
                 else:
@@ -142,13 +142,14 @@ class CityView(RelativeLayout):
         return self.game_data.get_active_city()
 
     def sync_and_update_city(self):
-        def sync_task():
-            if self.network_manager is not None:
-                self.network_manager.sync_game_data(self.game_data)
+        if self.network_manager is None:
             from kivy.clock import Clock
             Clock.schedule_once(lambda dt: self.update_city())
-        import threading
-        threading.Thread(target=sync_task, daemon=True).start()
+            return
+        self.network_manager.submit(
+            self.network_manager.sync_game_data, self.game_data,
+            callback=lambda synced: self.update_city(), key=("sync", id(self.game_data)),
+        )
 
     def _display_slots(self, city_data, disabled=False):
         self.interactive_layout.clear_widgets()
@@ -294,6 +295,7 @@ class CityView(RelativeLayout):
                             city.set_buildings(city_update.get("buildings", []))
                         else:
                             city.buildings = City.deserialize_buildings(city_update.get("buildings", []), city=city)
+                            city.invalidate_effects()
                 self.sync_and_update_city()
             else:
                 error_msg = ""
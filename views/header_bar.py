@@ -1,5 +1,3 @@
-import threading
-
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
@@ -12,6 +10,8 @@ from config.style import STYLES, apply_button_style
 from data.buildings_database import buildings_database
 from models.city import City
 from popups.transport_list_popup import TransportsListPopup
+from network.event_stream import EventListener
+from network.refresh_hub import RefreshHub
 from widgets.menu_button import MenuButton
 
 # === POPUPS SPÉCIAUX ===
@@ -34,8 +34,8 @@ class ResourcePopup(Popup):
         layout.add_widget(self.productivity_label)
         self.add_widget(layout)
 
-        # Met à jour les données toutes les secondes
-        self._event = Clock.schedule_interval(self.update_data, 1)
+        # Met à jour les données toutes les secondes (après la requête d'état commune du RefreshHub)
+        self._event = RefreshHub.shared().subscribe("state", self.update_data, 1, widget=self)
         self.update_data(0)
 
     def update_data(self, dt):
@@ -56,7 +56,7 @@ class ResourcePopup(Popup):
         )
 
     def on_dismiss(self):
-        Clock.unschedule(self._event)
+        self._event.cancel()
 
 class GoldPopup(Popup):
     def __init__(self, city_data, manager, **kwargs):
@@ -145,6 +145,7 @@ class HeaderBar(BoxLayout):
         self.menu_button = MenuButton(
             joueur_id=joueur_id,
             notification_manager=manager.game_data.notification_manager,
+            network_manager=getattr(manager, "network_manager", None),
             text="MENU", size_hint=(0.2, 1)
         )
         apply_button_style(self.menu_button)
@@ -253,11 +254,15 @@ class HeaderBar(BoxLayout):
             self.line_ress3.add_widget(label)
         self.add_widget(self.line_ress3)
 
-        # Rafraîchit l'UI locale ET synchronise les ressources serveur toutes les secondes
-        Clock.schedule_interval(self.update_resources_from_game, 1)
+        # Rafraîchit l'UI à chaque état reçu : poussé par le canal d'événements, sinon obtenu chaque seconde
+        # par la requête d'état commune du RefreshHub (partagée avec les popups ouvertes)
         Clock.schedule_once(lambda dt: self.update_city_spinner(), 0)
-        # Ajoute un polling régulier pour les notifications (badge)
-        Clock.schedule_interval(self.refresh_badges, 5)
+        network_manager = getattr(manager, "network_manager", None)
+        self._state_listener = EventListener(
+            network_manager, "state", lambda state: self.refresh_from_game_data(update_badge=False), poll_interval=1
+        )
+        # Badge des notifications : à chaque notification poussée (interrogation toutes les 5 s sans canal)
+        self._badge_listener = EventListener(network_manager, "notification", self.refresh_badges, poll_interval=5)
 
     def _update_bg_rect(self, *args):
         self.bg_rect.pos = self.pos
@@ -370,22 +375,27 @@ class HeaderBar(BoxLayout):
             label.text = f"{resource.capitalize()}: {format_number_short(data.get('current_quantity', 0))}"
 
     def update_resources_from_game(self, dt):
-        def fetch_and_update():
-            try:
-                state = self.manager.network_manager.get_state()
-                if state:
-                    def update_ui(dt):
-                        self.manager.game_data.from_dict(state)
-                        active_city = self.get_city_data()
-                        if active_city:
-                            resources = active_city.get_resources()
-                            self.update_resources(resources, active_city)
-                        self.menu_button.update_badge()
-                        self.update_city_spinner()
-                    Clock.schedule_once(update_ui, 0)
-            except Exception as e:
-                pass
-        threading.Thread(target=fetch_and_update, daemon=True).start()
+        network_manager = self.manager.network_manager
+        if network_manager.event_stream_connected:
+            return  # L'état arrive par le canal d'événements (voir refresh_from_game_data)
+
+        # Requête non bloquante ; si la précédente n'a pas encore répondu, elle est réutilisée
+        network_manager.fetch_state_async(self.manager.game_data, self._apply_fetched_state)
+
+    def _apply_fetched_state(self, state):
+        if state:
+            self.manager.game_data.apply_state(state)  # En cas d'échec, le prochain tick recharge l'état complet
+            self.refresh_from_game_data()
+
+    def refresh_from_game_data(self, update_badge=True):
+        """Met à jour ressources, badge et liste des villes depuis game_data (déjà synchronisé)."""
+        active_city = self.get_city_data()
+        if active_city:
+            resources = active_city.get_resources()
+            self.update_resources(resources, active_city)
+        if update_badge:
+            self.menu_button.update_badge()
+        self.update_city_spinner()
 
     def open_transports_popup(self, instance, touch):
         if instance.collide_point(*touch.pos):
@@ -14,6 +14,9 @@ SITE_TO_RESOURCE = {
     "cotton_field": "cotton"
 }
 
+import math
+import time
+
 from kivy.uix.screenmanager import Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
@@ -22,7 +25,7 @@ from kivy.uix.textinput import TextInput
 from kivy.uix.spinner import Spinner
 from kivy.uix.widget import Widget
 from kivy.uix.slider import Slider
-from kivy.clock import Clock
+from network.refresh_hub import RefreshHub
 from config.message_info import (
     ERROR_INVALID_DONATION,
     ERROR_NO_ACTIVE_CITY,
@@ -56,6 +59,7 @@ class ResourceView(Screen):
         # Supprime l'espace en haut en ajoutant un widget invisible de 0px ou en vérifiant qu'aucun Widget vide n'est ajouté avant le titre
         self.add_widget(self.layout)
         self.upgrade_timer_seconds = 0
+        self.upgrade_timer_deadline = 0.0
         self.upgrade_timer_event = None
 
         # Titre et niveau du site
@@ -192,8 +196,9 @@ class ResourceView(Screen):
         self.layout.spacing = 0.2  # Espacement minimal entre les éléments
 
     def on_timer_update(self, dt):
+        # Calculé depuis l'échéance : exact même après une suspension (vue masquée, voir RefreshHub)
+        self.upgrade_timer_seconds = max(0, math.ceil(self.upgrade_timer_deadline - time.monotonic()))
         if self.upgrade_timer_seconds > 0:
-            self.upgrade_timer_seconds -= 1
             mins = self.upgrade_timer_seconds // 60
             secs = self.upgrade_timer_seconds % 60
             self.upgrade_timer_label.text = f"Timer : {mins:02d}:{secs:02d}"
@@ -209,11 +214,12 @@ class ResourceView(Screen):
         seconds = int(seconds)
         if seconds > 0:
             self.upgrade_timer_seconds = seconds
+            self.upgrade_timer_deadline = time.monotonic() + seconds
             if self.upgrade_timer_event:
                 self.upgrade_timer_event.cancel()
             if seconds > 0:
                 self.upgrade_timer_label.text = f"Timer : {seconds // 60:02d}:{seconds % 60:02d}"
-                self.upgrade_timer_event = Clock.schedule_interval(self.on_timer_update, 1)
+                self.upgrade_timer_event = RefreshHub.shared().subscribe("tick", self.on_timer_update, 1, widget=self)
             else:
                 self.upgrade_timer_label.text = "Timer : 00:00"
         else:
@@ -415,8 +421,12 @@ class ResourceView(Screen):
             island_coords = getattr(self.manager.get_active_city(), 'island_coords', None)
         data = self.manager.network_manager.get_resource_site_info(self.site_type, player_id, island_coords=island_coords)
         city_ids = [city["city_id"] for city in data.get("player_cities", [])]
-        for city_id in city_ids:
-            self.manager.network_manager.assign_workers(city_id, self.resource_key, workers, player_id)
+        # Un seul aller-retour pour toutes les villes, état synchronisé dans la même réponse
+        self.manager.network_manager.batch(
+            [("/assign_workers", {"city_id": city_id, "resource": self.resource_key, "workers": workers, "player_id": player_id})
+             for city_id in city_ids],
+            game_data=self.manager.game_data, stop_on_error=False,
+        )
         self.refresh_view()
 
     def assign_workers_active_city(self):
@@ -498,4 +508,5 @@ class ResourceView(Screen):
                 site["donations"] = {}  # Remise à zéro SEULEMENT donations
                 # NE PAS toucher à donations_history ici !
                 upgraded = True
+                save_load_manager.mark_dirty(site)
                 save_load_manager.save_game()
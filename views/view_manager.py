@@ -49,7 +49,7 @@ class ViewManager(FloatLayout):
         self.game_manager = game_manager
         self.transport_manager = transport_manager
 
-        self.menu_manager = MenuManager(self.switch_view, self.game_data)
+        self.menu_manager = MenuManager(self.switch_view, self.game_data, network_manager=self.network_manager)
         self.city_view = (
             CityView(
                 self, 
@@ -129,9 +129,7 @@ class ViewManager(FloatLayout):
     def sync_from_server(self, on_done=None):
         try:
             city_before = self.get_active_city()
-            data = self.network_manager.get_state() if self.network_manager else None
-            if data:
-                self.game_data.from_dict(data)
+            if self.network_manager and self.network_manager.sync_game_data(self.game_data):
                 # Correction : recoller la ville active sur la nouvelle instance
                 ac_id = self._active_city_id
                 if ac_id:
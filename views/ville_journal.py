@@ -5,8 +5,6 @@ from kivy.uix.widget import Widget
 from kivy.graphics import Color, Rectangle
 from kivy.clock import Clock
 from datetime import datetime
-import threading
-import requests
 
 class Separator(Widget):
     """Séparateur graphique horizontal (ligne grise)."""
@@ -29,10 +27,11 @@ class VilleJournal(BoxLayout):
     - Prend en compte le timestamp au format ISO (converti en datetime si besoin)
     - Utilise un thread pour ne pas bloquer l'UI lors des requêtes réseau
     """
-    def __init__(self, notification_manager, joueur_id, **kwargs):
+    def __init__(self, notification_manager, joueur_id, network_manager=None, **kwargs):
         super().__init__(orientation="vertical", **kwargs)
         self.notification_manager = notification_manager
         self.joueur_id = joueur_id
+        self.network_manager = network_manager
 
         # En-tête du tableau
         header = BoxLayout(orientation="horizontal", size_hint_y=None, height=32)
@@ -52,38 +51,31 @@ class VilleJournal(BoxLayout):
 
     def fetch_notifications(self):
         """Interroge le serveur pour obtenir les notifications."""
+        if self.network_manager is None:
+            return []
         try:
-            url = "http://localhost:5000/get_notifications"
-            response = requests.post(url, json={"joueur_id": self.joueur_id})
-            data = response.json()
-            if data.get("success"):
-                return data.get("notifications", [])
+            return self.network_manager.get_notifications(self.joueur_id)
         except Exception as e:
             print(f"Erreur lors du fetch des notifications: {e}")
         return []
 
     def mark_all_as_read(self, callback=None):
         """Demande au serveur de marquer toutes les notifications comme lues, puis appelle le callback si fourni."""
-        def run():
-            try:
-                url = "http://localhost:5000/mark_notifications_read"
-                response = requests.post(url, json={"joueur_id": self.joueur_id})
-                if callback:
-                    Clock.schedule_once(lambda dt: callback())
-            except Exception as e:
-                print(f"Erreur lors du mark_all_as_read: {e}")
-                if callback:
-                    Clock.schedule_once(lambda dt: callback())
-        threading.Thread(target=run, daemon=True).start()
+        if self.network_manager is None:
+            if callback:
+                Clock.schedule_once(lambda dt: callback())
+            return
+        # Le callback est appelé même si la requête échoue
+        self.network_manager.submit(
+            self.network_manager.mark_notifications_read, self.joueur_id,
+            callback=lambda resp: callback() if callback else None,
+        )
 
     def refresh_async(self):
-        """Lance la récupération des notifications dans un thread."""
+        """Lance la récupération des notifications sans bloquer l'interface (pool de NetworkManager)."""
         self.log_box.clear_widgets()
-        threading.Thread(target=self._fetch_and_update, daemon=True).start()
-
-    def _fetch_and_update(self):
-        notifications = self.fetch_notifications()
-        Clock.schedule_once(lambda dt: self._update_log_box(notifications))
+        if self.network_manager is not None:
+            self.network_manager.submit(self.fetch_notifications, callback=self._update_log_box, key=("journal", self.joueur_id))
 
     def _update_log_box(self, notifications):
         self.log_box.clear_widgets()
@@ -1,26 +1,21 @@
 from kivy.uix.button import Button
-import threading
-import requests
-from kivy.clock import Clock
 
 class MenuButton(Button):
     def __init__(self, **kwargs):
         # Extraire les paramètres personnalisés AVANT l'appel à super
         self.joueur_id = kwargs.pop("joueur_id", None)
         self.notification_manager = kwargs.pop("notification_manager", None)
+        self.network_manager = kwargs.pop("network_manager", None)
         super().__init__(**kwargs)
         self.text = "MENU"
         self.markup = True  # Permet le BBCode pour la couleur et le gras
 
     def fetch_unread_count(self):
-        if self.joueur_id is None:
+        if self.joueur_id is None or self.network_manager is None:
             return 0
         try:
-            url = "http://localhost:5000/get_notifications"
-            response = requests.post(url, json={"joueur_id": self.joueur_id}, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                notifications = data.get("notifications", [])
+            notifications = self.network_manager.get_notifications(self.joueur_id)
+            if notifications:
                 # Toutes les notifications non lues
                 count = sum(1 for n in notifications if not n.get("lu", False))
                 return count
@@ -29,10 +24,10 @@ class MenuButton(Button):
         return 0
 
     def update_badge(self):
-        def run():
-            count = self.fetch_unread_count()
-            Clock.schedule_once(lambda dt: self._set_text(count))
-        threading.Thread(target=run, daemon=True).start()
+        if self.network_manager is None:
+            self._set_text(0)
+            return
+        self.network_manager.submit(self.fetch_unread_count, callback=self._set_text, key=("menu_badge", self.joueur_id))
 
     def _set_text(self, count):
         if count > 0:
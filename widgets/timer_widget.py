@@ -1,8 +1,12 @@
+import math
+import time
+
 from kivy.uix.relativelayout import RelativeLayout
 from kivy.uix.label import Label
-from kivy.clock import Clock
 from kivy.graphics import Color, RoundedRectangle
 
+from network.refresh_hub import RefreshHub
+
 class TimerWidget(RelativeLayout):
     """
     Widget affichant un timer stylé (bannière arrondie, police et couleurs personnalisables).
@@ -30,6 +34,7 @@ class TimerWidget(RelativeLayout):
     ):
         super().__init__(**kwargs)
         self.remaining_time = max(0, int(initial_time))
+        self.deadline = time.monotonic() + self.remaining_time
         self.on_timer_finished = on_timer_finished
 
         self.label = Label(
@@ -57,27 +62,27 @@ class TimerWidget(RelativeLayout):
         self.update_text()
         self.timer_event = None
         if self.remaining_time > 0:
-            self.timer_event = Clock.schedule_interval(self._tick, 1)
+            self.timer_event = RefreshHub.shared().subscribe("tick", self._tick, 1, widget=self)
 
     def _tick(self, dt):
-        if self.remaining_time > 0:
-            self.remaining_time -= 1
-            self.update_text()
+        # Calculé depuis l'échéance : exact même après une suspension (widget masqué, voir RefreshHub)
+        self.remaining_time = max(0, math.ceil(self.deadline - time.monotonic()))
+        self.update_text()
         if self.remaining_time <= 0:
-            self.update_text()
             if self.timer_event:
-                Clock.unschedule(self._tick)
+                self.timer_event.cancel()
                 self.timer_event = None
             if self.on_timer_finished:
                 self.on_timer_finished()
 
     def set_time(self, remaining_time):
         self.remaining_time = max(0, int(remaining_time))
+        self.deadline = time.monotonic() + self.remaining_time
         self.update_text()
         if self.remaining_time > 0 and not self.timer_event:
-            self.timer_event = Clock.schedule_interval(self._tick, 1)
+            self.timer_event = RefreshHub.shared().subscribe("tick", self._tick, 1, widget=self)
         if self.remaining_time <= 0 and self.timer_event:
-            Clock.unschedule(self._tick)
+            self.timer_event.cancel()
             self.timer_event = None
 
     def update_text(self):
@@ -1,24 +1,28 @@
+from kivy.app import App
 from kivy.uix.button import Button
-import threading
-import requests
-from kivy.clock import Clock
 
 class VilleButton(Button):
-    def __init__(self, joueur_id=None, **kwargs):
+    def __init__(self, joueur_id=None, network_manager=None, **kwargs):
         super().__init__(**kwargs)
         self.joueur_id = joueur_id
+        self.network_manager = network_manager
         self.text = "VILLE"
         self.markup = True
 
+    def get_network_manager(self):
+        """Gestionnaire réseau passé à la construction, sinon celui de l'application (widget racine)."""
+        if self.network_manager is None:
+            root = getattr(App.get_running_app(), "root", None)
+            self.network_manager = getattr(root, "network_manager", None)
+        return self.network_manager
+
     def fetch_unread_ville_count(self):
-        if self.joueur_id is None:
+        network_manager = self.get_network_manager()
+        if self.joueur_id is None or network_manager is None:
             return 0
         try:
-            url = "http://localhost:5000/get_notifications"
-            response = requests.post(url, json={"joueur_id": self.joueur_id}, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                notifications = data.get("notifications", [])
+            notifications = network_manager.get_notifications(self.joueur_id)
+            if notifications:
                 # Filtrer uniquement les notifications de type "ville"
                 count = sum(
                     1 for n in notifications
@@ -30,10 +34,11 @@ class VilleButton(Button):
         return 0
 
     def update_badge(self):
-        def run():
-            count = self.fetch_unread_ville_count()
-            Clock.schedule_once(lambda dt: self._set_text(count))
-        threading.Thread(target=run, daemon=True).start()
+        network_manager = self.get_network_manager()
+        if network_manager is None:
+            self._set_text(0)
+            return
+        network_manager.submit(self.fetch_unread_ville_count, callback=self._set_text, key=("ville_badge", self.joueur_id))
 
     def _set_text(self, count):
         if count > 0: